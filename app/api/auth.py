@@ -1,6 +1,6 @@
 # app/api/auth.py
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.config import settings
@@ -8,10 +8,30 @@ from app.repositories.user import UserRepository
 from app.schemas.auth import Token, UserCreate, UserLogin
 from app.schemas.user import UserResponse
 from app.services.auth import AuthService
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.login_throttle import login_throttle, LoginThrottled
 from app.utils.database import get_db
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def _throttled(e: LoginThrottled):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many failed login attempts, please try again later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _client_ip(request: Request):
+    peer = request.client.host if request.client else None
+    return login_throttle.client_ip(peer, request.headers.get("x-forwarded-for"))
+
+def _hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many sign-ins at once, please try again in a moment",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=UserResponse)
 async def register(
     user_data: UserCreate,
@@ -34,20 +54,29 @@ async def register(
             detail="Email already registered"
         )
     
+    # Hash on the password hasher's pool rather than the event loop
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    
     # Create new user
     try:
         user = user_repo.create(
             username=user_data.username,
             email=user_data.email,
             password=user_data.password,
-            full_name=user_data.full_name
+            full_name=user_data.full_name,
+            hashed_password=hashed_password
         )
+        # The username may have been cached as unknown by a failed login
+        login_throttle.forget_unknown_user(user.username)
         
         # Generate initial token for immediate login
         auth_service = AuthService(db)
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = auth_service.create_access_token(
-            data={"sub": user.username}, 
+            data=auth_service.token_claims(user), 
             expires_delta=access_token_expires
         )
         
@@ -75,12 +104,13 @@ async def register(
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     try:
         auth_service = AuthService(db)
-        user = auth_service.authenticate_user(form_data.username, form_data.password)
+        user = await auth_service.authenticate_user(form_data.username, form_data.password, _client_ip(request))
         
         if not user:
             raise HTTPException(
@@ -91,7 +121,7 @@ async def login_for_access_token(
         
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = auth_service.create_access_token(
-            data={"sub": user.username}, 
+            data=auth_service.token_claims(user), 
             expires_delta=access_token_expires
         )
         
@@ -105,6 +135,10 @@ async def login_for_access_token(
             "user_id": user.id,
             "username": user.username
         }
+    except LoginThrottled as e:
+        raise _throttled(e)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -113,11 +147,17 @@ async def login_for_access_token(
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     login_data: UserLogin,
     db: Session = Depends(get_db)
 ):
     auth_service = AuthService(db)
-    user = auth_service.authenticate_user(login_data.username, login_data.password)
+    try:
+        user = await auth_service.authenticate_user(login_data.username, login_data.password, _client_ip(request))
+    except LoginThrottled as e:
+        raise _throttled(e)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     
     if not user:
         raise HTTPException(
@@ -128,7 +168,7 @@ async def login(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth_service.create_access_token(
-        data={"sub": user.username}, 
+        data=auth_service.token_claims(user), 
         expires_delta=access_token_expires
     )
     
@@ -166,4 +206,14 @@ async def read_users_me(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving user profile: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/hash-metrics")
+async def get_hash_metrics(
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Timing percentiles, counters and queue depth of the password hasher in
+    this API process.
+    """
+    return password_hasher.stats()
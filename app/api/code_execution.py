@@ -1,13 +1,21 @@
 # app/api/code_execution.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional
-from pydantic import BaseModel
-from app.services.code_execution import CodeExecutionService
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, status, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, conlist
+from app.services import code_execution as code_execution_service
+from app.services.code_execution import CodeExecutionService, ExecutionQueueFull
+from app.services.execution_worker import ExecutorUnavailable
 from app.services.auth import AuthService
+from app.utils.database import SessionLocal
+from app.utils.http_errors import RUNNER_BUSY_DETAIL, runner_busy, executor_unavailable
 
 router = APIRouter(prefix="/code", tags=["code execution"])
 
+MAX_TEST_CASES = 50
+
 class CodeExecutionRequest(BaseModel):
     code: str
     expected_output: Optional[str] = None
@@ -19,6 +27,46 @@ class CodeExecutionResponse(BaseModel):
     error: Optional[str] = None
     execution_time: float
     matches_expected: Optional[bool] = None
+    cached: Optional[bool] = False
+    output_truncated: Optional[bool] = False
+    # Which sandbox limit stopped the program: timeout, cpu, memory, output, processes or file_size
+    limit_exceeded: Optional[str] = None
+    # Set when the code was rejected before running: syntax or forbidden_import
+    rejected: Optional[str] = None
+    error_line: Optional[int] = None
+    error_column: Optional[int] = None
+
+class JobSubmittedResponse(BaseModel):
+    job_id: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # pending or done
+    result: Optional[CodeExecutionResponse] = None
+
+class TestCase(BaseModel):
+    stdin: Optional[str] = None
+    expected_output: str
+
+class GradingRequest(BaseModel):
+    code: str
+    test_cases: conlist(TestCase, min_items=1, max_items=MAX_TEST_CASES)
+
+class TestCaseResult(BaseModel):
+    index: int
+    passed: bool
+    output: str
+    error: Optional[str] = None
+    execution_time: float
+    timed_out: bool = False
+    limit_exceeded: Optional[str] = None
+
+class GradingResponse(BaseModel):
+    passed: bool
+    passed_count: int
+    total: int
+    first_failure: Optional[int] = None
+    cases: List[TestCaseResult]
 
 @router.post("/execute", response_model=CodeExecutionResponse)
 async def execute_code(
@@ -28,11 +76,221 @@ async def execute_code(
     """
     Execute Python code and return the result.
     This endpoint requires authentication.
+    Returns 429 when the code runner is saturated and 503 when the execution
+    workers are unreachable.
+    """
+    execution_service = CodeExecutionService()
+    try:
+        result = await execution_service.execute_code_async(
+            code=request.code,
+            expected_output=request.expected_output
+        )
+    except ExecutionQueueFull:
+        raise runner_busy()
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+    
+    return result
+
+@router.post("/grade", response_model=GradingResponse)
+async def grade_code(
+    request: GradingRequest,
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Run one program against several stdin/expected-output test cases in parallel.
+    Returns per-case verdicts and the index of the first failing case.
+    """
+    execution_service = CodeExecutionService()
+    try:
+        return await execution_service.run_test_cases(
+            request.code,
+            [case.dict() for case in request.test_cases]
+        )
+    except ExecutionQueueFull:
+        raise runner_busy()
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+
+@router.post("/jobs", response_model=JobSubmittedResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    request: CodeExecutionRequest,
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Queue code on the execution worker tier and return a job ID to poll.
+    Requires CODE_EXECUTION_BACKEND=remote.
+    """
+    execution_service = CodeExecutionService()
+    try:
+        job_id = await execution_service.submit_job(
+            code=request.code,
+            expected_output=request.expected_output,
+            owner=current_user.id
+        )
+    except ExecutionQueueFull:
+        raise runner_busy()
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+    
+    return {"job_id": job_id}
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30),
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Get the status of a queued job, optionally waiting up to `wait` seconds for it to finish.
     """
     execution_service = CodeExecutionService()
-    result = execution_service.execute_code(
-        code=request.code,
-        expected_output=request.expected_output
-    )
+    try:
+        job = await execution_service.get_job(job_id, owner=current_user.id, wait=wait)
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+    
+    if job["status"] == "unknown":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return {"job_id": job_id, "status": job["status"], "result": job.get("result")}
+
+def _websocket_user(token: Optional[str]):
+    """
+    Resolve the user of a WebSocket connection. Browsers cannot set headers on
+    WebSockets, so the access token is passed as a query parameter.
+    Blocking (it may query the database): call it through run_in_threadpool.
+    """
+    if not token:
+        return None
+    
+    db = SessionLocal()
+    try:
+        return AuthService().get_current_user(token=token, db=db)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+@router.websocket("/stream")
+async def stream_code(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Run code and stream its output while it runs.
+    Authenticate with ?token=<access token>.
+    
+    Client messages:
+        {"type": "run", "code": "...", "stdin": "..."}  (first message; stdin is optional
+            and, when given, is the program's whole input)
+        {"type": "stdin", "data": "..."}
+        {"type": "eof"}
+        {"type": "cancel"}
+    Server messages:
+        {"type": "started", "execution_id": "..."}
+        {"type": "stdout" | "stderr", "data": "..."}
+        {"type": "exit", "returncode": ..., "execution_time": ..., "timed_out": ...,
+         "cancelled": ..., "output_truncated": ..., "limit_exceeded": ...,
+         "rejected": ..., "error_line": ..., "error_column": ...}
+        {"type": "error", "detail": "..."}
+    The socket is closed after the exit or error message.
+    """
+    if await run_in_threadpool(_websocket_user, token) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+    except WebSocketDisconnect:
+        return
+    except ValueError:
+        message = {}
+    
+    if not isinstance(message, dict) or message.get("type") != "run" or not isinstance(message.get("code"), str):
+        await websocket.send_json({"type": "error", "detail": "The first message must be a run message with code"})
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+    
+    execution_service = CodeExecutionService()
+    execution = execution_service.create_stream(message["code"])
+    if message.get("stdin") is not None:
+        # Input given up front is the whole input; interactive clients send stdin messages instead
+        await execution.write_stdin(str(message["stdin"]))
+        execution.close_stdin()
+    
+    async def send(event: Dict[str, Any]):
+        try:
+            await websocket.send_json(event)
+        except Exception:
+            # The client went away: stop the program and free its slot
+            execution.cancel()
+    
+    async def receive_controls():
+        while True:
+            try:
+                control = await websocket.receive_json()
+            except WebSocketDisconnect:
+                execution.cancel()
+                return
+            except ValueError:
+                continue
+            
+            kind = control.get("type") if isinstance(control, dict) else None
+            if kind == "stdin":
+                await execution.write_stdin(str(control.get("data", "")))
+            elif kind == "eof":
+                execution.close_stdin()
+            elif kind == "cancel":
+                execution.cancel()
+    
+    controls = asyncio.ensure_future(receive_controls())
+    try:
+        await send({"type": "started", "execution_id": execution.execution_id})
+        result = await execution_service.stream_code(execution, send)
+        await send({"type": "exit", **result})
+    except ExecutionQueueFull:
+        await send({"type": "error", "detail": RUNNER_BUSY_DETAIL})
+    finally:
+        controls.cancel()
+    
+    try:
+        await websocket.close()
+    except Exception:
+        pass
+
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_cache_stats(
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Hit/miss counters for the execution result cache and the pre-check cache.
+    """
+    precheck = code_execution_service.code_precheck.stats()
+    if code_execution_service.result_cache is None:
+        return {"enabled": False, "precheck": precheck}
+    
+    return {"enabled": True, **code_execution_service.result_cache.stats(), "precheck": precheck}
+
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_metrics(
+    current_user = Depends(AuthService().get_current_user)
+):
+    """
+    Per-phase timing percentiles, event counters and the current load of the
+    code runner in this API process. With the remote backend the execution
+    worker tier's queue is included as well.
+    """
+    snapshot = code_execution_service.get_runner_metrics()
+    
+    execution_service = CodeExecutionService()
+    if execution_service.remote is not None:
+        loop = asyncio.get_running_loop()
+        try:
+            # A socket round trip; keep it off the event loop
+            snapshot["executor"] = await loop.run_in_executor(None, execution_service.remote.stats)
+        except ExecutorUnavailable as e:
+            snapshot["executor"] = {"error": str(e)}
     
-    return result
\ No newline at end of file
+    return snapshot
@@ -1,23 +1,33 @@
 # app/api/courses.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from app.models.course import Course
 from app.models.topic import Topic
 from app.schemas.course import CourseResponse, CourseListResponse
 from app.services.course import CourseService
+from app.services.catalog import content_validator
+from app.utils.http_cache import request_etag, etag_matches, cache_headers, not_modified
 from app.utils.database import get_db
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
 @router.get("", response_model=List[CourseListResponse])
 async def get_courses(
+    request: Request,
+    response: Response,
     user_id: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
     try:
+        # Answer revalidations from the content and progress versions alone
+        etag = request_etag(request, content_validator(db, user_id))
+        if etag_matches(request, etag):
+            return not_modified(etag, private=bool(user_id))
+        
         course_service = CourseService(db)
         courses = course_service.get_all_courses(user_id)
+        response.headers.update(cache_headers(etag, private=bool(user_id)))
         return courses
     except Exception as e:
         # Log the error
@@ -30,10 +40,17 @@ async def get_courses(
 @router.get("/{course_id}", response_model=CourseResponse)
 async def get_course(
     course_id: int,
+    request: Request,
+    response: Response,
     user_id: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
     try:
+        # Answer revalidations from the content and progress versions alone
+        etag = request_etag(request, content_validator(db, user_id))
+        if etag_matches(request, etag):
+            return not_modified(etag, private=bool(user_id))
+        
         course_service = CourseService(db)
         course = course_service.get_course_with_topics(course_id, user_id)
         
@@ -43,6 +60,7 @@ async def get_course(
                 detail="Course not found"
             )
             
+        response.headers.update(cache_headers(etag, private=bool(user_id)))
         return course
     except HTTPException:
         # Re-raise HTTP exceptions
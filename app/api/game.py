@@ -1,45 +1,83 @@
 # app/api/game.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.services.auth import AuthService
 from app.services.game import GameService
+from app.repositories.game import GAME_SORT_KEYS
+from app.services.catalog import content_validator
+from app.utils.http_cache import request_etag, etag_matches, cache_headers, not_modified
 from app.utils.database import get_db
+from app.config import settings
 from app.schemas.game import GameResponse, GameDetailResponse, GameProgressUpdate, GameProgressResponse
 
 router = APIRouter(prefix="/game", tags=["game"])
 
 @router.get("", response_model=List[GameResponse])
 async def get_games(
+    request: Request,
+    response: Response,
     user_id: Optional[int] = Query(None),
     difficulty: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
+    sort: str = Query("id", regex="^({})$".format("|".join(GAME_SORT_KEYS))),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=settings.GAME_PAGE_MAX_SIZE),
     db: Session = Depends(get_db)
 ):
     """
-    Get all games with optional filters
+    Get all games with optional filters, ordered by id or title.
+    
+    With limit or cursor the games come a page at a time (limit defaults
+    to GAME_PAGE_SIZE); when there are more games, the X-Next-Cursor
+    header holds the cursor for the next page, to be passed back with the
+    same filters and sort.
     """
-    game_service = GameService(db)
-    games = game_service.get_all_games(user_id)
+    # Answer revalidations from the content and progress versions alone
+    etag = request_etag(request, content_validator(db, user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag, private=bool(user_id))
     
-    # Apply filters if provided
-    if difficulty:
-        games = [g for g in games if g["difficulty"].lower() == difficulty.lower()]
+    if cursor is not None and limit is None:
+        limit = settings.GAME_PAGE_SIZE
     
-    if category:
-        games = [g for g in games if g["category"].lower() == category.lower()]
+    game_service = GameService(db)
+    try:
+        games, next_cursor = game_service.get_games_page(
+            user_id,
+            difficulty=difficulty,
+            category=category,
+            sort=sort,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     
+    response.headers.update(cache_headers(etag, private=bool(user_id)))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return games
 
 @router.get("/{slug}", response_model=GameDetailResponse)
 async def get_game(
     slug: str,
+    request: Request,
+    response: Response,
     user_id: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
     """
     Get a specific game by slug
     """
+    # Answer revalidations from the content and progress versions alone
+    etag = request_etag(request, content_validator(db, user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag, private=bool(user_id))
+    
     game_service = GameService(db)
     game = game_service.get_game_by_slug(slug, user_id)
     
@@ -49,6 +87,7 @@ async def get_game(
             detail="Game not found"
         )
     
+    response.headers.update(cache_headers(etag, private=bool(user_id)))
     return game
 
 @router.post("/{game_id}/progress", response_model=GameProgressResponse)
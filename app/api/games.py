@@ -1,16 +1,22 @@
 # app/api/games.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
-from pydantic import BaseModel
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, conlist
 from sqlalchemy.orm import Session
 from app.services.auth import AuthService
 from app.services.game import GameService
-from app.services.code_execution import CodeExecutionService
+from app.services.code_execution import CodeExecutionService, ExecutionQueueFull, gather_or_cancel
+from app.services.execution_worker import ExecutorUnavailable
 from app.utils.database import get_db
+from app.utils.http_errors import runner_busy, executor_unavailable
+from app.config import settings
 
 router = APIRouter(prefix="/games", tags=["games"])
 
+MAX_BATCH_SUBMISSIONS = 50
+
 class ChallengeResponse(BaseModel):
     id: str
     title: str
@@ -23,6 +29,21 @@ class ChallengeSubmission(BaseModel):
     challenge_id: str
     code: str
 
+class BatchChallengeSubmission(BaseModel):
+    submissions: conlist(ChallengeSubmission, min_items=1, max_items=MAX_BATCH_SUBMISSIONS)
+
+class TestCaseVerdict(BaseModel):
+    index: int
+    passed: bool
+    output: Optional[str] = None
+    error: Optional[str] = None
+    execution_time: float = 0
+    timed_out: bool = False
+    limit_exceeded: Optional[str] = None
+    # Only filled in for visible test cases
+    stdin: Optional[str] = None
+    expected_output: Optional[str] = None
+
 class ChallengeEvaluationResponse(BaseModel):
     success: bool
     correct: bool
@@ -31,6 +52,16 @@ class ChallengeEvaluationResponse(BaseModel):
     output: Optional[str] = None
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    challenge_id: Optional[str] = None
+    passed_count: int = 0
+    total: int = 0
+    first_failure: Optional[int] = None
+    cases: List[TestCaseVerdict] = []
+
+class BatchEvaluationResponse(BaseModel):
+    results: List[ChallengeEvaluationResponse]
+    total_points_earned: int
+    total_coins_earned: int
 
 @router.get("/challenges", response_model=List[ChallengeResponse])
 async def get_challenges(
@@ -50,45 +81,133 @@ async def get_challenges(
     
     return challenges
 
-@router.post("/challenges/submit", response_model=ChallengeEvaluationResponse)
-async def submit_challenge(
+def _parse_challenge_id(challenge_id: str) -> int:
+    try:
+        return int(challenge_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Challenge {challenge_id} not found"
+        )
+
+def _evaluate_submission(
+    game_service: GameService,
+    user_id: int,
     submission: ChallengeSubmission,
-    current_user = Depends(AuthService().get_current_user),
-    db: Session = Depends(get_db)
-):
+    test_cases: List[Dict[str, Any]],
+    grading: Dict[str, Any]
+) -> Dict[str, Any]:
     """
-    Submit a solution to a coding challenge.
+    Record a graded submission and build its evaluation response.
     """
-    # Execute the code
-    execution_service = CodeExecutionService()
-    execution_result = execution_service.execute_code(submission.code)
+    cases = []
+    for case, test_case in zip(grading["cases"], test_cases):
+        verdict = dict(case)
+        if not test_case["is_hidden"]:
+            verdict["stdin"] = test_case["stdin"]
+            verdict["expected_output"] = test_case["expected_output"]
+        cases.append(verdict)
     
-    if not execution_result["success"]:
-        return {
-            "success": False,
-            "correct": False,
-            "points_earned": 0,
-            "coins_earned": 0,
-            "output": execution_result.get("output", ""),
-            "error": execution_result.get("error", ""),
-            "execution_time": execution_result.get("execution_time", 0)
-        }
+    # Report the first failing case, or the first case when everything passed
+    shown = cases[grading["first_failure"] or 0]
+    success = all(case["success"] for case in cases)
     
-    # Evaluate the challenge
-    game_service = GameService(db)
+    # Every graded submission is recorded as an attempt, crashing ones included
     evaluation = game_service.evaluate_challenge(
-        user_id=current_user.id,
+        user_id=user_id,
         challenge_id=submission.challenge_id,
         code=submission.code,
-        output=execution_result["output"]
+        grading=grading
     )
     
     return {
-        "success": True,
+        "success": success,
         "correct": evaluation.get("correct", False),
         "points_earned": evaluation.get("points_earned", 0),
         "coins_earned": evaluation.get("coins_earned", 0),
-        "output": execution_result.get("output", ""),
-        "error": execution_result.get("error", ""),
-        "execution_time": execution_result.get("execution_time", 0)
-    }
\ No newline at end of file
+        "output": shown["output"],
+        "error": shown["error"],
+        "execution_time": round(sum(case["execution_time"] for case in cases), 3),
+        "challenge_id": submission.challenge_id,
+        "passed_count": grading["passed_count"],
+        "total": grading["total"],
+        "first_failure": grading["first_failure"],
+        "cases": cases
+    }
+
+@router.post("/challenges/submit", response_model=ChallengeEvaluationResponse)
+async def submit_challenge(
+    submission: ChallengeSubmission,
+    current_user = Depends(AuthService().get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit a solution to a coding challenge.
+    The code is run against every test case of the challenge.
+    """
+    game_service = GameService(db)
+    challenge_id = _parse_challenge_id(submission.challenge_id)
+    test_cases = game_service.get_challenge_test_cases([challenge_id]).get(challenge_id)
+    
+    if test_cases is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
+    
+    execution_service = CodeExecutionService()
+    try:
+        grading = await execution_service.run_test_cases(submission.code, test_cases)
+    except ExecutionQueueFull:
+        raise runner_busy()
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+    
+    return _evaluate_submission(game_service, current_user.id, submission, test_cases, grading)
+
+@router.post("/challenges/submit-batch", response_model=BatchEvaluationResponse)
+async def submit_challenges_batch(
+    batch: BatchChallengeSubmission,
+    current_user = Depends(AuthService().get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Grade several challenge submissions in one call (e.g. a whole lesson's exercises).
+    Submissions are run in parallel; results keep the order of the request.
+    """
+    game_service = GameService(db)
+    challenge_ids = [_parse_challenge_id(s.challenge_id) for s in batch.submissions]
+    test_cases = game_service.get_challenge_test_cases(list(set(challenge_ids)))
+    
+    missing = [str(cid) for cid in challenge_ids if cid not in test_cases]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Challenges not found: {', '.join(missing)}"
+        )
+    
+    execution_service = CodeExecutionService()
+    limiter = asyncio.Semaphore(settings.CODE_EXECUTION_MAX_CONCURRENCY)
+    
+    try:
+        # Run every program first, then record attempts one by one on the shared
+        # session; if one run is refused the others are cancelled
+        gradings = await gather_or_cancel(*[
+            execution_service.run_test_cases(submission.code, test_cases[cid], limiter)
+            for submission, cid in zip(batch.submissions, challenge_ids)
+        ])
+    except ExecutionQueueFull:
+        raise runner_busy()
+    except ExecutorUnavailable as e:
+        raise executor_unavailable(e)
+    
+    results = [
+        _evaluate_submission(game_service, current_user.id, submission, test_cases[cid], grading)
+        for submission, cid, grading in zip(batch.submissions, challenge_ids, gradings)
+    ]
+    
+    return {
+        "results": results,
+        "total_points_earned": sum(r["points_earned"] for r in results),
+        "total_coins_earned": sum(r["coins_earned"] for r in results)
+    }
@@ -1,9 +1,11 @@
 # app/api/lessons.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.schemas.lesson import LessonDetailResponse
 from app.services.lesson import LessonService
+from app.services.catalog import content_validator
+from app.utils.http_cache import request_etag, etag_matches, cache_headers, not_modified
 from app.utils.database import get_db
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
@@ -11,20 +13,28 @@ router = APIRouter(prefix="/lessons", tags=["lessons"])
 @router.get("/{lesson_id}", response_model=Optional[LessonDetailResponse])
 async def get_lesson(
     lesson_id: int,
+    request: Request,
     user_id: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
     try:
+        # Answer revalidations from the content and progress versions alone
+        etag = request_etag(request, content_validator(db, user_id))
+        if etag_matches(request, etag):
+            return not_modified(etag, private=bool(user_id))
+        
+        # Pre-rendered JSON: bypasses response_model validation, which the
+        # cached part already went through when it was rendered
         lesson_service = LessonService(db)
-        lesson = lesson_service.get_lesson_detail(lesson_id, user_id)
+        body = lesson_service.render_lesson_detail(lesson_id, user_id)
         
-        if not lesson:
+        if not body:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Lesson not found"
             )
             
-        return lesson
+        return Response(content=body, media_type="application/json", headers=cache_headers(etag, private=bool(user_id)))
     except Exception as e:
         # Log the error
         print(f"Error in get_lesson endpoint: {str(e)}")
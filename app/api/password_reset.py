@@ -2,13 +2,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
-import secrets
-import string
 from app.utils.database import get_db
 from app.repositories.user import UserRepository
 from app.utils.email import EmailService
-from app.utils.security import get_password_hash
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.token_versions import bump_token_version
+from app.services.password_reset import PasswordResetService, INVALID, EXPIRED
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -24,14 +23,11 @@ class ResetPasswordRequest(BaseModel):
     token: str
     new_password: str
 
-# Store reset tokens temporarily (in a real app, you'd use Redis or a database table)
-# Format: {email: {'token': 'abc123', 'expires': datetime_obj}}
-reset_tokens = {}
-
-def generate_reset_token(length=32):
-    """Generate a secure random token"""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+def _token_error(reason: str):
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Token has expired" if reason == EXPIRED else "Invalid or expired token"
+    )
 
 @router.post("/forgot-password")
 async def request_password_reset(
@@ -46,53 +42,38 @@ async def request_password_reset(
         # Don't reveal whether the user exists for security reasons
         return {"message": "If the email exists, a password reset link has been sent"}
     
-    # Generate a reset token
-    token = generate_reset_token()
-    
-    # Set token expiration (30 minutes)
-    expiration = datetime.utcnow() + timedelta(minutes=30)
-    
-    # Store token
-    reset_tokens[request.email] = {
-        'token': token,
-        'expires': expiration
-    }
+    # Generate a reset token; only its hash is stored
+    token = PasswordResetService(db).issue_token(user)
+    db.commit()
     
-    # Send reset email
+    # Queue the reset email; the email worker delivers it in the background
     email_service = EmailService()
-    email_sent = email_service.send_password_reset(
+    email_queued = email_service.send_password_reset(
         to_email=request.email,
         reset_token=token,
         username=user.username
     )
     
-    if not email_sent:
+    if not email_queued:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send password reset email"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Failed to send password reset email, please try again later",
+            headers={"Retry-After": "30"}
         )
     
     return {"message": "If the email exists, a password reset link has been sent"}
 
 @router.post("/verify-reset-token")
-async def verify_reset_token(request: VerifyResetTokenRequest):
-    # Check if token exists and is valid
-    token_data = reset_tokens.get(request.email)
-    
-    if not token_data or token_data['token'] != request.token:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid or expired token"
-        )
+async def verify_reset_token(
+    request: VerifyResetTokenRequest,
+    db: Session = Depends(get_db)
+):
+    # Check if token exists and is valid (expired tokens are deleted)
+    record, error = PasswordResetService(db).check_token(request.email, request.token)
+    db.commit()
     
-    # Check if token is expired
-    if token_data['expires'] < datetime.utcnow():
-        # Remove expired token
-        reset_tokens.pop(request.email, None)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token has expired"
-        )
+    if error:
+        raise _token_error(error)
     
     return {"valid": True}
 
@@ -101,40 +82,34 @@ async def reset_password(
     request: ResetPasswordRequest,
     db: Session = Depends(get_db)
 ):
-    # Check if token exists and is valid
-    token_data = reset_tokens.get(request.email)
+    # Check if token exists and is valid (expired tokens are deleted)
+    reset_service = PasswordResetService(db)
+    record, error = reset_service.check_token(request.email, request.token)
     
-    if not token_data or token_data['token'] != request.token:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid or expired token"
-        )
+    if error:
+        db.commit()
+        raise _token_error(error)
     
-    # Check if token is expired
-    if token_data['expires'] < datetime.utcnow():
-        # Remove expired token
-        reset_tokens.pop(request.email, None)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token has expired"
-        )
+    # The token belongs to the user with this email
+    user = record.user
     
-    # Get the user
-    user_repo = UserRepository(db)
-    user = user_repo.get_by_email(request.email)
-    
-    if not user:
+    # Update password, hashing on the password hasher's pool
+    try:
+        hashed_password = await password_hasher.hash(request.new_password)
+    except PasswordHasherBusy:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again in a moment",
+            headers={"Retry-After": "1"}
         )
+    # Remove the token in the same transaction, so it cannot be used twice
+    if not reset_service.consume(record):
+        db.rollback()
+        raise _token_error(INVALID)
     
-    # Update password
-    hashed_password = get_password_hash(request.new_password)
     user.hashed_password = hashed_password
+    # Sign out every existing session
+    bump_token_version(db, user)
     db.commit()
     
-    # Remove the token
-    reset_tokens.pop(request.email, None)
-    
     return {"message": "Password has been reset successfully"}
\ No newline at end of file
@@ -1,8 +1,10 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from app.schemas.topic import TopicDetailResponse
 from app.services.topic import TopicService
+from app.services.catalog import content_validator
+from app.utils.http_cache import request_etag, etag_matches, cache_headers, not_modified
 from app.utils.database import get_db
 
 router = APIRouter(prefix="/topics", tags=["topics"])
@@ -10,9 +12,16 @@ router = APIRouter(prefix="/topics", tags=["topics"])
 @router.get("/{topic_id}", response_model=TopicDetailResponse)
 async def get_topic(
     topic_id: int,
+    request: Request,
+    response: Response,
     user_id: int = None,  # Optional, for getting user progress
     db: Session = Depends(get_db)
 ):
+    # Answer revalidations from the content and progress versions alone
+    etag = request_etag(request, content_validator(db, user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag, private=bool(user_id))
+    
     topic_service = TopicService(db)
     topic = topic_service.get_topic_with_lessons(topic_id, user_id)
     
@@ -22,4 +31,5 @@ async def get_topic(
             detail="Topic not found"
         )
         
+    response.headers.update(cache_headers(etag, private=bool(user_id)))
     return topic
\ No newline at end of file
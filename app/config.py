@@ -17,6 +17,29 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "u-know-who-am-i")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # bcrypt cost; stored hashes with a different cost are rehashed at login
+    PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    # Threads hashing passwords, and how many more requests may wait before a 429
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+    # Failed logins allowed per username and per client IP in a sliding window,
+    # and how long unknown usernames are remembered when the counters are in
+    # Redis (0 disables a limit)
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_USERNAME", "5"))
+    LOGIN_MAX_FAILURES_PER_IP: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "50"))
+    LOGIN_FAILURE_WINDOW_SECONDS: float = float(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "300"))
+    LOGIN_UNKNOWN_USER_TTL_SECONDS: float = float(os.getenv("LOGIN_UNKNOWN_USER_TTL_SECONDS", "60"))
+    LOGIN_THROTTLE_MAX_KEYS: int = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+    # Share the counters between API workers (optional, needs the redis package)
+    LOGIN_THROTTLE_REDIS_URL: str = os.getenv("LOGIN_THROTTLE_REDIS_URL", "")
+    # Reverse proxies (addresses or CIDR ranges, comma-separated) whose
+    # X-Forwarded-For names the client for the per-IP login limit
+    LOGIN_TRUSTED_PROXIES: str = os.getenv("LOGIN_TRUSTED_PROXIES", "")
+    # Password reset links, and how often expired ones are swept from the table
+    PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("PASSWORD_RESET_TOKEN_EXPIRE_MINUTES", "30"))
+    PASSWORD_RESET_SWEEP_SECONDS: float = float(os.getenv("PASSWORD_RESET_SWEEP_SECONDS", "300"))
+    # How often each process re-reads revoked token versions
+    TOKEN_VERSION_REFRESH_SECONDS: float = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
     
     # Database - Using MySQL
     DATABASE_URL: str = os.getenv(
@@ -31,6 +54,81 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     FROM_EMAIL: str = os.getenv("FROM_EMAIL", "no-reply@pythonchick.com")
     FROM_NAME: str = os.getenv("FROM_NAME", "Pythonchick")
+    # Set to false for servers without STARTTLS (e.g. scripts/smtp_stub.py)
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+    # Outbound email queue: capacity, messages per batch, delivery attempts,
+    # first retry delay (doubling after), idle time before the SMTP connection
+    # is closed, and the dead-letter log (empty disables the file)
+    EMAIL_QUEUE_MAX_SIZE: int = int(os.getenv("EMAIL_QUEUE_MAX_SIZE", "1000"))
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+    EMAIL_RETRY_BASE_SECONDS: float = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "5"))
+    EMAIL_SMTP_IDLE_SECONDS: float = float(os.getenv("EMAIL_SMTP_IDLE_SECONDS", "60"))
+    EMAIL_DEAD_LETTER_PATH: str = os.getenv("EMAIL_DEAD_LETTER_PATH", "email_dead_letter.jsonl")
+    
+    # Code execution
+    CODE_EXECUTION_TIMEOUT: int = int(os.getenv("CODE_EXECUTION_TIMEOUT", "5"))
+    # Number of pre-started interpreters (0 disables the pool and cold-starts every run)
+    CODE_EXECUTION_POOL_SIZE: int = int(os.getenv("CODE_EXECUTION_POOL_SIZE", "4"))
+    CODE_EXECUTION_MAX_RUNS_PER_WORKER: int = int(os.getenv("CODE_EXECUTION_MAX_RUNS_PER_WORKER", "50"))
+    CODE_EXECUTION_MEMORY_LIMIT_MB: int = int(os.getenv("CODE_EXECUTION_MEMORY_LIMIT_MB", "256"))
+    CODE_EXECUTION_MAX_OUTPUT_BYTES: int = int(os.getenv("CODE_EXECUTION_MAX_OUTPUT_BYTES", str(64 * 1024)))
+    # Sandbox rlimits (POSIX only); the memory limit above also only applies in sandbox mode
+    CODE_SANDBOX_LIMITS_ENABLED: bool = os.getenv("CODE_SANDBOX_LIMITS_ENABLED", "true").lower() == "true"
+    CODE_EXECUTION_CPU_LIMIT_SECONDS: int = int(os.getenv("CODE_EXECUTION_CPU_LIMIT_SECONDS", "4"))
+    CODE_EXECUTION_MAX_FILE_SIZE_KB: int = int(os.getenv("CODE_EXECUTION_MAX_FILE_SIZE_KB", "1024"))
+    # RLIMIT_NPROC is per user and ignored for root, so run the API as a dedicated user for this to bite
+    CODE_EXECUTION_ALLOW_SUBPROCESSES: bool = os.getenv("CODE_EXECUTION_ALLOW_SUBPROCESSES", "false").lower() == "true"
+    # Programs allowed to run at once, and how many more may wait before requests get a 429
+    CODE_EXECUTION_MAX_CONCURRENCY: int = int(os.getenv("CODE_EXECUTION_MAX_CONCURRENCY", "4"))
+    CODE_EXECUTION_MAX_QUEUE: int = int(os.getenv("CODE_EXECUTION_MAX_QUEUE", "16"))
+    # Wall-clock limit for streamed runs, which may sit waiting for interactive input
+    CODE_STREAM_TIMEOUT: int = int(os.getenv("CODE_STREAM_TIMEOUT", "30"))
+    # Modules students may not import (comma separated, empty allows everything)
+    CODE_FORBIDDEN_IMPORTS: str = os.getenv("CODE_FORBIDDEN_IMPORTS", "os,subprocess,socket")
+    CODE_PRECHECK_CACHE_SIZE: int = int(os.getenv("CODE_PRECHECK_CACHE_SIZE", "4096"))
+    # Number of recent samples kept per phase for the p50/p95/p99 in /code/metrics
+    CODE_METRICS_WINDOW: int = int(os.getenv("CODE_METRICS_WINDOW", "1024"))
+    
+    # "local" runs programs inside the API process group, "remote" dispatches
+    # them to the execution workers started with run_executor.py
+    CODE_EXECUTION_BACKEND: str = os.getenv("CODE_EXECUTION_BACKEND", "local")
+    # Unix socket path, or host:port for TCP
+    CODE_EXECUTOR_ADDRESS: str = os.getenv("CODE_EXECUTOR_ADDRESS", "/tmp/pythonchick-executor.sock")
+    # Shared secret for the executor socket; required for TCP and Unix sockets
+    CODE_EXECUTOR_AUTHKEY: str = os.getenv("CODE_EXECUTOR_AUTHKEY", "")
+    # Run programs in the API process when the execution workers are
+    # unreachable (off by default: requests get 503 instead)
+    CODE_EXECUTOR_LOCAL_FALLBACK: bool = os.getenv("CODE_EXECUTOR_LOCAL_FALLBACK", "false").lower() == "true"
+    CODE_EXECUTOR_MAX_QUEUE: int = int(os.getenv("CODE_EXECUTOR_MAX_QUEUE", "64"))
+    CODE_EXECUTOR_RESULT_TIMEOUT: int = int(os.getenv("CODE_EXECUTOR_RESULT_TIMEOUT", "60"))
+    
+    # How often each process checks the content version to refresh its catalog snapshot
+    CATALOG_REFRESH_SECONDS: float = float(os.getenv("CATALOG_REFRESH_SECONDS", "5"))
+    
+    # Per-user completed lesson cache (0 users disables it)
+    PROGRESS_CACHE_MAX_USERS: int = int(os.getenv("PROGRESS_CACHE_MAX_USERS", "10000"))
+    PROGRESS_CACHE_TTL_SECONDS: float = float(os.getenv("PROGRESS_CACHE_TTL_SECONDS", "60"))
+    
+    # Cache-Control max-age for catalog responses (0 = always revalidate with the ETag)
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+    
+    # Games per page in the game list (default and largest allowed)
+    GAME_PAGE_SIZE: int = int(os.getenv("GAME_PAGE_SIZE", "50"))
+    GAME_PAGE_MAX_SIZE: int = int(os.getenv("GAME_PAGE_MAX_SIZE", "100"))
+    
+    # Per-request query counting: X-DB-* debug headers and N+1 warnings
+    # (on by default in development). A budget of 0 disables the warning
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", str(os.getenv("ENVIRONMENT", "development") == "development")).lower() == "true"
+    QUERY_BUDGET_PER_REQUEST: int = int(os.getenv("QUERY_BUDGET_PER_REQUEST", "20"))
+    QUERY_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "3"))
+    
+    # Execution result cache (0 entries disables it; the Redis URL enables the shared tier)
+    CODE_CACHE_MAX_ENTRIES: int = int(os.getenv("CODE_CACHE_MAX_ENTRIES", "2048"))
+    CODE_CACHE_MAX_BYTES: int = int(os.getenv("CODE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    CODE_CACHE_TTL_SECONDS: int = int(os.getenv("CODE_CACHE_TTL_SECONDS", "3600"))
+    CODE_CACHE_REDIS_URL: str = os.getenv("CODE_CACHE_REDIS_URL", "")
     
     class Config:
         env_file = ".env"
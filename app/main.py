@@ -20,6 +20,10 @@ try:
         game
     )
     
+    from app.services.catalog import warm_catalog
+    from app.utils.query_stats import QueryStatsMiddleware
+    from app.utils.email_queue import email_queue
+    
     # Import the new password reset module
     from app.api.password_reset import router as password_reset_router
 
@@ -50,8 +54,18 @@ try:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Let the frontend read the game list's pagination cursor
+        expose_headers=["X-Next-Cursor"],
     )
 
+    # Query counts as X-DB-* headers and N+1 warnings in the log
+    if settings.QUERY_STATS_ENABLED:
+        app.add_middleware(
+            QueryStatsMiddleware,
+            budget=settings.QUERY_BUDGET_PER_REQUEST,
+            n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD
+        )
+
     # Include routers
     app.include_router(auth.router, prefix=settings.API_V1_STR)
     app.include_router(courses.router, prefix=settings.API_V1_STR)
@@ -65,6 +79,16 @@ try:
     # Add the password reset router
     app.include_router(password_reset_router, prefix=settings.API_V1_STR)
 
+    # Load the course catalog snapshot before serving requests
+    @app.on_event("startup")
+    async def load_catalog():
+        warm_catalog()
+
+    # Deliver queued emails before the process exits
+    @app.on_event("shutdown")
+    def flush_email_queue():
+        email_queue.stop()
+
     # Redirect root to docs
     @app.get("/", include_in_schema=False)
     async def root():
@@ -7,5 +7,8 @@ from .quiz import QuizQuestion, QuizOption
 from .progress import UserProgress
 from .achievement import Achievement, UserAchievement
 from .activity import UserActivity
-from .challenge import CodingChallenge, UserChallenge
-from .game import Game, UserGameProgress
\ No newline at end of file
+from .challenge import CodingChallenge, UserChallenge, ChallengeTestCase
+from .game import Game, UserGameProgress
+from .content_version import ContentVersion
+from .unlock import UserUnlock
+from .password_reset import PasswordResetToken
\ No newline at end of file
@@ -1,5 +1,5 @@
 # app/models/challenge.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, JSON, Index, func
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 
@@ -13,7 +13,7 @@ class CodingChallenge(Base):
     starter_code = Column(Text, nullable=True)
     solution_code = Column(Text, nullable=True)
     expected_output = Column(Text, nullable=True)
-    hints = Column(Text, nullable=True)  # Store as JSON string
+    hints = Column(JSON, nullable=True)  # List of strings
     points = Column(Integer, default=10)
     lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True)
     created_at = Column(DateTime, default=func.now())
@@ -21,6 +21,26 @@ class CodingChallenge(Base):
 
     # Relationship with lesson (if associated with a specific lesson)
     lesson = relationship("Lesson", back_populates="challenges")
+    test_cases = relationship(
+        "ChallengeTestCase",
+        back_populates="challenge",
+        cascade="all, delete-orphan",
+        order_by="ChallengeTestCase.order_index"
+    )
+
+class ChallengeTestCase(Base):
+    __tablename__ = "challenge_test_cases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    challenge_id = Column(Integer, ForeignKey("coding_challenges.id", ondelete="CASCADE"), nullable=False, index=True)
+    stdin = Column(Text, nullable=True)
+    expected_output = Column(Text, nullable=False)
+    is_hidden = Column(Boolean, default=False)  # Hidden cases don't reveal input/output to the student
+    order_index = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    challenge = relationship("CodingChallenge", back_populates="test_cases")
 
 class UserChallenge(Base):
     __tablename__ = "user_challenges"
@@ -37,4 +57,8 @@ class UserChallenge(Base):
     
     # Relationships
     user = relationship("User", back_populates="challenges")
-    challenge = relationship("CodingChallenge")
\ No newline at end of file
+    challenge = relationship("CodingChallenge")
+    
+    __table_args__ = (
+        Index('uq_user_challenges_user_challenge', 'user_id', 'challenge_id', unique=True),
+    )
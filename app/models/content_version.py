@@ -0,0 +1,14 @@
+# app/models/content_version.py
+from sqlalchemy import Column, Integer, DateTime, func
+from app.utils.database import Base
+
+class ContentVersion(Base):
+    """
+    Single-row counter bumped whenever course content changes, so every API
+    process knows to rebuild its in-memory catalog snapshot.
+    """
+    __tablename__ = "content_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 # app/models/game.py
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, func, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, func, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
@@ -24,6 +24,13 @@ class Game(Base):
     # Relationships
     user_progress = relationship("UserGameProgress", back_populates="game")
 
+    # Filtered game list; InnoDB appends the primary key, which serves the id order
+    # (and the (title, id) order of the title-sorted list)
+    __table_args__ = (
+        Index('ix_games_active_difficulty_category', 'is_active', 'difficulty', 'category'),
+        Index('ix_games_active_title', 'is_active', 'title'),
+    )
+
 class UserGameProgress(Base):
     __tablename__ = "user_game_progress"
 
@@ -34,7 +41,7 @@ class UserGameProgress(Base):
     is_completed = Column(Boolean, default=False)
     current_level = Column(Integer, default=0)
     score = Column(Integer, default=0)
-    data = Column(Text, nullable=True)  # JSON data with game-specific progress
+    data = Column(JSON, nullable=True)  # Game-specific progress
     last_played_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
@@ -1,8 +1,7 @@
 # app/models/lesson.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, func
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
-import json
 
 class Lesson(Base):
     __tablename__ = "lessons"
@@ -11,7 +10,7 @@ class Lesson(Base):
     topic_id = Column(Integer, ForeignKey("topics.id"), nullable=False)
     title = Column(String(100), nullable=False)
     type = Column(String(20), nullable=False)  # 'lesson', 'quiz', 'coding'
-    content = Column(Text, nullable=True)
+    content = Column(JSON, nullable=True)  # List of content blocks, decoded by the driver
     task = Column(Text, nullable=True)
     expected_output = Column(Text, nullable=True)
     order_index = Column(Integer, nullable=False)
@@ -29,13 +28,9 @@ class Lesson(Base):
 
     @property
     def parsed_content(self):
-        if self.content and self.content.strip():
-            try:
-                return json.loads(self.content)
-            except json.JSONDecodeError:
-                return []
-        return []
+        # Content is a JSON column now; kept for callers of the old Text-column API
+        return self.content if isinstance(self.content, list) else []
 
     @parsed_content.setter
     def parsed_content(self, value):
-        self.content = json.dumps(value)
\ No newline at end of file
+        self.content = value
\ No newline at end of file
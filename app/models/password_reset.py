@@ -0,0 +1,21 @@
+# app/models/password_reset.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship
+from app.utils.database import Base
+
+class PasswordResetToken(Base):
+    __tablename__ = "password_reset_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    token_hash = Column(String(64), nullable=False, unique=True)  # SHA-256 of the token; the token itself is only in the email
+    expires_at = Column(DateTime, nullable=False, index=True)  # Indexed for expiry sweeps
+    created_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="reset_tokens")
+
+    # One outstanding token per user
+    __table_args__ = (
+        Index('uq_password_reset_tokens_user_id', 'user_id', unique=True),
+    )
@@ -0,0 +1,24 @@
+# app/models/unlock.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.utils.database import Base
+
+class UserUnlock(Base):
+    __tablename__ = "user_unlocks"
+
+    # Kinds of content a user can unlock
+    TOPIC = "topic"
+    GAME = "game"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # 'topic' or 'game'
+    target_id = Column(Integer, nullable=False)  # topics.id or games.id, depending on kind
+    unlocked_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="unlocks")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'kind', 'target_id', name='uq_user_unlock'),
+    )
@@ -19,6 +19,8 @@ class User(Base):
     avatar_url = Column(String(255))
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    progress_version = Column(Integer, nullable=False, default=0)  # Bumped by every progress write, used in ETags
+    token_version = Column(Integer, nullable=False, default=0, index=True)  # Bumped to revoke issued access tokens
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -27,4 +29,6 @@ class User(Base):
     achievements = relationship("UserAchievement", back_populates="user")
     activities = relationship("UserActivity", back_populates="user")
     challenges = relationship("UserChallenge", back_populates="user")
-    game_progress = relationship("UserGameProgress", back_populates="user")  # Added this line
\ No newline at end of file
+    game_progress = relationship("UserGameProgress", back_populates="user")  # Added this line
+    unlocks = relationship("UserUnlock", back_populates="user")
+    reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
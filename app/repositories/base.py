@@ -0,0 +1,72 @@
+# app/repositories/base.py
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from typing import Dict, Generic, Iterable, List, Optional, Sequence, Type, TypeVar
+
+ModelType = TypeVar("ModelType")
+
+# Ids per IN (...) query; SQL Server allows at most 2100 parameters per statement
+IN_CHUNK_SIZE = 1000
+
+class BaseRepository(Generic[ModelType]):
+    """
+    Lookups by primary key that reuse objects already in the session's
+    identity map, plus named loading profiles.
+    
+    A profile is a tuple of loader options (selectinload/joinedload chains)
+    for one use case, so a service asks for "a course with its topics and
+    lessons" and gets the whole graph in a fixed number of queries instead
+    of lazy-loading relationships one row at a time. Objects returned from
+    the identity map are used as they are: relationships that were not
+    loaded with them still load lazily.
+    """
+    model: Type[ModelType] = None
+    profiles: Dict[str, Sequence] = {}
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def query(self, profile: Optional[str] = None):
+        """A query on the model with the profile's loader options applied"""
+        query = self.db.query(self.model)
+        if profile:
+            query = query.options(*self.profiles[profile])
+        return query
+    
+    def get(self, id: int, profile: Optional[str] = None) -> Optional[ModelType]:
+        """Get one object by primary key; no query when it is already in the session"""
+        options = list(self.profiles[profile]) if profile else None
+        return self.db.get(self.model, id, options=options)
+    
+    def get_many(self, ids: Iterable[int], profile: Optional[str] = None) -> List[ModelType]:
+        """
+        Get several objects by primary key
+        
+        Objects already in the session are reused; the rest are loaded in
+        one IN query per IN_CHUNK_SIZE ids.
+        
+        Args:
+            ids: Primary keys; duplicates are ignored
+            profile: Name of a loading profile
+            
+        Returns:
+            The objects in the order of ids; unknown ids are omitted
+        """
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        missing = []
+        
+        for id in ids:
+            obj = self.db.identity_map.get(identity_key(self.model, id))
+            if obj is not None:
+                found[id] = obj
+            else:
+                missing.append(id)
+        
+        primary_key = self.model.__mapper__.primary_key[0]
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[start:start + IN_CHUNK_SIZE]
+            for obj in self.query(profile).filter(primary_key.in_(chunk)).all():
+                found[getattr(obj, primary_key.key)] = obj
+        
+        return [found[id] for id in ids if id in found]
@@ -1,8 +1,9 @@
 # app/repositories/challenge.py
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from app.models.challenge import CodingChallenge, UserChallenge
 from typing import List, Optional
-import json
 import datetime
 
 class ChallengeRepository:
@@ -22,6 +23,15 @@ class ChallengeRepository:
         """Get a specific challenge by ID"""
         return self.db.query(CodingChallenge).filter(CodingChallenge.id == challenge_id).first()
     
+    def get_challenges_with_test_cases(self, challenge_ids: List[int]) -> List[CodingChallenge]:
+        """Get several challenges and their test cases in two queries"""
+        if not challenge_ids:
+            return []
+        
+        return self.db.query(CodingChallenge).options(
+            selectinload(CodingChallenge.test_cases)
+        ).filter(CodingChallenge.id.in_(challenge_ids)).all()
+    
     def create_challenge(self, 
                          title: str, 
                          description: str, 
@@ -32,8 +42,6 @@ class ChallengeRepository:
                          hints: List[str] = None,
                          points: int = 10) -> CodingChallenge:
         """Create a new coding challenge"""
-        hints_json = json.dumps(hints) if hints else json.dumps([])
-        
         challenge = CodingChallenge(
             title=title,
             description=description,
@@ -41,7 +49,7 @@ class ChallengeRepository:
             starter_code=starter_code,
             solution_code=solution_code,
             expected_output=expected_output,
-            hints=hints_json,
+            hints=hints or [],
             points=points
         )
         
@@ -62,29 +70,46 @@ class ChallengeRepository:
                                 user_id: int, 
                                 challenge_id: int, 
                                 code_submitted: str,
-                                completed: bool = False) -> UserChallenge:
-        """Record a user's attempt at a challenge"""
-        user_challenge = self.get_user_challenge(user_id, challenge_id)
+                                completed: bool = False) -> bool:
+        """
+        Record a user's attempt at a challenge (without committing)
         
-        if user_challenge:
-            user_challenge.attempts += 1
-            user_challenge.code_submitted = code_submitted
-            
-            if completed and not user_challenge.completed:
-                user_challenge.completed = True
-                user_challenge.completed_at = datetime.datetime.utcnow()
-        else:
-            user_challenge = UserChallenge(
-                user_id=user_id,
-                challenge_id=challenge_id,
-                code_submitted=code_submitted,
-                attempts=1,
-                completed=completed,
-                completed_at=datetime.datetime.utcnow() if completed else None
-            )
-            self.db.add(user_challenge)
-            
-        self.db.commit()
-        self.db.refresh(user_challenge)
+        Concurrent attempts are safe: the row is unique per user and
+        challenge, and completion is a conditional update, so exactly one
+        attempt sees the first completion.
+        
+        Returns:
+            True when this attempt completed the challenge for the first time
+        """
+        if self.get_user_challenge(user_id, challenge_id) is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.add(UserChallenge(
+                        user_id=user_id,
+                        challenge_id=challenge_id,
+                        attempts=0,
+                        completed=False
+                    ))
+            except IntegrityError:
+                # Another request created the row first
+                pass
+        
+        attempt = self.db.query(UserChallenge).filter(
+            UserChallenge.user_id == user_id,
+            UserChallenge.challenge_id == challenge_id
+        )
+        attempt.update({
+            UserChallenge.attempts: UserChallenge.attempts + 1,
+            UserChallenge.code_submitted: code_submitted
+        }, synchronize_session=False)
+        
+        if not completed:
+            return False
         
-        return user_challenge
\ No newline at end of file
+        first_completions = attempt.filter(
+            or_(UserChallenge.completed == False, UserChallenge.completed.is_(None))
+        ).update({
+            UserChallenge.completed: True,
+            UserChallenge.completed_at: datetime.datetime.utcnow()
+        }, synchronize_session=False)
+        return first_completions == 1
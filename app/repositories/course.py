@@ -0,0 +1,36 @@
+# app/repositories/course.py
+from sqlalchemy.orm import selectinload
+from app.models.course import Course
+from app.models.topic import Topic
+from app.models.lesson import Lesson
+from app.models.quiz import QuizQuestion
+from app.repositories.base import BaseRepository
+from typing import List, Optional
+
+class CourseRepository(BaseRepository[Course]):
+    model = Course
+    profiles = {
+        # Course pages: the course and its topics
+        "with_topics": (
+            selectinload(Course.topics),
+        ),
+        # Progress summaries: topics and their lessons
+        "with_lessons": (
+            selectinload(Course.topics).selectinload(Topic.lessons),
+        ),
+        # The whole catalog tree down to quiz options, one query per table
+        "catalog": (
+            selectinload(Course.topics)
+            .selectinload(Topic.lessons)
+            .selectinload(Lesson.quiz_questions)
+            .selectinload(QuizQuestion.options),
+        ),
+    }
+    
+    def get_all(self, profile: Optional[str] = None) -> List[Course]:
+        """Get all courses in catalog order"""
+        return self.query(profile).order_by(Course.order_index, Course.id).all()
+    
+    def get_by_order_index(self, order_index: int, profile: Optional[str] = None) -> Optional[Course]:
+        """Get the course at a position in the catalog"""
+        return self.query(profile).filter(Course.order_index == order_index).first()
@@ -1,10 +1,37 @@
 # app/repositories/game.py
+from sqlalchemy import and_, or_, func, literal
 from sqlalchemy.orm import Session
 from app.models.game import Game, UserGameProgress
-from typing import List, Optional
-import json
+from typing import Any, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+# Columns the game list needs, loaded as plain rows instead of Game objects
+GAME_LIST_COLUMNS = (
+    Game.id,
+    Game.title,
+    Game.slug,
+    Game.description,
+    Game.short_description,
+    Game.image_url,
+    Game.difficulty,
+    Game.category,
+    Game.xp_reward,
+    Game.estimated_time
+)
+
+# Orders the game list can be requested in; each is followed by id
+GAME_SORT_KEYS = {
+    "id": Game.id,
+    "title": Game.title
+}
+
+# Case-insensitive collations by dialect (the MySQL one is the columns' own);
+# other databases compare lower() values
+CASE_INSENSITIVE_COLLATIONS = {
+    "mysql": "utf8mb4_unicode_ci",
+    "sqlite": "NOCASE"
+}
+
 class GameRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -13,6 +40,60 @@ class GameRepository:
         """Get all active games"""
         return self.db.query(Game).filter(Game.is_active == True).all()
     
+    def get_games_page(self,
+                       difficulty: Optional[str] = None,
+                       category: Optional[str] = None,
+                       sort: str = "id",
+                       after: Optional[Tuple[Any, int]] = None,
+                       limit: Optional[int] = None) -> List:
+        """
+        Get active games as lightweight rows, ordered by a GAME_SORT_KEYS
+        key and then id
+        
+        Filters match case-insensitively and run in the database on the
+        (is_active, difficulty, category) index; pages are keyset-based on
+        (key, id), so each costs the same however far into the list it is.
+        
+        Args:
+            difficulty: Optional difficulty filter
+            category: Optional category filter
+            sort: Key of GAME_SORT_KEYS
+            after: (sort key value, id) of the last game of the previous page
+            limit: Maximum number of games, or None for all of them
+            
+        Returns:
+            Rows with the GAME_LIST_COLUMNS attributes
+        """
+        key = GAME_SORT_KEYS[sort]
+        query = self.db.query(*GAME_LIST_COLUMNS).filter(Game.is_active == True)
+        
+        for column, value in ((Game.difficulty, difficulty), (Game.category, category)):
+            if value:
+                query = query.filter(self._equals_ignoring_case(column, value))
+        
+        if after is not None:
+            value, last_id = after
+            if key is Game.id:
+                query = query.filter(Game.id > last_id)
+            else:
+                query = query.filter(or_(key > value, and_(key == value, Game.id > last_id)))
+        
+        query = query.order_by(Game.id) if key is Game.id else query.order_by(key, Game.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def _equals_ignoring_case(self, column, value: str):
+        """
+        column = value under a case-insensitive collation. The collation is
+        put on the parameter, so on MySQL (where it is the column's own)
+        the index stays usable, unlike lower(column) = value.
+        """
+        collation = CASE_INSENSITIVE_COLLATIONS.get(self.db.get_bind().dialect.name)
+        if collation is None:
+            return func.lower(column) == value.lower()
+        return column == literal(value, type_=column.type).collate(collation)
+    
     def get_game_by_id(self, game_id: int) -> Optional[Game]:
         """Get a specific game by ID"""
         return self.db.query(Game).filter(Game.id == game_id).first()
@@ -50,6 +131,13 @@ class GameRepository:
         
         return game
     
+    def get_next_game(self, game_id: int) -> Optional[Game]:
+        """Get the active game that follows a game in the list"""
+        return self.db.query(Game).filter(
+            Game.is_active == True,
+            Game.id > game_id
+        ).order_by(Game.id).first()
+    
     def get_user_game_progress(self, user_id: int, game_id: int) -> Optional[UserGameProgress]:
         """Get a user's progress for a specific game"""
         return self.db.query(UserGameProgress).filter(
@@ -57,11 +145,17 @@ class GameRepository:
             UserGameProgress.game_id == game_id
         ).first()
     
-    def get_user_games_progress(self, user_id: int) -> List[UserGameProgress]:
-        """Get all games progress for a user"""
-        return self.db.query(UserGameProgress).filter(
+    def get_user_games_progress(self, user_id: int, game_ids: Optional[Iterable[int]] = None) -> List[UserGameProgress]:
+        """Get a user's progress for all games, or for the given games only"""
+        query = self.db.query(UserGameProgress).filter(
             UserGameProgress.user_id == user_id
-        ).all()
+        )
+        if game_ids is not None:
+            game_ids = list(game_ids)
+            if not game_ids:
+                return []
+            query = query.filter(UserGameProgress.game_id.in_(game_ids))
+        return query.all()
     
     def update_game_progress(self, 
                            user_id: int, 
@@ -83,7 +177,7 @@ class GameRepository:
                 is_completed=is_completed if is_completed is not None else False,
                 current_level=current_level if current_level is not None else 0,
                 score=score if score is not None else 0,
-                data=json.dumps(data) if data else None,
+                data=data if data else None,
                 last_played_at=datetime.utcnow()
             )
             self.db.add(progress)
@@ -104,16 +198,9 @@ class GameRepository:
                 progress.score = score
             
             if data is not None:
-                # Merge with existing data if any
-                existing_data = {}
-                if progress.data:
-                    try:
-                        existing_data = json.loads(progress.data)
-                    except:
-                        existing_data = {}
-                
-                merged_data = {**existing_data, **data}
-                progress.data = json.dumps(merged_data)
+                # Merge with existing data if any; a new dict so the change is detected
+                existing_data = progress.data if isinstance(progress.data, dict) else {}
+                progress.data = {**existing_data, **data}
             
             progress.last_played_at = datetime.utcnow()
         
@@ -0,0 +1,26 @@
+# app/repositories/lesson.py
+from sqlalchemy.orm import selectinload, joinedload
+from app.models.lesson import Lesson
+from app.models.topic import Topic
+from app.models.quiz import QuizQuestion
+from app.repositories.base import BaseRepository
+from typing import List, Optional
+
+class LessonRepository(BaseRepository[Lesson]):
+    model = Lesson
+    profiles = {
+        # Completion: the lesson with its topic and course in one query
+        "with_topic": (
+            joinedload(Lesson.topic).joinedload(Topic.course),
+        ),
+        # Quiz pages: questions and their options
+        "with_quiz": (
+            selectinload(Lesson.quiz_questions).selectinload(QuizQuestion.options),
+        ),
+    }
+    
+    def get_by_topic(self, topic_id: int, profile: Optional[str] = None) -> List[Lesson]:
+        """Get the lessons of a topic in order"""
+        return self.query(profile).filter(
+            Lesson.topic_id == topic_id
+        ).order_by(Lesson.order_index, Lesson.id).all()
@@ -0,0 +1,60 @@
+# app/repositories/password_reset.py
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from app.models.password_reset import PasswordResetToken
+from datetime import datetime
+from typing import Optional
+
+class PasswordResetRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_by_hash(self, token_hash: str) -> Optional[PasswordResetToken]:
+        """Get a token and its user by the token's hash (unique index lookup)"""
+        return self.db.query(PasswordResetToken).options(
+            joinedload(PasswordResetToken.user)
+        ).filter(
+            PasswordResetToken.token_hash == token_hash
+        ).first()
+    
+    def replace_for_user(self, user_id: int, token_hash: str, expires_at: datetime):
+        """
+        Replace the user's outstanding token with a new one; the caller commits
+        
+        A user has at most one row (user_id is unique), which is updated in
+        place. When two requests both create it, one insert fails and that
+        request updates the other's row instead, so only the last token
+        issued stays valid.
+        """
+        values = {
+            PasswordResetToken.token_hash: token_hash,
+            PasswordResetToken.expires_at: expires_at,
+            PasswordResetToken.created_at: datetime.utcnow()
+        }
+        token = self.db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user_id)
+        if token.update(values, synchronize_session=False):
+            return
+        
+        try:
+            with self.db.begin_nested():
+                self.db.add(PasswordResetToken(user_id=user_id, token_hash=token_hash, expires_at=expires_at))
+        except IntegrityError:
+            # Another request created the user's row first
+            token.update(values, synchronize_session=False)
+    
+    def delete_for_user(self, user_id: int) -> int:
+        """Delete every token of a user; the caller commits"""
+        return self.db.query(PasswordResetToken).filter(
+            PasswordResetToken.user_id == user_id
+        ).delete(synchronize_session=False)
+    
+    def delete_expired(self, now: datetime, limit: int = 1000) -> int:
+        """Delete up to limit expired tokens, oldest first; the caller commits"""
+        expired_ids = [token_id for (token_id,) in self.db.query(PasswordResetToken.id).filter(
+            PasswordResetToken.expires_at < now
+        ).order_by(PasswordResetToken.expires_at).limit(limit).all()]
+        if not expired_ids:
+            return 0
+        return self.db.query(PasswordResetToken).filter(
+            PasswordResetToken.id.in_(expired_ids)
+        ).delete(synchronize_session=False)
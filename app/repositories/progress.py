@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from app.models.progress import UserProgress
 from datetime import datetime
+from typing import Iterable, Optional, Set
 
 class ProgressRepository:
     def __init__(self, db: Session):
@@ -17,4 +18,19 @@ class ProgressRepository:
         return self.db.query(UserProgress).filter(
             UserProgress.user_id == user_id,
             UserProgress.is_completed == True
-        ).order_by(UserProgress.completed_at.desc()).first()
\ No newline at end of file
+        ).order_by(UserProgress.completed_at.desc()).first()
+    
+    def get_completed_lesson_ids(self, user_id: int, lesson_ids: Optional[Iterable[int]] = None) -> Set[int]:
+        """
+        IDs of the lessons the user has completed, optionally limited to lesson_ids.
+        """
+        query = self.db.query(UserProgress.lesson_id).filter(
+            UserProgress.user_id == user_id,
+            UserProgress.is_completed == True
+        )
+        if lesson_ids is not None:
+            lesson_ids = list(lesson_ids)
+            if not lesson_ids:
+                return set()
+            query = query.filter(UserProgress.lesson_id.in_(lesson_ids))
+        return {lesson_id for (lesson_id,) in query.all()}
@@ -0,0 +1,31 @@
+# app/repositories/topic.py
+from sqlalchemy.orm import selectinload, joinedload
+from app.models.topic import Topic
+from app.repositories.base import BaseRepository
+from typing import List, Optional
+
+class TopicRepository(BaseRepository[Topic]):
+    model = Topic
+    profiles = {
+        # Topic pages: the topic and its lessons
+        "with_lessons": (
+            selectinload(Topic.lessons),
+        ),
+        # Navigation: the topic and its course in the same query
+        "with_course": (
+            joinedload(Topic.course),
+        ),
+    }
+    
+    def get_by_course(self, course_id: int, profile: Optional[str] = None) -> List[Topic]:
+        """Get the topics of a course in order"""
+        return self.query(profile).filter(
+            Topic.course_id == course_id
+        ).order_by(Topic.order_index, Topic.id).all()
+    
+    def get_by_position(self, course_id: int, order_index: int, profile: Optional[str] = None) -> Optional[Topic]:
+        """Get the topic at a position in a course"""
+        return self.query(profile).filter(
+            Topic.course_id == course_id,
+            Topic.order_index == order_index
+        ).first()
@@ -0,0 +1,28 @@
+# app/repositories/unlock.py
+from sqlalchemy.orm import Session
+from app.models.unlock import UserUnlock
+from typing import List, Tuple
+
+class UnlockRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_user_unlocks(self, user_id: int) -> List[Tuple[str, int]]:
+        """Get (kind, target_id) for everything the user has unlocked"""
+        return self.db.query(UserUnlock.kind, UserUnlock.target_id).filter(
+            UserUnlock.user_id == user_id
+        ).all()
+    
+    def has_unlock(self, user_id: int, kind: str, target_id: int) -> bool:
+        """Check if the user has unlocked something"""
+        return self.db.query(UserUnlock.id).filter(
+            UserUnlock.user_id == user_id,
+            UserUnlock.kind == kind,
+            UserUnlock.target_id == target_id
+        ).first() is not None
+    
+    def add_unlock(self, user_id: int, kind: str, target_id: int) -> UserUnlock:
+        """Add an unlock to the session; the caller commits"""
+        unlock = UserUnlock(user_id=user_id, kind=kind, target_id=target_id)
+        self.db.add(unlock)
+        return unlock
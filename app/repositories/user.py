@@ -13,10 +13,14 @@ class UserRepository:
         return self.db.query(User).filter(User.email == email).first()
     
     def get_by_id(self, user_id: int):
-        return self.db.query(User).filter(User.id == user_id).first()
+        # Session.get() returns the user without a query when the request
+        # already loaded it (e.g. while authenticating)
+        return self.db.get(User, user_id)
     
-    def create(self, username: str, email: str, password: str, full_name: str):
-        hashed_password = get_password_hash(password)
+    def create(self, username: str, email: str, password: str, full_name: str, hashed_password: str = None):
+        # Async callers hash on the password hasher's pool and pass the result
+        if hashed_password is None:
+            hashed_password = get_password_hash(password)
         user = User(
             username=username,
             email=email,
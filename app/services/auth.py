@@ -10,28 +10,112 @@ from app.config import settings
 from app.models.user import User
 from app.repositories.user import UserRepository
 from app.schemas.auth import TokenData
-from app.utils.security import verify_password
 from app.utils.database import get_db
+from app.services.token_versions import token_versions
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.login_throttle import login_throttle
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
+class Principal:
+    """
+    The authenticated user, built from the access token's claims.
+    
+    id, username, is_active and token_version come from the signed token,
+    so routes that only need them cost no query. The User row is loaded on
+    first access to .user or to any other User attribute (e.g.
+    current_user.email), through the request's session.
+    """
+    __slots__ = ("id", "username", "is_active", "token_version", "_db", "_user")
+    
+    def __init__(self, db: Session, id: int, username: str, is_active: bool = True,
+                 token_version: int = 0, user: Optional[User] = None):
+        self.id = id
+        self.username = username
+        self.is_active = is_active
+        self.token_version = token_version
+        self._db = db
+        self._user = user
+    
+    @property
+    def user(self) -> User:
+        """The full User row, loaded on first use"""
+        if self._user is None:
+            self._user = UserRepository(self._db).get_by_id(self.id)
+            if self._user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+        return self._user
+    
+    def __getattr__(self, name):
+        # Only called for attributes that are not claims
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
 class AuthService:
     def __init__(self, db: Session = None):
         self.db = db
         self.user_repository = UserRepository(db) if db else None
     
-    def authenticate_user(self, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, username: str, password: str, client_ip: Optional[str] = None) -> Optional[User]:
+        """
+        Check a username and password. The bcrypt work runs on the password
+        hasher's thread pool; a hash made with outdated parameters is
+        replaced on the user (the caller commits).
+        
+        Usernames and clients with too many recent failures are rejected
+        before the database or bcrypt is touched, and usernames recently
+        found not to exist skip the lookup.
+        
+        Raises:
+            LoginThrottled: Too many recent failures for the username or client
+            PasswordHasherBusy: Too many logins are being checked already
+        """
+        login_throttle.check(username, client_ip)
+        
         try:
-            user = self.user_repository.get_by_username(username)
+            if login_throttle.is_unknown_user(username):
+                user = None
+            else:
+                user = self.user_repository.get_by_username(username)
+                if not user:
+                    login_throttle.mark_unknown_user(username)
+            
             if not user:
+                # As slow as a wrong password, so existence does not leak
+                await password_hasher.verify_delay()
+                login_throttle.record_failure(username, client_ip)
                 return None
-            if not verify_password(password, user.hashed_password):
+            
+            valid, new_hash = await password_hasher.verify(password, user.hashed_password)
+            if not valid:
+                login_throttle.record_failure(username, client_ip)
                 return None
+            if new_hash:
+                user.hashed_password = new_hash
+                password_hasher.metrics.increment("rehashed")
+            login_throttle.record_success(username)
             return user
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             print(f"Error in authenticate_user: {str(e)}")
             return None
     
+    @staticmethod
+    def token_claims(user: User) -> dict:
+        """Claims that let get_current_user() build a Principal without a query"""
+        return {
+            "sub": user.username,
+            "uid": user.id,
+            "act": bool(user.is_active) if user.is_active is not None else True,
+            "tv": user.token_version or 0
+        }
+    
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         try:
             to_encode = data.copy()
@@ -48,7 +132,14 @@ class AuthService:
             raise e
     
     # Important: Make this a "callable" method to work properly with FastAPI dependency injection
-    def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+        """
+        Resolve the bearer token to a Principal. Tokens with the uid/tv
+        claims (see token_claims()) are checked against the cached token
+        versions only; older tokens fall back to loading the user. Inactive
+        users are refused: deactivating a user bumps their token version,
+        which revokes tokens issued while they were active.
+        """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -61,25 +152,37 @@ class AuthService:
             if username is None:
                 raise credentials_exception
             token_data = TokenData(username=username)
+            user_id = payload.get("uid")
+            token_version = payload.get("tv", 0)
+            is_active = payload.get("act", True)
         except JWTError as e:
             print(f"JWT Error: {str(e)}")
             raise credentials_exception
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Unexpected error in get_current_user: {str(e)}")
             raise credentials_exception
         
         try:
-            # Use the provided db session from dependency
+            if isinstance(user_id, int) and isinstance(token_version, int):
+                if is_active is False or not token_versions.is_current(db, user_id, token_version):
+                    raise credentials_exception
+                return Principal(db, user_id, token_data.username, is_active, token_version)
+            
+            # Token issued before the claims existed
             user_repository = UserRepository(db)
             user = user_repository.get_by_username(token_data.username)
             
-            if user is None:
+            if user is None or user.is_active is False or not token_versions.is_current(db, user.id, 0):
                 raise credentials_exception
                 
-            return user
+            return Principal(db, user.id, user.username, user.is_active, user.token_version or 0, user=user)
+        except HTTPException:
+            raise
         except SQLAlchemyError as e:
             print(f"Database error in get_current_user: {str(e)}")
             raise credentials_exception
         except Exception as e:
             print(f"Error getting user in get_current_user: {str(e)}")
-            raise credentials_exception
\ No newline at end of file
+            raise credentials_exception
@@ -0,0 +1,275 @@
+# app/services/catalog.py
+"""
+In-memory snapshot of the course catalog.
+
+Courses, topics, lessons, quiz questions and options change only when
+content is (re)seeded, so they are read once into a tree of small
+__slots__ objects with id indexes, shared by every request and never
+modified. Each snapshot remembers the content_version counter it was built
+from; get_catalog() compares it with the database at most every
+CATALOG_REFRESH_SECONDS and builds a replacement when it changed. The new
+tree is swapped in with a single assignment, so readers always see one
+complete snapshot.
+
+Whoever changes catalog content must call bump_content_version() in the
+same transaction.
+"""
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import settings
+from app.models.course import Course
+from app.models.topic import Topic
+from app.models.lesson import Lesson
+from app.models.quiz import QuizQuestion, QuizOption
+from app.models.content_version import ContentVersion
+from app.repositories.course import CourseRepository
+from app.services.progress_cache import get_progress_state
+
+CONTENT_VERSION_ID = 1
+
+
+class CatalogOption:
+    __slots__ = ("id", "text", "is_correct", "order_index")
+
+    def __init__(self, option: QuizOption):
+        self.id = option.id
+        self.text = option.option_text
+        self.is_correct = option.is_correct
+        self.order_index = option.order_index
+
+
+class CatalogQuestion:
+    __slots__ = ("id", "question", "explanation", "order_index", "options")
+
+    def __init__(self, question: QuizQuestion, options: Tuple[CatalogOption, ...]):
+        self.id = question.id
+        self.question = question.question
+        self.explanation = question.explanation
+        self.order_index = question.order_index
+        self.options = options
+
+
+class CatalogLesson:
+    __slots__ = ("id", "topic_id", "title", "type", "content", "task", "expected_output",
+                 "order_index", "xp_reward", "coins_reward", "estimated_time_minutes", "quiz_questions")
+
+    def __init__(self, lesson: Lesson, quiz_questions: Tuple[CatalogQuestion, ...]):
+        self.id = lesson.id
+        self.topic_id = lesson.topic_id
+        self.title = lesson.title
+        self.type = lesson.type
+        self.content = self._decode_content(lesson.content)
+        self.task = lesson.task
+        self.expected_output = lesson.expected_output
+        self.order_index = lesson.order_index
+        self.xp_reward = lesson.xp_reward
+        self.coins_reward = lesson.coins_reward
+        self.estimated_time_minutes = lesson.estimated_time_minutes
+        self.quiz_questions = quiz_questions
+
+    @staticmethod
+    def _decode_content(content):
+        # Content is a JSON column, decoded once here per snapshot. A string is
+        # either JSON that was stored encoded twice or legacy text that is not
+        # JSON; keep the raw value in the latter case
+        if content and isinstance(content, str):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                return content
+        return content
+
+
+class CatalogTopic:
+    __slots__ = ("id", "course_id", "title", "description", "order_index", "is_locked", "lessons", "lesson_ids")
+
+    def __init__(self, topic: Topic, lessons: Tuple[CatalogLesson, ...]):
+        self.id = topic.id
+        self.course_id = topic.course_id
+        self.title = topic.title
+        self.description = topic.description
+        self.order_index = topic.order_index
+        self.is_locked = topic.is_locked
+        self.lessons = lessons
+        self.lesson_ids = tuple(lesson.id for lesson in lessons)
+
+
+class CatalogCourse:
+    __slots__ = ("id", "title", "description", "image_url", "order_index", "is_locked", "topics")
+
+    def __init__(self, course: Course, topics: Tuple[CatalogTopic, ...]):
+        self.id = course.id
+        self.title = course.title
+        self.description = course.description
+        self.image_url = course.image_url
+        self.order_index = course.order_index
+        self.is_locked = course.is_locked
+        self.topics = topics
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the whole catalog (apart from render_cache). Children
+    are ordered by order_index.
+    """
+    __slots__ = ("version", "loaded_at", "courses", "courses_by_id", "topics_by_id",
+                 "lessons_by_id", "render_cache", "_topics_by_position", "_courses_by_position")
+
+    def __init__(self, version: Optional[int], courses: Tuple[CatalogCourse, ...]):
+        self.version = version
+        self.loaded_at = time.time()
+        self.courses = courses
+        self.courses_by_id: Dict[int, CatalogCourse] = {course.id: course for course in courses}
+        self.topics_by_id: Dict[int, CatalogTopic] = {}
+        self.lessons_by_id: Dict[int, CatalogLesson] = {}
+        # Responses rendered from this snapshot, filled by the services that
+        # use them; dropped together with the snapshot when content changes
+        self.render_cache: Dict[Tuple, bytes] = {}
+        self._topics_by_position: Dict[Tuple[int, int], CatalogTopic] = {}
+        self._courses_by_position: Dict[int, CatalogCourse] = {}
+
+        for course in courses:
+            self._courses_by_position.setdefault(course.order_index, course)
+            for topic in course.topics:
+                self.topics_by_id[topic.id] = topic
+                self._topics_by_position.setdefault((course.id, topic.order_index), topic)
+                for lesson in topic.lessons:
+                    self.lessons_by_id[lesson.id] = lesson
+
+    def topic_at(self, course_id: int, order_index: int) -> Optional[CatalogTopic]:
+        """The topic at a given position in a course, if any"""
+        return self._topics_by_position.get((course_id, order_index))
+
+    def course_at(self, order_index: int) -> Optional[CatalogCourse]:
+        """The course at a given position in the catalog, if any"""
+        return self._courses_by_position.get(order_index)
+
+
+def load_snapshot(db: Session, version: Optional[int] = None) -> CatalogSnapshot:
+    """
+    Read the whole catalog through CourseRepository's "catalog" profile
+    (one query per table) and build a snapshot. A separate session is used
+    so the request's session is not filled with catalog rows.
+    """
+    order = lambda row: (row.order_index, row.id)
+
+    def build_lesson(lesson):
+        return CatalogLesson(lesson, tuple(
+            CatalogQuestion(question, tuple(CatalogOption(o) for o in sorted(question.options, key=order)))
+            for question in sorted(lesson.quiz_questions, key=order)
+        ))
+
+    loader = Session(bind=db.get_bind())
+    try:
+        courses = tuple(
+            CatalogCourse(course, tuple(
+                CatalogTopic(topic, tuple(build_lesson(lesson) for lesson in sorted(topic.lessons, key=order)))
+                for topic in sorted(course.topics, key=order)
+            ))
+            for course in CourseRepository(loader).get_all(profile="catalog")
+        )
+    finally:
+        loader.close()
+
+    return CatalogSnapshot(version, courses)
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_version_table_missing = False
+
+
+def _current_version(db: Session) -> Optional[int]:
+    """Read the content version, or None when the table has not been migrated yet"""
+    global _version_table_missing
+
+    try:
+        return db.query(ContentVersion.version).filter(ContentVersion.id == CONTENT_VERSION_ID).scalar()
+    except SQLAlchemyError as e:
+        db.rollback()
+        if not _version_table_missing:
+            print(f"Content version unavailable, catalog will only refresh on local changes: {str(e)}")
+            _version_table_missing = True
+        return None
+
+
+def get_catalog(db: Session) -> CatalogSnapshot:
+    """
+    Return the shared catalog snapshot, rebuilding it when the content
+    version in the database has changed.
+    """
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot is not None and now - _checked_at < settings.CATALOG_REFRESH_SECONDS:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None and time.monotonic() - _checked_at < settings.CATALOG_REFRESH_SECONDS:
+            return snapshot
+
+        version = _current_version(db)
+        if snapshot is None or version != snapshot.version:
+            snapshot = load_snapshot(db, version)
+            _snapshot = snapshot
+        _checked_at = time.monotonic()
+        return snapshot
+
+
+def invalidate_catalog():
+    """Drop this process's snapshot so the next request rebuilds it"""
+    global _snapshot
+
+    with _lock:
+        _snapshot = None
+
+
+def bump_content_version(db: Session):
+    """
+    Mark catalog content as changed. Call inside the transaction that
+    changes it: this process drops its snapshot once the transaction
+    commits, other processes notice within CATALOG_REFRESH_SECONDS.
+    """
+    row = db.query(ContentVersion).filter(ContentVersion.id == CONTENT_VERSION_ID).first()
+    if row is None:
+        db.add(ContentVersion(id=CONTENT_VERSION_ID, version=2))
+    else:
+        row.version = ContentVersion.version + 1
+    event.listen(db, "after_commit", lambda session: invalidate_catalog(), once=True)
+
+
+def content_validator(db: Session, user_id: Optional[int] = None) -> str:
+    """
+    Token that changes whenever a catalog response for this user could:
+    the content version and the user's progress version. Read from the
+    in-memory snapshot and progress cache, so usually without a query.
+    """
+    snapshot = get_catalog(db)
+    # Without a content_version table, the snapshot's load time stands in for it
+    content = snapshot.version if snapshot.version is not None else "t{}".format(snapshot.loaded_at)
+    if not user_id:
+        return "{}:-".format(content)
+    return "{}:{}:{}".format(content, user_id, get_progress_state(db, user_id).progress_version)
+
+
+def warm_catalog():
+    """Load the snapshot at startup so the first request does not pay for it"""
+    from app.utils.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        snapshot = get_catalog(db)
+        print(f"Catalog loaded: {len(snapshot.courses)} courses, {len(snapshot.topics_by_id)} topics, "
+              f"{len(snapshot.lessons_by_id)} lessons (version {snapshot.version})")
+    except Exception as e:
+        print(f"Could not preload the catalog: {str(e)}")
+    finally:
+        db.close()
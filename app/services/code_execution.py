@@ -3,83 +3,1062 @@
 import subprocess
 import tempfile
 import os
+import sys
 import uuid
 import time
-from typing import Dict, Any, Optional
+import json
+import queue
+import select
+import struct
+import atexit
+import threading
+import asyncio
+import signal
+import codecs
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from app.config import settings
+from app.utils.result_cache import ExecutionResultCache
+from app.utils.precheck import CodePrecheck
+from app.utils.metrics import ExecutionMetrics
+from app.utils.sandbox_worker import classify_error
+from app.services.execution_worker import RemoteExecutionBackend, ExecutorUnavailable
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils", "sandbox_worker.py")
+
+# How long a freshly spawned worker may take to report that it is ready
+WORKER_STARTUP_TIMEOUT = 10
+
+# Extra time a worker gets to kill a timed-out program and answer before the
+# pool gives up on the worker itself
+WORKER_REPLY_GRACE = 2
+
+# How long a run waits for an idle pooled worker before it fails, and how
+# often missing workers are respawned meanwhile
+WORKER_ACQUIRE_TIMEOUT = 30
+WORKER_ACQUIRE_POLL_SECONDS = 1
+
+# Long-poll interval when waiting for a job on the execution worker tier
+JOB_POLL_SECONDS = 1
+
+# Size of each read when streaming a cold-started program's output
+READ_CHUNK_SIZE = 4096
+
+# Signal sent when a program reaches its CPU limit (POSIX only)
+CPU_LIMIT_SIGNAL = getattr(signal, "SIGXCPU", None)
+
+# Per-phase timings and event counters, reported by GET /code/metrics
+metrics = ExecutionMetrics(window=settings.CODE_METRICS_WINDOW)
+
+
+def get_sandbox_limits() -> Dict[str, Any]:
+    """
+    Resource limits applied to every program. The output cap is always on
+    because it protects the API process; the rlimits only apply in sandbox mode.
+    """
+    limits = {"max_output_bytes": settings.CODE_EXECUTION_MAX_OUTPUT_BYTES}
+
+    if settings.CODE_SANDBOX_LIMITS_ENABLED:
+        limits.update({
+            "memory_mb": settings.CODE_EXECUTION_MEMORY_LIMIT_MB,
+            "cpu_seconds": settings.CODE_EXECUTION_CPU_LIMIT_SECONDS,
+            "file_size_kb": settings.CODE_EXECUTION_MAX_FILE_SIZE_KB,
+            "allow_subprocesses": settings.CODE_EXECUTION_ALLOW_SUBPROCESSES
+        })
+
+    return limits
+
+
+def _sandboxed_command(limits: Dict[str, Any], *args: str) -> List[str]:
+    """
+    Command line that runs the interpreter with args under the rlimits. The
+    limits are applied by sandbox_worker in the child (then exec'd), not by
+    a preexec_fn, which is unsafe in a process that has threads.
+    """
+    command = [sys.executable, *args]
+    if os.name != "posix" or not settings.CODE_SANDBOX_LIMITS_ENABLED:
+        return command
+    return [sys.executable, WORKER_SCRIPT, "--exec", json.dumps(limits), *command]
+
+
+def _hit_cpu_limit(returncode: Optional[int]) -> bool:
+    """
+    Whether a cold-started program was stopped by its CPU limit. Only
+    SIGXCPU counts: SIGKILL also comes from the OOM killer or an operator.
+    """
+    return CPU_LIMIT_SIGNAL is not None and returncode == -CPU_LIMIT_SIGNAL
+
+
+class ExecutionQueueFull(Exception):
+    """Raised when too many programs are already running or waiting"""
+
+
+async def gather_or_cancel(*aws) -> List[Any]:
+    """
+    Like asyncio.gather, but when one awaitable raises, the others are
+    cancelled (and awaited) before the error propagates, so a failed batch
+    does not start more programs. Cold runs are killed at once; a pooled
+    run keeps its runner slot until its program has finished.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class WorkerError(Exception):
+    """Raised when a pooled worker dies or stops answering"""
+
+
+class WorkerTimeout(WorkerError):
+    """Raised when a pooled worker does not answer before the deadline"""
+
+
+class PooledWorker:
+    """
+    A pre-started interpreter that runs programs sent over its stdin pipe,
+    each in a child it forks for that program. The worker leads its own
+    process group so kill() also takes down a program that is still running.
+    """
+    def __init__(self, limits: Dict[str, Any]):
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, json.dumps(limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+            start_new_session=True
+        )
+        self.runs = 0
+        self.ready = False
+
+    def _read_exact(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WorkerTimeout()
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                raise WorkerTimeout()
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                raise WorkerError("worker exited unexpectedly")
+            data += chunk
+        return data
+
+    def _read_frame(self, deadline: float) -> Dict[str, Any]:
+        size = struct.unpack(">I", self._read_exact(4, deadline))[0]
+        return json.loads(self._read_exact(size, deadline).decode("utf-8"))
+
+    def wait_ready(self):
+        """Wait for the worker's ready frame after it was spawned"""
+        self._read_frame(time.monotonic() + WORKER_STARTUP_TIMEOUT)
+        self.ready = True
+
+    def run(self, code: str, stdin: Optional[str], timeout: float) -> Dict[str, Any]:
+        """
+        Send a program to the worker and wait for its result. The worker
+        kills a program that runs past the timeout and reports timed_out.
+
+        Raises:
+            WorkerTimeout: the worker itself did not answer in time
+            WorkerError: the worker crashed or closed its pipe
+        """
+        if not self.ready:
+            self.wait_ready()
+
+        payload = json.dumps({"code": code, "stdin": stdin, "timeout": timeout}).encode("utf-8")
+        try:
+            self.process.stdin.write(struct.pack(">I", len(payload)) + payload)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(str(e))
+
+        self.runs += 1
+        return self._read_frame(time.monotonic() + timeout + WORKER_REPLY_GRACE)
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class WarmInterpreterPool:
+    """
+    Pool of pre-started sandbox interpreters.
+
+    Programs never run in the worker process itself (see sandbox_worker), so
+    a worker is safe to reuse. Workers are still recycled after max_runs
+    programs, and replaced immediately after a crash or when they stop
+    answering. Replacements are spawned without waiting for
+    them to start, so interpreter startup overlaps with other runs.
+
+    A replacement that cannot be spawned (e.g. out of processes or file
+    descriptors) is retried by later runs, so a failed spawn only shrinks
+    the pool until the next one succeeds.
+    """
+    def __init__(self, size: int, max_runs: int, limits: Dict[str, Any]):
+        self.size = size
+        self.max_runs = max_runs
+        self.limits = limits
+        self._idle = queue.Queue()
+        self._closed = False
+        # Workers spawned and not yet killed, idle or running a program
+        self._live = 0
+        self._lock = threading.Lock()
+
+        self._refill()
+
+    def _refill(self):
+        """Spawn workers until the pool is back to its size"""
+        while not self._closed:
+            with self._lock:
+                if self._live >= self.size:
+                    return
+                self._live += 1
+            try:
+                worker = PooledWorker(self.limits)
+            except Exception as e:
+                with self._lock:
+                    self._live -= 1
+                metrics.increment("worker_spawn_failures")
+                print(f"Could not start a sandbox interpreter: {str(e)}")
+                return
+            self._idle.put(worker)
+
+    def _replace(self, worker: PooledWorker):
+        worker.kill()
+        with self._lock:
+            self._live -= 1
+        metrics.increment("worker_restarts")
+        self._refill()
+
+    def _acquire(self) -> Optional[PooledWorker]:
+        """
+        Wait up to WORKER_ACQUIRE_TIMEOUT for an idle worker, respawning
+        missing ones meanwhile. None when there is none.
+        """
+        deadline = time.monotonic() + WORKER_ACQUIRE_TIMEOUT
+        while True:
+            self._refill()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                return self._idle.get(timeout=min(WORKER_ACQUIRE_POLL_SECONDS, remaining))
+            except queue.Empty:
+                pass
+
+    @staticmethod
+    def _failed_run(error: str, limit_exceeded: Optional[str] = None, timed_out: bool = False) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "output": "",
+            "error": error,
+            "returncode": None,
+            "output_truncated": False,
+            "limit_exceeded": limit_exceeded,
+            "timed_out": timed_out
+        }
+
+    def execute(self, code: str, stdin: Optional[str] = None, timeout: float = 5) -> Dict[str, Any]:
+        """
+        Run a program on the next idle worker.
+
+        Returns:
+            Dictionary with success, output, error, returncode,
+            execution_time (time spent in the user's code), output_truncated,
+            limit_exceeded and timed_out
+        """
+        with metrics.timer("worker_wait"):
+            worker = self._acquire()
+        if worker is None:
+            metrics.increment("worker_unavailable")
+            return self._failed_run("Execution failed: no interpreter available")
+
+        try:
+            if not worker.ready:
+                # Only the part of interpreter startup that the caller actually waits for
+                with metrics.timer("worker_startup"):
+                    worker.wait_ready()
+            start = time.perf_counter()
+            result = worker.run(code, stdin, timeout)
+
+            # Split the round trip into the user's code and the fork/pipe/JSON overhead
+            round_trip = time.perf_counter() - start
+            if result.get("timed_out"):
+                metrics.increment("kills.timeout")
+            else:
+                metrics.observe("user_code", result["execution_time"])
+                metrics.observe("ipc", max(0.0, round_trip - result["execution_time"]))
+        except WorkerTimeout:
+            metrics.increment("kills.timeout")
+            self._replace(worker)
+            return self._failed_run("Execution timed out after {} seconds".format(timeout),
+                                    limit_exceeded="timeout", timed_out=True)
+        except Exception as e:
+            # A crash, or a reply that is not a result frame: the worker is not reusable
+            metrics.increment("worker_crashes")
+            self._replace(worker)
+            if isinstance(e, WorkerError):
+                error = str(e) or "worker crashed"
+            else:
+                error = "invalid reply from worker ({})".format(type(e).__name__)
+            return self._failed_run("Execution failed: {}".format(error))
+
+        if worker.runs >= self.max_runs:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+        result["timed_out"] = bool(result.get("timed_out"))
+        return result
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[WarmInterpreterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_interpreter_pool() -> Optional[WarmInterpreterPool]:
+    """
+    Return the process-wide interpreter pool, creating it on first use.
+    Returns None when the pool is disabled or unsupported on this platform.
+    """
+    global _pool
+
+    if settings.CODE_EXECUTION_POOL_SIZE <= 0 or os.name != "posix":
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WarmInterpreterPool(
+                    size=settings.CODE_EXECUTION_POOL_SIZE,
+                    max_runs=settings.CODE_EXECUTION_MAX_RUNS_PER_WORKER,
+                    limits=get_sandbox_limits()
+                )
+                atexit.register(_pool.close)
+
+    return _pool
+
+
+result_cache: Optional[ExecutionResultCache] = None
+if settings.CODE_CACHE_MAX_ENTRIES > 0:
+    result_cache = ExecutionResultCache(
+        max_entries=settings.CODE_CACHE_MAX_ENTRIES,
+        max_bytes=settings.CODE_CACHE_MAX_BYTES,
+        ttl_seconds=settings.CODE_CACHE_TTL_SECONDS,
+        redis_url=settings.CODE_CACHE_REDIS_URL
+    )
+
+code_precheck = CodePrecheck(
+    forbidden_modules=[name.strip() for name in settings.CODE_FORBIDDEN_IMPORTS.split(",") if name.strip()],
+    max_entries=settings.CODE_PRECHECK_CACHE_SIZE
+)
+
+
+# Concurrency control for the async API. The semaphore is created lazily so it
+# binds to the running event loop rather than whichever loop exists at import.
+_semaphore: Optional[asyncio.Semaphore] = None
+_in_flight = 0
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.CODE_EXECUTION_MAX_CONCURRENCY)
+    return _semaphore
+
+
+_running = 0
+
+
+@asynccontextmanager
+async def _runner_slot():
+    """Hold one runner slot, recording how long the program queued for it"""
+    global _running
+
+    wait_start = time.perf_counter()
+    async with _get_semaphore():
+        metrics.observe("queue_wait", time.perf_counter() - wait_start)
+        _running += 1
+        try:
+            yield
+        finally:
+            _running -= 1
+
+
+def get_runner_metrics() -> Dict[str, Any]:
+    """
+    Phase histograms and counters plus the current load of the runner.
+    """
+    pool = _pool
+    snapshot = metrics.snapshot()
+    snapshot["concurrency"] = {
+        "in_flight": _in_flight,
+        "running": _running,
+        "queued": max(0, _in_flight - _running),
+        "max_concurrency": settings.CODE_EXECUTION_MAX_CONCURRENCY,
+        "max_queue": settings.CODE_EXECUTION_MAX_QUEUE
+    }
+    snapshot["pool"] = {
+        "size": pool.size if pool is not None else 0,
+        "idle": pool._idle.qsize() if pool is not None else 0
+    }
+    return snapshot
+
+
+class StreamingExecution:
+    """
+    A program whose output is forwarded chunk by chunk while it runs.
+
+    Streamed runs always use a cold-started interpreter (with the same rlimits
+    and output cap as other runs) because pooled workers only reply once the
+    program has finished. Input can be fed while the program runs, and
+    cancel() kills it straight away.
+    """
+    def __init__(self, code: str, timeout: float, limits: Dict[str, Any]):
+        self.execution_id = str(uuid.uuid4())
+        self.code = code
+        self.timeout = timeout
+        self.limits = limits
+        self.process = None
+        self.cancelled = False
+        self._pending_stdin: List[bytes] = []
+        self._stdin_closed = False
+        self._output_bytes = 0
+        self._output_truncated = False
+
+    async def write_stdin(self, data: str):
+        """Send text to the program's stdin, buffering it until the program has started"""
+        if self._stdin_closed:
+            return
+        if self.process is None:
+            self._pending_stdin.append(data.encode())
+            return
+        try:
+            self.process.stdin.write(data.encode())
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def close_stdin(self):
+        """Signal end of input to the program"""
+        self._stdin_closed = True
+        if self.process is not None and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+
+    def cancel(self):
+        if not self.cancelled and self.process is not None and self.process.returncode is None:
+            metrics.increment("kills.cancel")
+        self.cancelled = True
+        self._kill()
+
+    def _kill(self):
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def _pump(self, stream, name: str, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        max_output = self.limits["max_output_bytes"]
+
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            if self._output_truncated:
+                # Keep draining until EOF so the pipe is closed and wait() can finish
+                continue
+            if max_output and self._output_bytes + len(chunk) > max_output:
+                chunk = chunk[:max_output - self._output_bytes]
+                self._output_truncated = True
+                self._kill()
+                metrics.increment("kills.output")
+            self._output_bytes += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                await send({"type": name, "data": text})
+
+        text = decoder.decode(b"", final=True)
+        if text:
+            await send({"type": name, "data": text})
+
+    async def run(self, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        """
+        Run the program, passing each stdout/stderr chunk to send as it arrives.
+
+        Returns:
+            Dictionary with execution_id, success, returncode, execution_time,
+            timed_out, cancelled, output_truncated and limit_exceeded
+        """
+        result = {
+            "execution_id": self.execution_id,
+            "success": False,
+            "returncode": None,
+            "execution_time": 0,
+            "timed_out": False,
+            "cancelled": self.cancelled,
+            "output_truncated": False,
+            "limit_exceeded": None,
+            "rejected": None,
+            "error_line": None,
+            "error_column": None
+        }
+
+        # Cancelled while waiting for a runner slot
+        if self.cancelled:
+            return result
+
+        with tempfile.NamedTemporaryFile(suffix=".py", delete=False, mode="w") as temp_file:
+            temp_file_path = temp_file.name
+            temp_file.write(self.code)
+
+        try:
+            start_time = time.time()
+
+            # -u: unbuffered, so print() reaches the client as soon as it runs
+            self.process = await asyncio.create_subprocess_exec(
+                *_sandboxed_command(self.limits, "-u", temp_file_path),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+
+            pending, self._pending_stdin = self._pending_stdin, []
+            for data in pending:
+                self.process.stdin.write(data)
+            if self._stdin_closed:
+                self.process.stdin.close()
+            if self.cancelled:
+                self._kill()
+
+            async def collect():
+                await asyncio.gather(
+                    self._pump(self.process.stdout, "stdout", send),
+                    self._pump(self.process.stderr, "stderr", send)
+                )
+                await self.process.wait()
+
+            try:
+                await asyncio.wait_for(collect(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                metrics.increment("kills.timeout")
+                self._kill()
+                await self.process.wait()
+                result["timed_out"] = True
+                result["limit_exceeded"] = "timeout"
+
+            returncode = self.process.returncode
+            result["returncode"] = returncode
+            result["success"] = returncode == 0
+            result["cancelled"] = self.cancelled
+            result["output_truncated"] = self._output_truncated
+            result["execution_time"] = round(time.time() - start_time, 3)
+
+            if self._output_truncated:
+                result["limit_exceeded"] = "output"
+            elif not result["timed_out"] and not self.cancelled and _hit_cpu_limit(returncode):
+                result["limit_exceeded"] = "cpu"
+
+        finally:
+            # The client may have gone away mid-run; never leave the program behind
+            self._kill()
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+
+        return result
+
 
 class CodeExecutionService:
     """
     Service for executing Python code safely in a sandbox environment.
     """
-    def __init__(self):
-        self.timeout = 5  # 5 seconds timeout for code execution
-        
-    def execute_code(self, code: str, expected_output: Optional[str] = None) -> Dict[str, Any]:
+    def __init__(self, backend: Optional[str] = None, pool: Optional[WarmInterpreterPool] = None):
+        self.timeout = settings.CODE_EXECUTION_TIMEOUT
+        self.limits = get_sandbox_limits()
+        self.remote = None
+        if (backend or settings.CODE_EXECUTION_BACKEND) == "remote":
+            self.remote = RemoteExecutionBackend(settings.CODE_EXECUTOR_ADDRESS)
+            self.pool = None
+        else:
+            # A given pool (the execution worker tier's own) replaces the process-wide one
+            self.pool = pool if pool is not None else get_interpreter_pool()
+
+    def execute_code(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
         """
         Executes Python code and returns the result.
-        
+
         Args:
             code: Python code to execute
             expected_output: Expected output for comparison (if any)
-            
+            stdin: Text passed to the program's standard input (if any)
+
         Returns:
             Dictionary containing execution results
         """
-        # Create a unique ID for this execution
-        execution_id = str(uuid.uuid4())
-        
-        # Create a temporary file to write the code
-        with tempfile.NamedTemporaryFile(suffix=".py", delete=False, mode="w") as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(code)
-        
-        result = {
-            "execution_id": execution_id,
-            "success": False,
-            "output": "",
-            "error": "",
-            "execution_time": 0,
-            "matches_expected": False
+        rejected = self.precheck(code)
+        if rejected is not None:
+            return rejected
+
+        if self.pool is None:
+            return self._execute_cold(code, expected_output, stdin)
+        return self._execute_pooled(self.pool, code, expected_output, stdin)
+
+    def _execute_pooled(self, pool: WarmInterpreterPool, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
+        result = self._new_result()
+
+        start_time = time.time()
+        run = pool.execute(code, stdin, self.timeout)
+
+        result["success"] = run["success"]
+        result["returncode"] = run["returncode"]
+        result["timed_out"] = run["timed_out"]
+        result["output_truncated"] = run["output_truncated"]
+        result["limit_exceeded"] = run["limit_exceeded"]
+        result["output"] = run["output"].strip()
+        result["error"] = run["error"].strip()
+        result["execution_time"] = round(time.time() - start_time, 3)
+
+        if expected_output is not None and not run["timed_out"]:
+            result["matches_expected"] = result["output"] == expected_output.strip()
+
+        return result
+
+    async def execute_code_async(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executes Python code without blocking the event loop.
+
+        At most CODE_EXECUTION_MAX_CONCURRENCY programs run at once and up to
+        CODE_EXECUTION_MAX_QUEUE more may wait for a slot. Code rejected by
+        the pre-check and deterministic programs found in the result cache
+        are answered without using a slot.
+        With the remote backend the program runs on the execution worker
+        tier; if the tier is unreachable it runs locally only when
+        CODE_EXECUTOR_LOCAL_FALLBACK is set.
+
+        Raises:
+            ExecutionQueueFull: the runner is saturated and the caller should retry later
+            ExecutorUnavailable: the execution worker tier cannot be reached
+        """
+        global _in_flight
+
+        rejected = self.precheck(code)
+        if rejected is not None:
+            return rejected
+
+        cache_key = result_cache.key_for(code, stdin) if result_cache is not None else None
+        if cache_key is not None:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                metrics.increment("cache_hits")
+                return self._from_cache(cached, expected_output)
+
+        if _in_flight >= settings.CODE_EXECUTION_MAX_CONCURRENCY + settings.CODE_EXECUTION_MAX_QUEUE:
+            metrics.increment("queue_full")
+            raise ExecutionQueueFull()
+
+        start = time.perf_counter()
+        _in_flight += 1
+        try:
+            result = None
+            if self.remote is not None:
+                result = await self._execute_remote(code, expected_output, stdin)
+
+            if result is None:
+                async with _runner_slot():
+                    result = await self._execute_local(code, expected_output, stdin)
+        finally:
+            _in_flight -= 1
+
+        metrics.observe("total", time.perf_counter() - start)
+        metrics.increment("runs")
+        if result["limit_exceeded"]:
+            metrics.increment("limits." + result["limit_exceeded"])
+
+        # Only cache programs that ran to completion on their own; CPU limits
+        # depend on host load just like timeouts do
+        if cache_key is not None and result["returncode"] is not None and result["limit_exceeded"] not in ("timeout", "cpu"):
+            result_cache.set(cache_key, {
+                "success": result["success"],
+                "output": result["output"],
+                "error": result["error"],
+                "returncode": result["returncode"],
+                "execution_time": result["execution_time"],
+                "output_truncated": result["output_truncated"],
+                "limit_exceeded": result["limit_exceeded"]
+            })
+
+        return result
+
+    def precheck(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Compiles code in-process and applies the import policy.
+
+        Returns:
+            A finished result (with rejected, error_line and error_column set)
+            for code that must not run, or None when it may be executed
+        """
+        with metrics.timer("precheck"):
+            verdict = code_precheck.check(code)
+        if verdict is None:
+            return None
+
+        metrics.increment("rejected." + verdict["reason"])
+
+        result = self._new_result()
+        result["returncode"] = 1
+        result["error"] = verdict["error"]
+        result["rejected"] = verdict["reason"]
+        result["error_line"] = verdict["line"]
+        result["error_column"] = verdict["column"]
+        return result
+
+    def create_stream(self, code: str) -> StreamingExecution:
+        """Prepare a streamed run of code; start it with stream_code"""
+        return StreamingExecution(code, settings.CODE_STREAM_TIMEOUT, self.limits)
+
+    async def stream_code(self, execution: StreamingExecution, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        """
+        Runs a streamed program in this process, sharing the concurrency
+        limits of execute_code_async. A cancelled or finished run releases its
+        slot immediately; code rejected by the pre-check never takes one.
+
+        Raises:
+            ExecutionQueueFull: the runner is saturated and the caller should retry later
+        """
+        global _in_flight
+
+        rejected = self.precheck(execution.code)
+        if rejected is not None:
+            await send({"type": "stderr", "data": rejected["error"] + "\n"})
+            return {
+                "execution_id": execution.execution_id,
+                "success": False,
+                "returncode": rejected["returncode"],
+                "execution_time": 0,
+                "timed_out": False,
+                "cancelled": False,
+                "output_truncated": False,
+                "limit_exceeded": None,
+                "rejected": rejected["rejected"],
+                "error_line": rejected["error_line"],
+                "error_column": rejected["error_column"]
+            }
+
+        if _in_flight >= settings.CODE_EXECUTION_MAX_CONCURRENCY + settings.CODE_EXECUTION_MAX_QUEUE:
+            metrics.increment("queue_full")
+            raise ExecutionQueueFull()
+
+        metrics.increment("streams")
+        _in_flight += 1
+        try:
+            async with _runner_slot():
+                result = await execution.run(send)
+        finally:
+            _in_flight -= 1
+
+        metrics.observe("stream", result["execution_time"])
+        return result
+
+    async def _execute_local(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
+        pool = self.pool or get_interpreter_pool()
+        if pool is None:
+            return await self._execute_cold_async(code, expected_output, stdin)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, self._execute_pooled, pool, code, expected_output, stdin)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Cancelling cannot stop the program in its worker thread, so keep
+            # the caller's runner slot until it finishes (at most the execution
+            # timeout) instead of letting another program start beside it
+            metrics.increment("cancelled_pooled")
+            while not future.done():
+                try:
+                    await asyncio.wait({future})
+                except asyncio.CancelledError:
+                    continue
+            if not future.cancelled():
+                future.exception()
+            raise
+
+    async def _execute_remote(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Runs code on the execution worker tier. When the tier is unreachable,
+        returns None so the caller runs the code locally if
+        CODE_EXECUTOR_LOCAL_FALLBACK is set, and raises ExecutorUnavailable
+        otherwise.
+        """
+        try:
+            with metrics.timer("remote"):
+                job_id = await self.submit_job(code, expected_output, stdin)
+                job = await self.get_job(job_id, wait=settings.CODE_EXECUTOR_RESULT_TIMEOUT)
+        except ExecutorUnavailable as e:
+            if not settings.CODE_EXECUTOR_LOCAL_FALLBACK:
+                metrics.increment("executor_unavailable")
+                raise
+            print(f"Execution workers unavailable, running locally: {str(e)}")
+            metrics.increment("executor_fallbacks")
+            return None
+
+        if job["status"] == "done":
+            return job["result"]
+
+        result = self._new_result()
+        result["error"] = "Execution did not finish within {} seconds".format(settings.CODE_EXECUTOR_RESULT_TIMEOUT)
+        result["timed_out"] = True
+        result["limit_exceeded"] = "timeout"
+        return result
+
+    async def submit_job(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None,
+                         owner: Optional[int] = None) -> str:
+        """
+        Queues a program on the execution worker tier and returns its job ID.
+
+        Raises:
+            ExecutionQueueFull: the executor queue is full
+            ExecutorUnavailable: the tier is disabled or cannot be reached
+        """
+        if self.remote is None:
+            raise ExecutorUnavailable("CODE_EXECUTION_BACKEND is not 'remote'")
+
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(None, self.remote.submit, code, expected_output, stdin, owner)
+        if job_id is None:
+            raise ExecutionQueueFull()
+        return job_id
+
+    async def get_job(self, job_id: str, owner: Optional[int] = None, wait: float = 0) -> Dict[str, Any]:
+        """
+        Polls a job on the execution worker tier, waiting up to `wait` seconds.
+
+        Returns:
+            Dictionary with status ("done", "pending" or "unknown") and result when done
+        """
+        if self.remote is None:
+            raise ExecutorUnavailable("CODE_EXECUTION_BACKEND is not 'remote'")
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + wait
+        while True:
+            # Poll in short slices so a slow job never pins an executor thread for long
+            remaining = max(0, deadline - time.monotonic())
+            job = await loop.run_in_executor(None, self.remote.get_result, job_id, owner, min(remaining, JOB_POLL_SECONDS))
+            if job["status"] != "pending" or remaining <= JOB_POLL_SECONDS:
+                return job
+
+    async def run_test_cases(self, code: str, test_cases: List[Dict[str, Any]], limiter: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+        """
+        Runs one program against several stdin/expected-output cases in parallel.
+
+        Args:
+            code: Python code to execute
+            test_cases: List of dicts with "stdin" and "expected_output"
+            limiter: Semaphore shared by a whole batch so it never takes more
+                than CODE_EXECUTION_MAX_CONCURRENCY runner slots at once
+
+        Returns:
+            Dictionary with passed, passed_count, total, first_failure (index of
+            the first failing case or None) and per-case results
+
+        Raises:
+            ExecutionQueueFull: the runner is saturated and the caller should
+                retry later; the other cases are cancelled first
+            ExecutorUnavailable: the execution worker tier cannot be reached
+        """
+        limiter = limiter or asyncio.Semaphore(settings.CODE_EXECUTION_MAX_CONCURRENCY)
+
+        async def run_case(case):
+            async with limiter:
+                return await self.execute_code_async(code, expected_output=case["expected_output"], stdin=case.get("stdin"))
+
+        runs = await gather_or_cancel(*[run_case(case) for case in test_cases])
+
+        cases = []
+        for index, run in enumerate(runs):
+            cases.append({
+                "index": index,
+                "success": run["success"],
+                "passed": bool(run["success"] and run["matches_expected"]),
+                "output": run["output"],
+                "error": run["error"],
+                "execution_time": run["execution_time"],
+                "timed_out": run["timed_out"],
+                "limit_exceeded": run["limit_exceeded"]
+            })
+
+        failures = [case["index"] for case in cases if not case["passed"]]
+        return {
+            "passed": not failures,
+            "passed_count": len(cases) - len(failures),
+            "total": len(cases),
+            "first_failure": failures[0] if failures else None,
+            "cases": cases
         }
-        
+
+    def _from_cache(self, cached: Dict[str, Any], expected_output: Optional[str]) -> Dict[str, Any]:
+        result = self._new_result()
+        result.update(cached)
+        result["cached"] = True
+        if expected_output is not None:
+            result["matches_expected"] = result["output"] == expected_output.strip()
+        return result
+
+    async def _execute_cold_async(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executes code in a freshly started, resource-limited interpreter.
+
+        Output is streamed from the child and capped at max_output_bytes;
+        a program that prints past the cap is killed and its output truncated.
+        """
+        with metrics.timer("write_file"):
+            with tempfile.NamedTemporaryFile(suffix=".py", delete=False, mode="w") as temp_file:
+                temp_file_path = temp_file.name
+                temp_file.write(code)
+
+        result = self._new_result()
+        max_output = self.limits["max_output_bytes"]
+        killed = False
+        process = None
+
         try:
-            # Record start time
             start_time = time.time()
-            
-            # Execute the code
-            process = subprocess.Popen(
-                ["python", temp_file_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Wait for completion with timeout
+
+            with metrics.timer("spawn"):
+                process = await asyncio.create_subprocess_exec(
+                    *_sandboxed_command(self.limits, temp_file_path),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+
+            async def feed():
+                try:
+                    if stdin:
+                        process.stdin.write(stdin.encode())
+                        await process.stdin.drain()
+                    process.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            async def read_capped(stream):
+                nonlocal killed
+                data = b""
+                while True:
+                    chunk = await stream.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        return data
+                    if max_output and len(data) + len(chunk) > max_output:
+                        if not killed:
+                            result["output_truncated"] = True
+                            killed = True
+                            process.kill()
+                            metrics.increment("kills.output")
+                        # Keep draining until EOF so the pipe is closed and wait() can finish
+                        data += chunk[:max_output - len(data)]
+                        continue
+                    data += chunk
+
+            async def collect():
+                _, out, err = await asyncio.gather(feed(), read_capped(process.stdout), read_capped(process.stderr))
+                await process.wait()
+                return out, err
+
             try:
-                stdout, stderr = process.communicate(timeout=self.timeout)
+                # Interpreter startup and the user's code; a cold child cannot tell them apart
+                with metrics.timer("run"):
+                    stdout, stderr = await asyncio.wait_for(collect(), timeout=self.timeout)
                 result["success"] = process.returncode == 0
-                result["output"] = stdout.strip()
-                result["error"] = stderr.strip()
-                
-                # Check if the output matches expected output
+                result["returncode"] = process.returncode
+                result["output"] = stdout.decode(errors="replace").strip()
+                result["error"] = stderr.decode(errors="replace").strip()
+
+                if result["output_truncated"]:
+                    result["limit_exceeded"] = "output"
+                    result["error"] = (result["error"] + "\nOutput limit of {} bytes exceeded".format(max_output)).strip()
+                elif not killed and _hit_cpu_limit(process.returncode):
+                    result["limit_exceeded"] = "cpu"
+                    result["error"] = (result["error"] + "\nCPU time limit exceeded").strip()
+                else:
+                    result["limit_exceeded"] = classify_error(result["error"])
+
                 if expected_output is not None:
                     result["matches_expected"] = result["output"] == expected_output.strip()
-                    
-            except subprocess.TimeoutExpired:
-                process.kill()
+
+            except asyncio.TimeoutError:
+                metrics.increment("kills.timeout")
+                with metrics.timer("teardown"):
+                    process.kill()
+                    await process.wait()
                 result["error"] = "Execution timed out after {} seconds".format(self.timeout)
                 result["success"] = False
-                
-            # Calculate execution time
+                result["timed_out"] = True
+                result["limit_exceeded"] = "timeout"
+
             result["execution_time"] = round(time.time() - start_time, 3)
-            
+
         except Exception as e:
             result["error"] = str(e)
             result["success"] = False
-            
+
+        except asyncio.CancelledError:
+            # The caller gave up on this run (e.g. the rest of its batch failed)
+            if process is not None and process.returncode is None:
+                process.kill()
+                metrics.increment("kills.cancel")
+            raise
+
         finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-                
-        return result
\ No newline at end of file
+            with metrics.timer("cleanup"):
+                if os.path.exists(temp_file_path):
+                    os.unlink(temp_file_path)
+
+        return result
+
+    def _new_result(self) -> Dict[str, Any]:
+        return {
+            "execution_id": str(uuid.uuid4()),
+            "success": False,
+            "output": "",
+            "error": "",
+            "execution_time": 0,
+            "matches_expected": False,
+            "returncode": None,
+            "timed_out": False,
+            "output_truncated": False,
+            "limit_exceeded": None,
+            "rejected": None,
+            "error_line": None,
+            "error_column": None
+        }
+
+    def _execute_cold(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executes code in a freshly started interpreter (used when the pool is disabled).
+        Must not be called from a running event loop; use execute_code_async there.
+        """
+        return asyncio.run(self._execute_cold_async(code, expected_output, stdin))
@@ -1,20 +1,26 @@
 # app/services/course.py
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from app.models.course import Course
-from app.models.topic import Topic
-from app.models.progress import UserProgress
+from app.services.catalog import get_catalog
+from app.services.progress_cache import get_completed_lessons, get_progress_state
+from app.services.unlock import is_topic_locked
 
 class CourseService:
     def __init__(self, db: Session):
         self.db = db
     
     def get_all_courses(self, user_id=None):
+        """
+        List courses with their topic counts. The structure comes from the
+        shared catalog snapshot and the user's completed lessons from the
+        progress cache.
+        """
         try:
-            courses = self.db.query(Course).order_by(Course.order_index).all()
+            catalog = get_catalog(self.db)
+            completed = get_completed_lessons(self.db, user_id) if user_id else set()
             
             result = []
-            for course in courses:
+            for course in catalog.courses:
                 # Count total topics
                 total_topics = len(course.topics)
                 
@@ -22,20 +28,11 @@ class CourseService:
                 completed_topics = 0
                 if user_id:
                     for topic in course.topics:
-                        # Get all lesson IDs for this topic
-                        lesson_ids = [lesson.id for lesson in topic.lessons]
-                        if not lesson_ids:
+                        if not topic.lesson_ids:
                             continue
-                            
-                        # Count completed lessons
-                        completed_lessons = self.db.query(UserProgress).filter(
-                            UserProgress.user_id == user_id,
-                            UserProgress.lesson_id.in_(lesson_ids),
-                            UserProgress.is_completed == True
-                        ).count()
                         
                         # If all lessons are completed, mark topic as completed
-                        if completed_lessons == len(lesson_ids):
+                        if all(lesson_id in completed for lesson_id in topic.lesson_ids):
                             completed_topics += 1
                 
                 result.append({
@@ -47,7 +44,7 @@ class CourseService:
                     "total_topics": total_topics,
                     "completed_topics": completed_topics
                 })
-                
+            
             return result
         except SQLAlchemyError as e:
             self.db.rollback()
@@ -59,38 +56,33 @@ class CourseService:
     
     def get_course_with_topics(self, course_id, user_id=None):
         try:
-            course = self.db.query(Course).filter(Course.id == course_id).first()
+            course = get_catalog(self.db).courses_by_id.get(course_id)
             
             if not course:
                 return None
-                
+            
+            state = get_progress_state(self.db, user_id) if user_id else None
+            completed = state.completed_lessons if state else set()
+            
             # Format response
             topics = []
             for topic in course.topics:
                 # Count total lessons
-                total_lessons = len(topic.lessons)
+                total_lessons = len(topic.lesson_ids)
                 
                 # Count completed lessons
-                completed_lessons = 0
-                if user_id:
-                    lesson_ids = [lesson.id for lesson in topic.lessons]
-                    if lesson_ids:
-                        completed_lessons = self.db.query(UserProgress).filter(
-                            UserProgress.user_id == user_id,
-                            UserProgress.lesson_id.in_(lesson_ids),
-                            UserProgress.is_completed == True
-                        ).count()
+                completed_lessons = sum(1 for lesson_id in topic.lesson_ids if lesson_id in completed)
                 
                 topics.append({
                     "id": topic.id,
                     "title": topic.title,
                     "description": topic.description,
-                    "is_locked": topic.is_locked,
+                    "is_locked": is_topic_locked(topic, state),
                     "order_index": topic.order_index,
                     "lessons_count": total_lessons,
                     "completed_lessons": completed_lessons
                 })
-                
+            
             return {
                 "id": course.id,
                 "title": course.title,
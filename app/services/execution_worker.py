@@ -0,0 +1,332 @@
+# app/services/execution_worker.py
+
+import os
+import hmac
+import atexit
+import time
+import uuid
+import queue
+import socket
+import hashlib
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+from app.config import settings
+from app.utils.sandbox_worker import read_frame, write_frame
+
+# Finished jobs are kept this long for clients to collect them
+RESULT_TTL_SECONDS = 300
+
+# Largest message accepted on the executor socket
+MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+
+# Time allowed to connect and to complete the handshake
+CONNECT_TIMEOUT_SECONDS = 5
+
+# Added to a request's own wait when waiting for the reply
+REPLY_GRACE_SECONDS = 30
+
+
+class ExecutorUnavailable(Exception):
+    """Raised when the execution worker tier cannot be reached"""
+
+
+class ExecutorAuthError(Exception):
+    """Raised when a peer fails the executor socket handshake"""
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    "host:port" selects a TCP socket, anything else is a Unix socket path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def get_authkey() -> bytes:
+    return settings.CODE_EXECUTOR_AUTHKEY.encode("utf-8")
+
+
+def require_authkey(address: Union[str, Tuple[str, int]]):
+    """
+    The executor socket runs code for whoever can talk to it, so both a TCP
+    address and a Unix socket need CODE_EXECUTOR_AUTHKEY (an empty key
+    would make the handshake a formality).
+    """
+    if not settings.CODE_EXECUTOR_AUTHKEY:
+        kind = "over TCP" if isinstance(address, tuple) else "on a Unix socket"
+        raise ValueError(f"CODE_EXECUTOR_AUTHKEY must be set to use the execution workers {kind}")
+
+
+def _open_socket(address: Union[str, Tuple[str, int]]) -> socket.socket:
+    if isinstance(address, tuple):
+        return socket.create_connection(address, timeout=CONNECT_TIMEOUT_SECONDS)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class FrameConnection:
+    """
+    Length-prefixed JSON frames (as in sandbox_worker) over a socket, with
+    an HMAC challenge-response handshake on the shared authkey. Only JSON
+    crosses the socket, never pickles.
+    """
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+        self._writer = sock.makefile("wb")
+
+    def send(self, message: Dict[str, Any]):
+        write_frame(self._writer, message)
+
+    def recv(self) -> Optional[Dict[str, Any]]:
+        message = read_frame(self._reader, MAX_MESSAGE_BYTES)
+        if message is not None and not isinstance(message, dict):
+            raise ValueError("messages must be JSON objects")
+        return message
+
+    @staticmethod
+    def _digest(authkey: bytes, challenge: str) -> str:
+        return hmac.new(authkey, challenge.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def challenge(self, authkey: bytes):
+        """Server side of the handshake"""
+        challenge = os.urandom(32).hex()
+        self.send({"challenge": challenge})
+        reply = self.recv() or {}
+        if not hmac.compare_digest(str(reply.get("auth", "")), self._digest(authkey, challenge)):
+            self.send({"error": "authentication failed"})
+            raise ExecutorAuthError("authentication failed")
+        self.send({"ok": True})
+
+    def answer(self, authkey: bytes):
+        """Client side of the handshake"""
+        greeting = self.recv() or {}
+        self.send({"auth": self._digest(authkey, str(greeting.get("challenge", "")))})
+        if not (self.recv() or {}).get("ok"):
+            raise ExecutorAuthError("authentication failed")
+
+    def close(self):
+        for stream in (self._reader, self._writer, self.sock):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class Job:
+    __slots__ = ("id", "owner", "code", "expected_output", "stdin", "done", "result", "finished_at")
+
+    def __init__(self, owner: Optional[int], code: str, expected_output: Optional[str], stdin: Optional[str]):
+        self.id = str(uuid.uuid4())
+        self.owner = owner
+        self.code = code
+        self.expected_output = expected_output
+        self.stdin = stdin
+        self.done = threading.Event()
+        self.result = None
+        self.finished_at = None
+
+
+class ExecutionServer:
+    """
+    Execution worker tier: accepts jobs from API processes over a local
+    socket, queues them and runs them on an interpreter pool of its own,
+    with one interpreter per job thread (without pooling, each job
+    cold-starts an interpreter).
+
+    Each connection starts with the FrameConnection handshake; after that
+    messages are JSON objects with an "op" key:
+        submit: code, expected_output, stdin, owner -> {"job_id"} or {"error": "queue_full"}
+        result: job_id, owner, wait -> {"status": "done"|"pending"|"unknown", "result"}
+        stats: -> queue depth, running jobs and worker count
+    """
+    def __init__(self, address: str, workers: int, max_queue: int):
+        # Imported here so API processes that only use the client don't build a pool
+        from app.services.code_execution import CodeExecutionService, WarmInterpreterPool, get_sandbox_limits
+
+        self.address = parse_address(address)
+        require_authkey(self.address)
+        self.workers = workers
+
+        # One interpreter per job thread, so `workers` programs really run at
+        # once (the process-wide pool is sized for an API process instead)
+        pool = None
+        if settings.CODE_EXECUTION_POOL_SIZE > 0 and os.name == "posix":
+            pool = WarmInterpreterPool(
+                size=workers,
+                max_runs=settings.CODE_EXECUTION_MAX_RUNS_PER_WORKER,
+                limits=get_sandbox_limits()
+            )
+            atexit.register(pool.close)
+        self.service = CodeExecutionService(backend="local", pool=pool)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._running = 0
+
+    def _run_jobs(self):
+        while True:
+            job = self._queue.get()
+            with self._jobs_lock:
+                self._running += 1
+            try:
+                job.result = self.service.execute_code(job.code, job.expected_output, job.stdin)
+            except Exception as e:
+                job.result = self.service._new_result()
+                job.result["error"] = f"Execution failed: {str(e)}"
+            finally:
+                with self._jobs_lock:
+                    self._running -= 1
+                job.finished_at = time.time()
+                job.done.set()
+
+    def _expire_results(self):
+        cutoff = time.time() - RESULT_TTL_SECONDS
+        with self._jobs_lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get("op")
+
+        if op == "submit":
+            self._expire_results()
+            job = Job(message.get("owner"), message["code"], message.get("expected_output"), message.get("stdin"))
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return {"error": "queue_full"}
+            with self._jobs_lock:
+                self._jobs[job.id] = job
+            return {"job_id": job.id}
+
+        if op == "result":
+            with self._jobs_lock:
+                job = self._jobs.get(message.get("job_id"))
+            if job is None or job.owner != message.get("owner"):
+                return {"status": "unknown"}
+            if not job.done.wait(timeout=message.get("wait", 0)):
+                return {"status": "pending"}
+            return {"status": "done", "result": job.result}
+
+        if op == "stats":
+            with self._jobs_lock:
+                running = self._running
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "running": running,
+                "workers": self.workers
+            }
+
+        return {"error": f"unknown op {op}"}
+
+    def _serve_connection(self, sock: socket.socket):
+        connection = FrameConnection(sock)
+        try:
+            sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+            connection.challenge(get_authkey())
+            sock.settimeout(None)
+            while True:
+                message = connection.recv()
+                if message is None:
+                    break
+                connection.send(self.handle(message))
+        except Exception as e:
+            # Failed handshakes, bad frames and dropped clients only end this connection
+            print(f"Executor connection error: {str(e)}")
+        finally:
+            connection.close()
+
+    def serve_forever(self):
+        for _ in range(self.workers):
+            threading.Thread(target=self._run_jobs, daemon=True).start()
+
+        if isinstance(self.address, tuple):
+            listener = socket.create_server(self.address)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Only this user (and its group) may connect; the umask makes the
+            # socket file 0660 from the moment it exists, not after a chmod
+            previous_umask = os.umask(0o117)
+            try:
+                listener.bind(self.address)
+            finally:
+                os.umask(previous_umask)
+            listener.listen()
+
+        with listener:
+            print(f"Execution workers listening on {self.address}")
+            while True:
+                try:
+                    sock, _ = listener.accept()
+                except OSError as e:
+                    print(f"Executor accept error: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(sock,), daemon=True).start()
+
+
+class RemoteExecutionBackend:
+    """
+    Client used by API processes to dispatch programs to the execution worker tier.
+    """
+    def __init__(self, address: str):
+        self.address = parse_address(address)
+
+    def _call(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            require_authkey(self.address)
+        except ValueError as e:
+            raise ExecutorUnavailable(str(e))
+
+        connection = None
+        try:
+            connection = FrameConnection(_open_socket(self.address))
+            connection.answer(get_authkey())
+            connection.sock.settimeout(message.get("wait", 0) + REPLY_GRACE_SECONDS)
+            connection.send(message)
+            reply = connection.recv()
+        except (OSError, ValueError, ExecutorAuthError) as e:
+            raise ExecutorUnavailable(str(e))
+        finally:
+            if connection is not None:
+                connection.close()
+
+        if reply is None:
+            raise ExecutorUnavailable("connection closed by the execution workers")
+        return reply
+
+    def submit(self, code: str, expected_output: Optional[str] = None, stdin: Optional[str] = None,
+               owner: Optional[int] = None) -> Optional[str]:
+        """
+        Queue a program. Returns the job ID, or None when the executor queue is full.
+        """
+        reply = self._call({
+            "op": "submit",
+            "code": code,
+            "expected_output": expected_output,
+            "stdin": stdin,
+            "owner": owner
+        })
+        return reply.get("job_id")
+
+    def get_result(self, job_id: str, owner: Optional[int] = None, wait: float = 0) -> Dict[str, Any]:
+        """
+        Poll a job, waiting up to `wait` seconds for it to finish.
+        """
+        return self._call({"op": "result", "job_id": job_id, "owner": owner, "wait": wait})
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({"op": "stats"})
@@ -1,79 +1,155 @@
 # app/services/game.py
-from sqlalchemy.orm import Session
+import base64
 import json
-from typing import List, Dict, Any, Optional
-from app.repositories.game import GameRepository
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from app.repositories.game import GameRepository, GAME_SORT_KEYS
 from app.repositories.user import UserRepository
+from app.repositories.challenge import ChallengeRepository
+from app.services.progress_cache import get_progress_state, touch_progress
+from app.services.unlock import UnlockService, is_game_unlocked
 from app.models.user import User
 
+def encode_game_cursor(sort: str, game) -> str:
+    """
+    Opaque cursor after a game of the list: the id for the id order, or
+    the sort key value and id, as URL-safe base64 JSON
+    """
+    if sort == "id":
+        return str(game.id)
+    payload = json.dumps([getattr(game, sort), game.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+# Ids in cursors must fit a signed 64-bit column
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+def _cursor_id(game_id: Any) -> int:
+    if type(game_id) is not int or not 0 <= game_id <= MAX_CURSOR_ID:
+        raise ValueError("Invalid cursor")
+    return game_id
+
+def decode_game_cursor(sort: str, cursor: str) -> Tuple[Any, int]:
+    """
+    The (sort key value, id) of an encode_game_cursor() cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed, or its value is not of the sort key's type
+    """
+    if sort == "id":
+        game_id = _cursor_id(int(cursor))
+        return game_id, game_id
+    try:
+        value, game_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    # Anything else would reach the query as a parameter of the wrong type
+    if type(value) is not GAME_SORT_KEYS[sort].type.python_type:
+        raise ValueError("Invalid cursor")
+    return value, _cursor_id(game_id)
+
 class GameService:
     def __init__(self, db: Session):
         self.db = db
         self.game_repo = GameRepository(db)
         self.user_repo = UserRepository(db)
+        self.challenge_repo = ChallengeRepository(db)
     
-    def get_all_games(self, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    def get_games_page(self,
+                       user_id: Optional[int] = None,
+                       difficulty: Optional[str] = None,
+                       category: Optional[str] = None,
+                       sort: str = "id",
+                       cursor: Optional[str] = None,
+                       limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Get all games with optional user progress
+        Get the games, or one page of them, with optional user progress
         
         Args:
             user_id: Optional user ID to include progress info
+            difficulty: Optional difficulty filter (case-insensitive)
+            category: Optional category filter (case-insensitive)
+            sort: Key of GAME_SORT_KEYS
+            cursor: Cursor returned with the previous page
+            limit: Maximum number of games, or None for all of them
             
         Returns:
-            List of game dictionaries with progress info if user_id provided
+            The games, and the cursor of the next page (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is not one of this sort order's
         """
-        games = self.game_repo.get_all_games()
-        result = []
+        after = decode_game_cursor(sort, cursor) if cursor else None
         
-        # If user_id is provided, fetch progress for each game
+        # One extra row tells whether there is a next page
+        games = self.game_repo.get_games_page(
+            difficulty, category, sort=sort, after=after,
+            limit=limit + 1 if limit is not None else None
+        )
+        next_cursor = None
+        if limit is not None and len(games) > limit:
+            games = games[:limit]
+            next_cursor = encode_game_cursor(sort, games[-1])
+        
+        # If user_id is provided, fetch progress for the games on this page
         user_progress = {}
+        state = None
         if user_id:
-            progress_list = self.game_repo.get_user_games_progress(user_id)
+            progress_list = self.game_repo.get_user_games_progress(user_id, [game.id for game in games])
             user_progress = {p.game_id: p for p in progress_list}
+            state = get_progress_state(self.db, user_id)
         
+        result = []
         for game in games:
-            game_dict = {
-                "id": game.id,
-                "title": game.title,
-                "slug": game.slug,
-                "description": game.description,
-                "short_description": game.short_description,
-                "image_url": game.image_url,
-                "difficulty": game.difficulty,
-                "category": game.category,
-                "xp_reward": game.xp_reward,
-                "estimated_time": game.estimated_time
-            }
+            game_dict = self._game_dict(game)
             
             # Add progress info if user_id was provided
             if user_id:
-                progress = user_progress.get(game.id)
-                if progress:
-                    game_dict["is_started"] = progress.is_started
-                    game_dict["is_completed"] = progress.is_completed
-                    game_dict["current_level"] = progress.current_level
-                    game_dict["score"] = progress.score
-                    game_dict["last_played_at"] = progress.last_played_at.isoformat() if progress.last_played_at else None
-                    game_dict["completed_at"] = progress.completed_at.isoformat() if progress.completed_at else None
-                else:
-                    game_dict["is_started"] = False
-                    game_dict["is_completed"] = False
-                    game_dict["current_level"] = 0
-                    game_dict["score"] = 0
-                    game_dict["last_played_at"] = None
-                    game_dict["completed_at"] = None
+                game_dict.update(self._progress_dict(user_progress.get(game.id)))
             
-            # Determine if game is unlocked (first game or previous games completed)
-            game_dict["unlocked"] = True if game.id == 1 else False
+            # Determine if game is unlocked (first game or unlocked by completing the previous one)
+            game_dict["unlocked"] = is_game_unlocked(game.id, state)
             
             result.append(game_dict)
         
-        # Mark games as unlocked based on previous game completion
-        for i in range(1, len(result)):
-            if user_id and result[i-1].get("is_completed", False):
-                result[i]["unlocked"] = True
-        
-        return result
+        return result, next_cursor
+    
+    @staticmethod
+    def _game_dict(game) -> Dict[str, Any]:
+        """The listed fields of a Game or a GAME_LIST_COLUMNS row"""
+        return {
+            "id": game.id,
+            "title": game.title,
+            "slug": game.slug,
+            "description": game.description,
+            "short_description": game.short_description,
+            "image_url": game.image_url,
+            "difficulty": game.difficulty,
+            "category": game.category,
+            "xp_reward": game.xp_reward,
+            "estimated_time": game.estimated_time
+        }
+    
+    @staticmethod
+    def _progress_dict(progress) -> Dict[str, Any]:
+        """A user's progress fields, or the defaults when they have not played"""
+        if not progress:
+            return {
+                "is_started": False,
+                "is_completed": False,
+                "current_level": 0,
+                "score": 0,
+                "last_played_at": None,
+                "completed_at": None
+            }
+        return {
+            "is_started": progress.is_started,
+            "is_completed": progress.is_completed,
+            "current_level": progress.current_level,
+            "score": progress.score,
+            "last_played_at": progress.last_played_at.isoformat() if progress.last_played_at else None,
+            "completed_at": progress.completed_at.isoformat() if progress.completed_at else None
+        }
     
     def get_game_by_slug(self, slug: str, user_id: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -91,44 +167,15 @@ class GameService:
         if not game:
             return None
         
-        result = {
-            "id": game.id,
-            "title": game.title,
-            "slug": game.slug,
-            "description": game.description,
-            "short_description": game.short_description,
-            "image_url": game.image_url,
-            "difficulty": game.difficulty,
-            "category": game.category,
-            "xp_reward": game.xp_reward,
-            "estimated_time": game.estimated_time
-        }
+        result = self._game_dict(game)
         
         # Add progress info if user_id was provided
         if user_id:
             progress = self.game_repo.get_user_game_progress(user_id, game.id)
-            if progress:
-                result["is_started"] = progress.is_started
-                result["is_completed"] = progress.is_completed
-                result["current_level"] = progress.current_level
-                result["score"] = progress.score
-                result["last_played_at"] = progress.last_played_at.isoformat() if progress.last_played_at else None
-                result["completed_at"] = progress.completed_at.isoformat() if progress.completed_at else None
-                
-                # Parse saved game data if available
-                if progress.data:
-                    try:
-                        result["saved_data"] = json.loads(progress.data)
-                    except:
-                        result["saved_data"] = {}
-            else:
-                result["is_started"] = False
-                result["is_completed"] = False
-                result["current_level"] = 0
-                result["score"] = 0
-                result["last_played_at"] = None
-                result["completed_at"] = None
-                result["saved_data"] = {}
+            result.update(self._progress_dict(progress))
+            
+            # Saved game data is decoded by the JSON column
+            result["saved_data"] = progress.data if progress and isinstance(progress.data, dict) else {}
         
         # Determine if game is unlocked
         result["unlocked"] = self._is_game_unlocked(game.id, user_id)
@@ -146,19 +193,9 @@ class GameService:
         Returns:
             Boolean indicating if game is unlocked
         """
-        # First game is always unlocked
-        if game_id == 1:
-            return True
-            
-        # If no user_id, game is locked (except first game)
-        if not user_id:
-            return False
-        
-        # Check if previous game is completed
-        prev_game_id = game_id - 1
-        progress = self.game_repo.get_user_game_progress(user_id, prev_game_id)
-        
-        return progress and progress.is_completed
+        # First game is always unlocked, others once the previous game is completed
+        state = get_progress_state(self.db, user_id) if user_id else None
+        return is_game_unlocked(game_id, state)
     
     def update_game_progress(self, user_id: int, game_id: int, progress_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -188,15 +225,19 @@ class GameService:
             data=data
         )
         
-        # If game is completed, update user XP
+        # Game progress is part of the responses validated by ETags
+        touch_progress(self.db, user_id)
+        
+        # If game is completed, unlock the next game and update user XP
         if is_completed:
+            UnlockService(self.db).game_completed(user_id, game_id)
             game = self.game_repo.get_game_by_id(game_id)
             if game:
                 user = self.user_repo.get_by_id(user_id)
                 if user:
                     user.experience += game.xp_reward
                     user.level = (user.experience // 100) + 1
-                    self.db.commit()
+        self.db.commit()
         
         result = {
             "id": progress.id,
@@ -210,12 +251,127 @@ class GameService:
             "completed_at": progress.completed_at.isoformat() if progress.completed_at else None,
         }
         
-        if progress.data:
-            try:
-                result["data"] = json.loads(progress.data)
-            except:
-                result["data"] = {}
+        result["data"] = progress.data if isinstance(progress.data, dict) else {}
+        
+        return result
+    
+    def get_game_challenges(self, difficulty: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get coding challenges, optionally filtered by difficulty
+        
+        Args:
+            difficulty: Optional difficulty filter
+            
+        Returns:
+            List of challenge dictionaries (including expected_output)
+        """
+        challenges = self.challenge_repo.get_all_challenges(difficulty)
+        result = []
+        
+        for challenge in challenges:
+            hints = challenge.hints if isinstance(challenge.hints, list) else []
+            
+            result.append({
+                "id": str(challenge.id),
+                "title": challenge.title,
+                "description": challenge.description,
+                "starter_code": challenge.starter_code or "",
+                "hints": hints,
+                "points": challenge.points,
+                "expected_output": challenge.expected_output
+            })
+        
+        return result
+    
+    def get_challenge_test_cases(self, challenge_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get the test cases used to grade each challenge
+        
+        Challenges without explicit test cases are graded by a single case
+        built from their expected_output with empty stdin.
+        
+        Args:
+            challenge_ids: Challenge IDs
+            
+        Returns:
+            Mapping of challenge ID to test case dictionaries; unknown IDs are omitted
+        """
+        challenges = self.challenge_repo.get_challenges_with_test_cases(challenge_ids)
+        result = {}
+        
+        for challenge in challenges:
+            if challenge.test_cases:
+                result[challenge.id] = [
+                    {
+                        "stdin": case.stdin,
+                        "expected_output": case.expected_output,
+                        "is_hidden": bool(case.is_hidden)
+                    }
+                    for case in challenge.test_cases
+                ]
+            else:
+                result[challenge.id] = [{
+                    "stdin": None,
+                    "expected_output": challenge.expected_output or "",
+                    "is_hidden": False
+                }]
+        
+        return result
+    
+    def evaluate_challenge(self, user_id: int, challenge_id: int, code: str,
+                           output: Optional[str] = None,
+                           grading: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Grade a challenge submission, record the attempt and award rewards
+        
+        Args:
+            user_id: User ID
+            challenge_id: Challenge ID
+            code: Submitted code
+            output: Output of a single run, compared with expected_output
+            grading: Result of CodeExecutionService.run_test_cases (takes precedence over output)
+            
+        Returns:
+            Dictionary with correct, points_earned and coins_earned
+        """
+        challenge = self.challenge_repo.get_challenge_by_id(int(challenge_id))
+        if not challenge:
+            return {"correct": False, "points_earned": 0, "coins_earned": 0}
+        
+        if grading is not None:
+            correct = grading["passed"]
         else:
-            result["data"] = {}
+            expected = (challenge.expected_output or "").strip()
+            correct = output is not None and output.strip() == expected
         
-        return result
\ No newline at end of file
+        first_completion = self.challenge_repo.record_challenge_attempt(
+            user_id=user_id,
+            challenge_id=challenge.id,
+            code_submitted=code,
+            completed=correct
+        )
+        
+        points_earned = 0
+        coins_earned = 0
+        
+        # Rewards are only granted the first time a challenge is solved
+        if first_completion:
+            points_earned = challenge.points or 0
+            coins_earned = points_earned // 2
+            # Increment in SQL so concurrent rewards for the same user add up
+            self.db.query(User).filter(User.id == user_id).update({
+                User.experience: func.coalesce(User.experience, 0) + points_earned,
+                User.coins: func.coalesce(User.coins, 0) + coins_earned
+            }, synchronize_session=False)
+            user = self.user_repo.get_by_id(user_id)
+            if user:
+                self.db.refresh(user)
+                user.level = (user.experience // 100) + 1
+        
+        self.db.commit()
+        
+        return {
+            "correct": correct,
+            "points_earned": points_earned,
+            "coins_earned": coins_earned
+        }
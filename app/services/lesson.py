@@ -1,13 +1,29 @@
 # app/services/lesson.py
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-import json
 from datetime import datetime
-from app.models.lesson import Lesson
-from app.models.topic import Topic
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from app.models.progress import UserProgress
-from app.models.user import User
-from app.models.course import Course
+from app.repositories.lesson import LessonRepository
+from app.repositories.progress import ProgressRepository
+from app.repositories.user import UserRepository
+from app.services.catalog import get_catalog
+from app.services.progress_cache import get_completed_lessons, record_completion
+from app.services.unlock import UnlockService
+from app.schemas.lesson import LessonDetailResponse
+
+# is_completed is the last field of LessonDetailResponse, so a rendered
+# lesson ends with this and everything before it is user-independent
+_COMPLETED_TAIL = b'"is_completed":false}'
+
+def _render_lesson_prefix(payload: dict) -> bytes:
+    """Render a lesson the way FastAPI would and cut it before is_completed's value"""
+    body = JSONResponse(jsonable_encoder(LessonDetailResponse(**payload, is_completed=False))).body
+    if not body.endswith(_COMPLETED_TAIL):
+        raise ValueError("is_completed is not the last field of LessonDetailResponse")
+    return body[:-len(b"false}")]
 
 class LessonService:
     def __init__(self, db: Session):
@@ -15,7 +31,7 @@ class LessonService:
     
     def get_lesson_detail(self, lesson_id, user_id=None):
         try:
-            lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
+            lesson = get_catalog(self.db).lessons_by_id.get(lesson_id)
             
             if not lesson:
                 return None
@@ -23,61 +39,10 @@ class LessonService:
             # Check if lesson is completed
             is_completed = False
             if user_id:
-                progress = self.db.query(UserProgress).filter(
-                    UserProgress.user_id == user_id,
-                    UserProgress.lesson_id == lesson_id
-                ).first()
-                
-                if progress and progress.is_completed:
-                    is_completed = True
-            
-            # Prepare lesson details based on type
-            result = {
-                "id": lesson.id,
-                "title": lesson.title,
-                "type": lesson.type,
-                "topic_id": lesson.topic_id,
-                "is_completed": is_completed
-            }
-            
-            # Add type-specific details
-            if lesson.type == "lesson":
-                # Try to parse content if it's a JSON string
-                if lesson.content and isinstance(lesson.content, str):
-                    try:
-                        result["content"] = json.loads(lesson.content)
-                    except json.JSONDecodeError:
-                        result["content"] = lesson.content
-                else:
-                    result["content"] = lesson.content
-            
-            elif lesson.type == "coding":
-                result["task"] = lesson.task
-                result["expected_output"] = lesson.expected_output
-            
-            elif lesson.type == "quiz":
-                # Fetch quiz questions and options
-                result["quiz_questions"] = []
-                
-                if lesson.quiz_questions:
-                    for question in lesson.quiz_questions:
-                        options = []
-                        
-                        if question.options:
-                            for option in question.options:
-                                options.append({
-                                    "id": option.id,
-                                    "text": option.option_text,
-                                    "is_correct": option.is_correct
-                                })
-                        
-                        result["quiz_questions"].append({
-                            "id": question.id,
-                            "question": question.question,
-                            "explanation": question.explanation,
-                            "options": options
-                        })
+                is_completed = lesson_id in get_completed_lessons(self.db, user_id)
             
+            result = self._lesson_payload(lesson)
+            result["is_completed"] = is_completed
             return result
         
         except SQLAlchemyError as e:
@@ -88,19 +53,104 @@ class LessonService:
             print(f"Unexpected error in get_lesson_detail: {str(e)}")
             return None
     
+    def render_lesson_detail(self, lesson_id, user_id=None) -> Optional[bytes]:
+        """
+        The lesson detail as JSON bytes, identical to what the API would
+        produce from get_lesson_detail through LessonDetailResponse.
+        
+        The user-independent part is rendered once per catalog snapshot (so
+        per lesson and content version) and cached on it; only is_completed
+        is appended per request.
+        
+        Args:
+            lesson_id: Lesson ID
+            user_id: Optional user ID to include completion
+            
+        Returns:
+            JSON bytes, or None if the lesson does not exist
+        """
+        try:
+            catalog = get_catalog(self.db)
+            lesson = catalog.lessons_by_id.get(lesson_id)
+            
+            if not lesson:
+                return None
+            
+            key = ("lesson_detail", lesson_id)
+            prefix = catalog.render_cache.get(key)
+            if prefix is None:
+                prefix = _render_lesson_prefix(self._lesson_payload(lesson))
+                catalog.render_cache[key] = prefix
+            
+            is_completed = False
+            if user_id:
+                is_completed = lesson_id in get_completed_lessons(self.db, user_id)
+            
+            return prefix + (b"true}" if is_completed else b"false}")
+        
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            print(f"Database error in render_lesson_detail: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error in render_lesson_detail: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _lesson_payload(lesson) -> dict:
+        """Everything in the lesson detail except is_completed"""
+        # Prepare lesson details based on type
+        result = {
+            "id": lesson.id,
+            "title": lesson.title,
+            "type": lesson.type,
+            "topic_id": lesson.topic_id
+        }
+        
+        # Add type-specific details
+        if lesson.type == "lesson":
+            # Content was decoded from JSON when the catalog was loaded
+            result["content"] = lesson.content
+        
+        elif lesson.type == "coding":
+            result["task"] = lesson.task
+            result["expected_output"] = lesson.expected_output
+        
+        elif lesson.type == "quiz":
+            # Quiz questions and options
+            result["quiz_questions"] = []
+            
+            if lesson.quiz_questions:
+                for question in lesson.quiz_questions:
+                    options = []
+                    
+                    if question.options:
+                        for option in question.options:
+                            options.append({
+                                "id": option.id,
+                                "text": option.text,
+                                "is_correct": option.is_correct
+                            })
+                    
+                    result["quiz_questions"].append({
+                        "id": question.id,
+                        "question": question.question,
+                        "explanation": question.explanation,
+                        "options": options
+                    })
+        
+        return result
+    
     def complete_lesson(self, lesson_id, user_id, score=None):
         # (Keep the existing complete_lesson method from the previous implementation)
         try:
-            lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
+            lesson = LessonRepository(self.db).get(lesson_id)
             
             if not lesson:
                 return None
                 
             # Create or update progress record
-            progress = self.db.query(UserProgress).filter(
-                UserProgress.user_id == user_id,
-                UserProgress.lesson_id == lesson_id
-            ).first()
+            progress = ProgressRepository(self.db).get_by_user_and_lesson(user_id, lesson_id)
             
             if not progress:
                 progress = UserProgress(
@@ -118,9 +168,10 @@ class LessonService:
                 progress.completed_at = datetime.utcnow()
                 progress.attempts += 1
                 progress.updated_at = datetime.utcnow()
+            record_completion(self.db, user_id, lesson_id)
             
             # Update user experience and coins
-            user = self.db.query(User).filter(User.id == user_id).first()
+            user = UserRepository(self.db).get_by_id(user_id)
             xp_earned = lesson.xp_reward
             
             if user:
@@ -138,45 +189,8 @@ class LessonService:
                 
                 user.last_login_date = datetime.utcnow()
             
-            # Check if all lessons in topic are completed
-            topic = lesson.topic
-            all_lesson_ids = [l.id for l in topic.lessons]
-            
-            # First, count how many lessons are completed in this topic
-            completed_lesson_count = self.db.query(UserProgress).filter(
-                UserProgress.user_id == user_id,
-                UserProgress.lesson_id.in_(all_lesson_ids),
-                UserProgress.is_completed == True
-            ).count()
-            
-            # If all lessons in current topic are completed
-            if completed_lesson_count == len(all_lesson_ids):
-                # Find the next topic in the same course
-                next_topic = self.db.query(Topic).filter(
-                    Topic.course_id == topic.course_id,
-                    Topic.order_index == topic.order_index + 1
-                ).first()
-                
-                # If next topic exists, unlock it
-                if next_topic:
-                    next_topic.is_locked = False
-                
-                # Optionally, you might want to find the next course if no more topics
-                if not next_topic:
-                    # Find the next course
-                    next_course = self.db.query(Course).filter(
-                        Course.order_index == topic.course.order_index + 1
-                    ).first()
-                    
-                    if next_course:
-                        # Mark the first topic of the next course as unlocked
-                        first_next_course_topic = self.db.query(Topic).filter(
-                            Topic.course_id == next_course.id,
-                            Topic.order_index == 0
-                        ).first()
-                        
-                        if first_next_course_topic:
-                            first_next_course_topic.is_locked = False
+            # Unlock the next topic for this user if the topic is now complete
+            UnlockService(self.db).lesson_completed(user_id, lesson_id)
             
             self.db.commit()
             
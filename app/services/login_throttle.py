@@ -0,0 +1,277 @@
+# app/services/login_throttle.py
+"""
+Login throttling.
+
+Failed logins are counted per username and per client IP in a sliding
+window of LOGIN_FAILURE_WINDOW_SECONDS. Once either key reaches its limit,
+further attempts are rejected with LoginThrottled before any database or
+bcrypt work, until the oldest failure leaves the window. A successful
+login clears the username's failures (not the IP's: one client may be
+guessing many accounts).
+
+Behind a reverse proxy every request comes from the proxy's address, so
+the per-IP key would lock everyone out together. Peers listed in
+LOGIN_TRUSTED_PROXIES are not used as the client: the client is taken from
+X-Forwarded-For (the rightmost address no trusted proxy added), and when
+there is none the IP limit is skipped for that request.
+
+Counters live in process memory, or in Redis when LOGIN_THROTTLE_REDIS_URL
+is set so every API worker sees the same failures.
+
+With Redis, usernames that do not exist are also remembered for
+LOGIN_UNKNOWN_USER_TTL_SECONDS so repeated attempts skip the user lookup;
+callers still wait about as long as a real password check
+(PasswordHasher.verify_delay()) so the answer does not reveal whether the
+account exists. Registering the username forgets it in every worker. The
+cache is not kept in process memory, where only the registering worker
+would forget it and the others would refuse the new account's logins.
+"""
+import ipaddress
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple, Union
+from app.config import settings
+
+try:
+    import redis
+except ImportError:  # Optional dependency, only needed for the shared store
+    redis = None
+
+
+class LoginThrottled(Exception):
+    """Raised when a username or client has failed to log in too often"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many failed login attempts")
+        self.retry_after = retry_after
+
+
+def parse_networks(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    """Comma-separated addresses or CIDR ranges"""
+    networks = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if entry:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+    return networks
+
+
+class LocalThrottleStore:
+    """
+    Failure timestamps in process memory, bounded by max_keys (least
+    recently used keys are dropped first).
+    """
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._failures = OrderedDict()  # key -> deque of timestamps
+        self._lock = threading.Lock()
+
+    def failures(self, key: str, now: float, window: float) -> Tuple[int, Optional[float]]:
+        """Failures within the window, and the time of the oldest one"""
+        with self._lock:
+            times = self._failures.get(key)
+            if not times:
+                return 0, None
+            while times and times[0] <= now - window:
+                times.popleft()
+            if not times:
+                del self._failures[key]
+                return 0, None
+            return len(times), times[0]
+
+    def add_failure(self, key: str, now: float, window: float):
+        with self._lock:
+            times = self._failures.get(key)
+            if times is None:
+                times = self._failures[key] = deque()
+            self._failures.move_to_end(key)
+            times.append(now)
+            while times and times[0] <= now - window:
+                times.popleft()
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def clear_failures(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+class RedisThrottleStore:
+    """
+    The same operations on Redis: a sorted set of failure times per key,
+    plus an expiring marker per unknown username.
+    """
+    PREFIX = "login-throttle:"
+
+    def __init__(self, url: str):
+        self._redis = redis.Redis.from_url(url)
+
+    def failures(self, key: str, now: float, window: float) -> Tuple[int, Optional[float]]:
+        name = self.PREFIX + "failures:" + key
+        pipe = self._redis.pipeline()
+        pipe.zremrangebyscore(name, 0, now - window)
+        pipe.zrange(name, 0, 0, withscores=True)
+        pipe.zcard(name)
+        _, oldest, count = pipe.execute()
+        return count, (oldest[0][1] if oldest else None)
+
+    def add_failure(self, key: str, now: float, window: float):
+        name = self.PREFIX + "failures:" + key
+        pipe = self._redis.pipeline()
+        # Members must be unique; the time is the score
+        pipe.zadd(name, {"{:.6f}".format(now): now})
+        pipe.zremrangebyscore(name, 0, now - window)
+        pipe.expire(name, int(window) + 1)
+        pipe.execute()
+
+    def clear_failures(self, key: str):
+        self._redis.delete(self.PREFIX + "failures:" + key)
+
+    def is_unknown(self, username: str, now: float) -> bool:
+        return bool(self._redis.exists(self.PREFIX + "unknown:" + username))
+
+    def mark_unknown(self, username: str, now: float, ttl: float):
+        self._redis.set(self.PREFIX + "unknown:" + username, 1, ex=max(1, int(ttl)))
+
+    def forget_unknown(self, username: str):
+        self._redis.delete(self.PREFIX + "unknown:" + username)
+
+
+class LoginThrottle:
+    """
+    Sliding-window failure limits per username and per client IP, plus the
+    unknown-username cache.
+    """
+    def __init__(self, max_failures_per_username: int, max_failures_per_ip: int, window_seconds: float,
+                 unknown_user_ttl: float, max_keys: int, redis_url: str = "", trusted_proxies: str = ""):
+        self.max_failures_per_username = max_failures_per_username
+        self.max_failures_per_ip = max_failures_per_ip
+        self.window_seconds = window_seconds
+        self.unknown_user_ttl = unknown_user_ttl
+        self.trusted_proxies = parse_networks(trusted_proxies)
+        self._local = LocalThrottleStore(max_keys)
+        self._shared = None
+
+        if redis_url:
+            if redis is None:
+                print("LOGIN_THROTTLE_REDIS_URL is set but the redis package is not installed; using per-process limits")
+            else:
+                self._shared = RedisThrottleStore(redis_url)
+
+    def _call(self, operation: str, *args):
+        """Run a store operation on Redis, falling back to memory if it is down"""
+        if self._shared is not None:
+            try:
+                return getattr(self._shared, operation)(*args)
+            except Exception as e:
+                print(f"Shared login throttle unavailable: {str(e)}")
+        return getattr(self._local, operation)(*args)
+
+    def _is_trusted_proxy(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_ip(self, peer: Optional[str], forwarded_for: Optional[str] = None) -> Optional[str]:
+        """
+        Address to count a request's failures under.
+
+        Args:
+            peer: Address of the connection
+            forwarded_for: The X-Forwarded-For header, used only when the peer is a trusted proxy
+
+        Returns:
+            The client address, or None (no IP limit) when a trusted proxy
+            did not say who the client is
+        """
+        if not peer or not self._is_trusted_proxy(peer):
+            return peer
+        # Each proxy appends the address it received from, so only entries
+        # right of the last untrusted one were written by our proxies
+        for entry in reversed((forwarded_for or "").split(",")):
+            entry = entry.strip()
+            if not entry:
+                continue
+            if self._is_trusted_proxy(entry):
+                continue
+            try:
+                return str(ipaddress.ip_address(entry))
+            except ValueError:
+                return None
+        return None
+
+    @staticmethod
+    def _username_key(username: str) -> str:
+        return username.strip().lower()
+
+    def _keys(self, username: str, client_ip: Optional[str]):
+        keys = [("user:" + self._username_key(username), self.max_failures_per_username)]
+        if client_ip:
+            keys.append(("ip:" + client_ip, self.max_failures_per_ip))
+        return keys
+
+    def check(self, username: str, client_ip: Optional[str] = None):
+        """
+        Raises:
+            LoginThrottled: The username or the client is over its limit
+        """
+        now = time.time()
+        for key, limit in self._keys(username, client_ip):
+            if limit <= 0:
+                continue
+            count, oldest = self._call("failures", key, now, self.window_seconds)
+            if count >= limit:
+                retry_after = max(1, int(oldest + self.window_seconds - now) + 1)
+                raise LoginThrottled(retry_after)
+
+    def record_failure(self, username: str, client_ip: Optional[str] = None):
+        now = time.time()
+        for key, _ in self._keys(username, client_ip):
+            self._call("add_failure", key, now, self.window_seconds)
+
+    def record_success(self, username: str):
+        self._call("clear_failures", "user:" + self._username_key(username))
+
+    def _unknown_users_cached(self) -> bool:
+        return self.unknown_user_ttl > 0 and self._shared is not None
+
+    def is_unknown_user(self, username: str) -> bool:
+        if not self._unknown_users_cached():
+            return False
+        try:
+            return self._shared.is_unknown(self._username_key(username), time.time())
+        except Exception as e:
+            # Look the user up rather than trust a cache that may be stale
+            print(f"Shared login throttle unavailable: {str(e)}")
+            return False
+
+    def mark_unknown_user(self, username: str):
+        if not self._unknown_users_cached():
+            return
+        try:
+            self._shared.mark_unknown(self._username_key(username), time.time(), self.unknown_user_ttl)
+        except Exception as e:
+            print(f"Shared login throttle unavailable: {str(e)}")
+
+    def forget_unknown_user(self, username: str):
+        """Call when an account is created under the username"""
+        if self._shared is None:
+            return
+        try:
+            self._shared.forget_unknown(self._username_key(username))
+        except Exception as e:
+            print(f"Shared login throttle unavailable: {str(e)}")
+
+
+login_throttle = LoginThrottle(
+    max_failures_per_username=settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+    max_failures_per_ip=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window_seconds=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+    unknown_user_ttl=settings.LOGIN_UNKNOWN_USER_TTL_SECONDS,
+    max_keys=settings.LOGIN_THROTTLE_MAX_KEYS,
+    redis_url=settings.LOGIN_THROTTLE_REDIS_URL,
+    trusted_proxies=settings.LOGIN_TRUSTED_PROXIES
+)
@@ -0,0 +1,119 @@
+# app/services/password_hasher.py
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (tens to hundreds of milliseconds per call at
+the usual cost), and the auth handlers are async: called inline, a burst
+of logins blocks every other request in the process. Hashing and
+verification run instead on a small dedicated thread pool (bcrypt releases
+the GIL, so the threads do run in parallel) of PASSWORD_HASH_WORKERS
+threads. At most PASSWORD_HASH_MAX_QUEUE more calls may wait for one;
+beyond that PasswordHasherBusy is raised and the API answers 429, rather
+than letting a login storm queue without bound.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.utils.metrics import ExecutionMetrics
+from app.utils.security import get_password_hash, verify_and_update_password
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing calls are already running or waiting"""
+
+
+class PasswordHasher:
+    """
+    Bounded thread pool for bcrypt, with queue depth and timing metrics.
+    """
+    def __init__(self, workers: int, max_queue: int, metrics_window: int = 1024):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.metrics = ExecutionMetrics(window=metrics_window)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        # Moving average of verification time, for verify_delay()
+        self._verify_seconds: Optional[float] = None
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password"""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its stored hash
+
+        Returns:
+            (valid, new_hash): new_hash is set when the stored hash uses
+            outdated parameters (e.g. a lower PASSWORD_BCRYPT_ROUNDS) and
+            should replace it
+        """
+        return await self._run("verify", verify_and_update_password, password, hashed_password)
+
+    async def verify_delay(self):
+        """
+        Take about as long as verify() without occupying a hashing thread,
+        so a login for an unknown username cannot be told apart by timing.
+        The first call calibrates with a real verification.
+        """
+        if self._verify_seconds is None:
+            await self.verify("calibration", await self.hash("calibration"))
+            return
+        await asyncio.sleep(self._verify_seconds)
+
+    async def _run(self, phase: str, function, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.metrics.increment("queue_full")
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            self.metrics.observe("queue_wait", started - submitted)
+            with self._lock:
+                self._running += 1
+            try:
+                return function(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._running -= 1
+                    if phase == "verify":
+                        previous = self._verify_seconds
+                        self._verify_seconds = elapsed if previous is None else 0.9 * previous + 0.1 * elapsed
+                self.metrics.observe(phase, elapsed)
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(job))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Timing percentiles, counters and the current queue depth"""
+        snapshot = self.metrics.snapshot()
+        with self._lock:
+            snapshot["concurrency"] = {
+                "in_flight": self._in_flight,
+                "running": self._running,
+                "queued": max(0, self._in_flight - self._running),
+                "workers": self.workers,
+                "max_queue": self.max_queue
+            }
+        snapshot["bcrypt_rounds"] = settings.PASSWORD_BCRYPT_ROUNDS
+        return snapshot
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    metrics_window=settings.CODE_METRICS_WINDOW
+)
@@ -0,0 +1,101 @@
+# app/services/password_reset.py
+"""
+Password reset tokens.
+
+The token sent by email is random; only its SHA-256 is stored, so a leaked
+table cannot be used to reset passwords, and a token is found through the
+unique index on the hash. Each user has at most one outstanding token.
+Expired tokens are deleted when they are presented and, in bounded batches
+on the expires_at index, at most every PASSWORD_RESET_SWEEP_SECONDS when
+new tokens are issued.
+"""
+import hashlib
+import secrets
+import string
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.password_reset import PasswordResetToken
+from app.models.user import User
+from app.repositories.password_reset import PasswordResetRepository
+
+# Reasons a token is rejected
+INVALID = "invalid"
+EXPIRED = "expired"
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+def generate_reset_token(length=32):
+    """Generate a secure random token"""
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+def hash_token(token: str) -> str:
+    """Stored form of a token. Tokens are long and random, so a fast hash suffices"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class PasswordResetService:
+    """
+    Issues and checks reset tokens. Nothing here commits: the caller's
+    transaction does.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = PasswordResetRepository(db)
+    
+    def issue_token(self, user: User) -> str:
+        """
+        Create a token for the user, replacing any earlier one
+        
+        Returns:
+            The token to send to the user; only its hash is stored
+        """
+        self._sweep_expired()
+        
+        token = generate_reset_token()
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
+        self.repository.replace_for_user(user.id, hash_token(token), expires_at)
+        return token
+    
+    def check_token(self, email: str, token: str) -> Tuple[Optional[PasswordResetToken], Optional[str]]:
+        """
+        Find the stored token for an email and token
+        
+        Returns:
+            (record, None) for a valid token, or (None, INVALID / EXPIRED)
+        """
+        record = self.repository.get_by_hash(hash_token(token))
+        
+        if record is None or record.user is None or record.user.email.lower() != email.lower():
+            return None, INVALID
+        
+        if record.expires_at < datetime.utcnow():
+            self.db.delete(record)
+            return None, EXPIRED
+        
+        return record, None
+    
+    def consume(self, record: PasswordResetToken) -> bool:
+        """
+        Invalidate every token of the record's user after a reset. Returns
+        False when a concurrent request consumed them first.
+        """
+        return self.repository.delete_for_user(record.user_id) > 0
+    
+    def _sweep_expired(self):
+        """Delete a batch of expired tokens, at most every PASSWORD_RESET_SWEEP_SECONDS per process"""
+        global _last_sweep
+        
+        with _sweep_lock:
+            now = time.monotonic()
+            if now - _last_sweep < settings.PASSWORD_RESET_SWEEP_SECONDS:
+                return
+            _last_sweep = now
+        
+        deleted = self.repository.delete_expired(datetime.utcnow())
+        if deleted:
+            print(f"Deleted {deleted} expired password reset tokens")
@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
 from app.models.progress import UserProgress
-from app.models.lesson import Lesson
-from app.models.user import User
+from app.repositories.lesson import LessonRepository
 from app.repositories.progress import ProgressRepository
 from app.repositories.user import UserRepository
+from app.services.progress_cache import record_completion
+from app.services.unlock import UnlockService
 from datetime import datetime, timedelta
 
 class ProgressService:
@@ -14,7 +15,7 @@ class ProgressService:
     
     def complete_lesson(self, user_id: int, lesson_id: int, score: int = None):
         # Get the lesson to calculate rewards
-        lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
+        lesson = LessonRepository(self.db).get(lesson_id)
         if not lesson:
             return None
             
@@ -37,9 +38,11 @@ class ProgressService:
             progress.completed_at = datetime.utcnow()
             progress.attempts += 1
             progress.updated_at = datetime.utcnow()
+        record_completion(self.db, user_id, lesson_id)
+        UnlockService(self.db).lesson_completed(user_id, lesson_id)
         
         # Update user experience and coins
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = self.user_repository.get_by_id(user_id)
         if user:
             user.experience += lesson.xp_reward
             user.coins += lesson.coins_reward
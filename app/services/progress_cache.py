@@ -0,0 +1,283 @@
+# app/services/progress_cache.py
+"""
+Per-user cache of progress state.
+
+Every course, topic, lesson and game page asks the same questions: which
+lessons has this user completed, and which topics and games have they
+unlocked? The answers are loaded together (one query for completions, one
+for unlocks) into bitsets indexed by id (ids are small autoincrement
+integers, so a set costs one bit per row of the catalog) and kept in an
+LRU of recently active users. Lookups are a byte index and a mask.
+
+Completions and unlocks written through record_completion() and
+record_unlock() update the cached state once the transaction commits.
+Every progress write also bumps users.progress_version (touch_progress()),
+which the state carries so responses built from it can be validated with
+ETags.
+
+The cache is per process, so a cached state is only used after checking
+its progress_version against users.progress_version (one primary-key
+query, made once per request per user): a write on another worker bumps
+the version and the state is reloaded. Entries also expire after
+PROGRESS_CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.unlock import UserUnlock
+from app.models.user import User
+from app.repositories.progress import ProgressRepository
+from app.repositories.unlock import UnlockRepository
+
+# Kinds of change recorded for completed lessons and progress versions;
+# unlocks use UserUnlock kinds
+LESSON = "lesson"
+VERSION = "version"
+
+
+class IdBitset:
+    """
+    Bitset of ids. Supports `in`, add() and len() like a set.
+    """
+    __slots__ = ("_bits", "_count")
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._bits = bytearray()
+        self._count = 0
+        for id_ in ids:
+            self.add(id_)
+
+    def __contains__(self, id_: int) -> bool:
+        index = id_ >> 3
+        return 0 <= index < len(self._bits) and bool(self._bits[index] & (1 << (id_ & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, id_: int):
+        if id_ in self:
+            return
+        index = id_ >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << (id_ & 7)
+        self._count += 1
+
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class UserProgressState:
+    """
+    What one user has completed and unlocked.
+    """
+    __slots__ = ("completed_lessons", "unlocked_topics", "unlocked_games", "progress_version", "loaded_at")
+
+    def __init__(self, completed_lessons: Iterable[int] = (), unlocks: Iterable = (), progress_version: int = 0):
+        self.completed_lessons = IdBitset(completed_lessons)
+        self.unlocked_topics = IdBitset()
+        self.unlocked_games = IdBitset()
+        self.progress_version = progress_version
+        self.loaded_at = time.monotonic()
+        for kind, target_id in unlocks:
+            self.add(kind, target_id)
+
+    def add(self, kind: str, value: int):
+        if kind == LESSON:
+            self.completed_lessons.add(value)
+        elif kind == UserUnlock.TOPIC:
+            self.unlocked_topics.add(value)
+        elif kind == UserUnlock.GAME:
+            self.unlocked_games.add(value)
+        elif kind == VERSION:
+            self.progress_version = max(self.progress_version, value)
+
+    def nbytes(self) -> int:
+        return self.completed_lessons.nbytes() + self.unlocked_topics.nbytes() + self.unlocked_games.nbytes()
+
+
+class ProgressCache:
+    """
+    LRU of UserProgressState by user id.
+    """
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._users = OrderedDict()  # user_id -> UserProgressState
+        self._lock = threading.Lock()
+        # Bumped by every write so a load that raced with one is not stored
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, db: Session, user_id: int, store: bool = True) -> UserProgressState:
+        """
+        The user's progress state: a cached state whose progress_version
+        still matches the database (one query), or a fresh load (three).
+        With store=False a loaded state is returned but not cached.
+        """
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is not None and time.monotonic() - state.loaded_at >= self.ttl_seconds:
+                state = None
+            generation = self._generation
+
+        if state is not None:
+            current = db.query(User.progress_version).filter(User.id == user_id).scalar() or 0
+            with self._lock:
+                if current == state.progress_version:
+                    if user_id in self._users:
+                        self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return state
+                # Changed elsewhere (e.g. on another worker) since it was cached
+                self.stale += 1
+                generation = self._generation
+
+        with self._lock:
+            self.misses += 1
+
+        state = load_progress_state(db, user_id)
+
+        with self._lock:
+            if store and self.max_users > 0 and generation == self._generation:
+                self._users[user_id] = state
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+                    self.evictions += 1
+
+        return state
+
+    def apply(self, user_id: int, kind: str, value: int):
+        """Add a committed change to the user's cached state, if any"""
+        with self._lock:
+            self._generation += 1
+            state = self._users.get(user_id)
+            if state is not None:
+                state.add(kind, value)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Forget one user, or everyone"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "bytes": sum(state.nbytes() for state in self._users.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions
+            }
+
+
+progress_cache = ProgressCache(
+    max_users=settings.PROGRESS_CACHE_MAX_USERS,
+    ttl_seconds=settings.PROGRESS_CACHE_TTL_SECONDS
+)
+
+# Changes waiting for their transaction to commit, users whose progress
+# version was bumped in it, and states already checked in it, kept in
+# Session.info
+_PENDING_KEY = "progress_cache_pending"
+_TOUCHED_KEY = "progress_cache_touched"
+_CHECKED_KEY = "progress_cache_checked"
+
+
+def load_progress_state(db: Session, user_id: int) -> UserProgressState:
+    """
+    What the user has completed and unlocked, read from the database in
+    the current transaction and never cached. Write paths that decide on
+    this state use it, since completions made on another worker may not
+    be in the cache yet.
+    """
+    return UserProgressState(
+        ProgressRepository(db).get_completed_lesson_ids(user_id),
+        UnlockRepository(db).get_user_unlocks(user_id),
+        db.query(User.progress_version).filter(User.id == user_id).scalar() or 0
+    )
+
+
+def get_progress_state(db: Session, user_id: int) -> UserProgressState:
+    """What the user has completed and unlocked (for read paths)"""
+    checked = db.info.setdefault(_CHECKED_KEY, {})
+    state = checked.get(user_id)
+    if state is not None:
+        return state
+
+    # A load inside a transaction with uncommitted changes sees them once
+    # they are flushed, so it must not be cached
+    pending = any(pending_user == user_id for pending_user, _, _ in db.info.get(_PENDING_KEY, ()))
+    state = checked[user_id] = progress_cache.get(db, user_id, store=not pending)
+    return state
+
+
+def get_completed_lessons(db: Session, user_id: int) -> IdBitset:
+    """The set of lesson ids the user has completed"""
+    return get_progress_state(db, user_id).completed_lessons
+
+
+def touch_progress(db: Session, user_id: int):
+    """
+    Bump the user's progress version, once per transaction. Call for any
+    progress change that should invalidate ETags (record_completion() and
+    record_unlock() do it themselves).
+    """
+    db.info.get(_CHECKED_KEY, {}).pop(user_id, None)
+    touched = db.info.setdefault(_TOUCHED_KEY, set())
+    if user_id in touched:
+        return
+    touched.add(user_id)
+
+    db.query(User).filter(User.id == user_id).update(
+        {User.progress_version: User.progress_version + 1},
+        synchronize_session=False
+    )
+    # Read the new value back: another worker may have bumped it as well
+    version = db.query(User.progress_version).filter(User.id == user_id).scalar()
+    if version is not None:
+        db.info.setdefault(_PENDING_KEY, []).append((user_id, VERSION, version))
+
+
+def record_completion(db: Session, user_id: int, lesson_id: int):
+    """
+    Call in the transaction that marks a lesson completed: the cached state
+    is updated after it commits, and nothing changes if it rolls back.
+    """
+    touch_progress(db, user_id)
+    db.info.setdefault(_PENDING_KEY, []).append((user_id, LESSON, lesson_id))
+
+
+def record_unlock(db: Session, user_id: int, kind: str, target_id: int):
+    """Like record_completion(), for a UserUnlock row"""
+    touch_progress(db, user_id)
+    db.info.setdefault(_PENDING_KEY, []).append((user_id, kind, target_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    session.info.pop(_TOUCHED_KEY, None)
+    session.info.pop(_CHECKED_KEY, None)
+    for user_id, kind, value in session.info.pop(_PENDING_KEY, ()):
+        progress_cache.apply(user_id, kind, value)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_TOUCHED_KEY, None)
+    session.info.pop(_CHECKED_KEY, None)
+    session.info.pop(_PENDING_KEY, None)
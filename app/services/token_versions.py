@@ -0,0 +1,107 @@
+# app/services/token_versions.py
+"""
+Token versions for revoking access tokens without a per-request lookup.
+
+Access tokens carry the user's token_version (claim "tv"). Bumping
+users.token_version (bump_token_version(), e.g. on a password reset)
+revokes every token issued before. Only users whose version was ever
+bumped have a non-zero one, so each process keeps just those in memory and
+re-reads them at most every TOKEN_VERSION_REFRESH_SECONDS (one indexed
+query); a token is current when its version is at least the cached one.
+
+Bumps made by this process apply as soon as their transaction commits,
+bumps made by other workers within TOKEN_VERSION_REFRESH_SECONDS.
+
+Setting User.is_active to False through the ORM bumps the version too, so
+a deactivated user's tokens stop working; deactivating with plain SQL
+must bump users.token_version in the same statement.
+"""
+import threading
+import time
+from typing import Dict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import settings
+from app.models.user import User
+
+
+class TokenVersionCache:
+    """
+    user_id -> token_version for users whose version is above 0.
+    """
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, int] = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._column_missing = False
+
+    def current_version(self, db: Session, user_id: int) -> int:
+        """The user's token version, refreshing the cache when it is stale"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            self.refresh(db)
+        return self._versions.get(user_id, 0)
+
+    def is_current(self, db: Session, user_id: int, token_version: int) -> bool:
+        """Whether a token issued with token_version has not been revoked"""
+        return token_version >= self.current_version(db, user_id)
+
+    def refresh(self, db: Session):
+        with self._lock:
+            loaded_at = self._loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_seconds:
+                return
+
+            try:
+                rows = db.query(User.id, User.token_version).filter(User.token_version > 0).all()
+            except SQLAlchemyError as e:
+                db.rollback()
+                if not self._column_missing:
+                    print(f"Token versions unavailable, tokens cannot be revoked: {str(e)}")
+                    self._column_missing = True
+                rows = []
+
+            # Swapped in whole, so readers never see a partial dict
+            self._versions = {user_id: version for user_id, version in rows}
+            self._loaded_at = time.monotonic()
+
+    def apply(self, user_id: int, version: int):
+        """Record a committed bump"""
+        with self._lock:
+            if version > self._versions.get(user_id, 0):
+                versions = dict(self._versions)
+                versions[user_id] = version
+                self._versions = versions
+
+    def invalidate(self):
+        """Re-read every version on the next check"""
+        with self._lock:
+            self._loaded_at = None
+
+
+token_versions = TokenVersionCache(refresh_seconds=settings.TOKEN_VERSION_REFRESH_SECONDS)
+
+
+def bump_token_version(db: Session, user: User):
+    """
+    Revoke the user's existing access tokens. Call inside the transaction
+    that changes their credentials; this process honours it once the
+    transaction commits.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    user_id, version = user.id, user.token_version
+    event.listen(db, "after_commit", lambda session: token_versions.apply(user_id, version), once=True)
+
+
+@event.listens_for(User.is_active, "set")
+def _revoke_on_deactivation(user, value, oldvalue, initiator):
+    # New users have no tokens yet
+    if value is not False or oldvalue is False or user.id is None:
+        return
+    db = object_session(user)
+    if db is None:
+        user.token_version = (user.token_version or 0) + 1
+    else:
+        bump_token_version(db, user)
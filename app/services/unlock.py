@@ -0,0 +1,110 @@
+# app/services/unlock.py
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models.unlock import UserUnlock
+from app.repositories.unlock import UnlockRepository
+from app.repositories.game import GameRepository
+from app.services.catalog import get_catalog, CatalogTopic
+from app.services.progress_cache import load_progress_state, record_unlock, UserProgressState
+
+# The first game is open to everyone
+FIRST_GAME_ID = 1
+
+def is_topic_locked(topic: CatalogTopic, state: Optional[UserProgressState] = None) -> bool:
+    """
+    Whether a topic is locked for a user (state) or for anonymous visitors (no state).
+    """
+    if not topic.is_locked:
+        return False
+    if state is None:
+        return True
+    
+    # The first topic of a course is open to every signed-in user
+    if topic.order_index == 0:
+        return False
+    
+    return topic.id not in state.unlocked_topics
+
+def is_game_unlocked(game_id: int, state: Optional[UserProgressState] = None) -> bool:
+    """
+    Whether a game is unlocked for a user (state) or for anonymous visitors (no state).
+    """
+    if game_id == FIRST_GAME_ID:
+        return True
+    
+    return state is not None and game_id in state.unlocked_games
+
+class UnlockService:
+    """
+    Materializes per-user unlocks when lessons and games are completed, so
+    read endpoints only look them up. Nothing here commits: the caller's
+    transaction covers the completion and the unlock it causes.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+        self.unlock_repo = UnlockRepository(db)
+        self.game_repo = GameRepository(db)
+    
+    def lesson_completed(self, user_id: int, lesson_id: int) -> Optional[int]:
+        """
+        Unlock the next topic when this lesson completes its topic
+        
+        Args:
+            user_id: User ID
+            lesson_id: The lesson being completed in the current transaction
+            
+        Returns:
+            ID of the newly unlocked topic, or None
+        """
+        catalog = get_catalog(self.db)
+        lesson = catalog.lessons_by_id.get(lesson_id)
+        if not lesson:
+            return None
+        
+        topic = catalog.topics_by_id[lesson.topic_id]
+        state = load_progress_state(self.db, user_id)
+        
+        # The lesson being completed is not committed yet, so count it explicitly
+        if not all(l_id == lesson_id or l_id in state.completed_lessons for l_id in topic.lesson_ids):
+            return None
+        
+        # The next topic in the course, or the first topic of the next course
+        next_topic = catalog.topic_at(topic.course_id, topic.order_index + 1)
+        if not next_topic:
+            next_course = catalog.course_at(catalog.courses_by_id[topic.course_id].order_index + 1)
+            if next_course:
+                next_topic = catalog.topic_at(next_course.id, 0)
+        
+        if not next_topic or not is_topic_locked(next_topic, state):
+            return None
+        
+        return self._unlock(user_id, UserUnlock.TOPIC, next_topic.id)
+    
+    def game_completed(self, user_id: int, game_id: int) -> Optional[int]:
+        """
+        Unlock the game that follows a completed game
+        
+        Args:
+            user_id: User ID
+            game_id: The completed game
+            
+        Returns:
+            ID of the newly unlocked game, or None
+        """
+        next_game = self.game_repo.get_next_game(game_id)
+        if not next_game:
+            return None
+        
+        if is_game_unlocked(next_game.id):
+            return None
+        
+        return self._unlock(user_id, UserUnlock.GAME, next_game.id)
+    
+    def _unlock(self, user_id: int, kind: str, target_id: int) -> Optional[int]:
+        # Another transaction may have added it since the state was read
+        if self.unlock_repo.has_unlock(user_id, kind, target_id):
+            return None
+        
+        self.unlock_repo.add_unlock(user_id, kind, target_id)
+        record_unlock(self.db, user_id, kind, target_id)
+        return target_id
@@ -4,6 +4,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from app.config import settings
+from app.utils.query_stats import instrument_engine
 
 # Get database URL from environment variable or settings
 DATABASE_URL = os.getenv('DATABASE_URL', settings.DATABASE_URL)
@@ -16,6 +17,9 @@ engine = create_engine(
     echo=False  # Set to True for debugging SQL queries
 )
 
+# Count statements per request (see app/utils/query_stats.py)
+instrument_engine(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,23 +1,21 @@
 # app/utils/email.py
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.utils.email_queue import email_queue
 
 class EmailService:
     def __init__(self):
         # Default configuration - can be overridden in environment variables
-        self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_username = os.getenv("SMTP_USERNAME", "")
-        self.smtp_password = os.getenv("SMTP_PASSWORD", "")
+        # (the SMTP server settings are used by the email queue's worker)
         self.from_email = os.getenv("FROM_EMAIL", "no-reply@pythonchick.com")
         self.from_name = os.getenv("FROM_NAME", "Pythonchick")
         
     def send_email(self, to_email, subject, html_content, text_content=None):
         """
-        Send an email using SMTP
+        Queue an email for delivery by the background worker (see
+        app/utils/email_queue.py); returns without waiting for SMTP.
         
         Args:
             to_email (str): Recipient email address
@@ -26,7 +24,7 @@ class EmailService:
             text_content (str, optional): Plain text content (fallback for non-HTML clients)
         
         Returns:
-            bool: Success status
+            bool: Whether the message was queued
         """
         # Create message container - the correct MIME type is multipart/alternative
         msg = MIMEMultipart('alternative')
@@ -51,28 +49,7 @@ class EmailService:
         msg.attach(part1)
         msg.attach(part2)
         
-        try:
-            # Send the message via SMTP server
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.ehlo()  # Identify ourselves to the server
-                server.starttls()  # Secure the connection
-                server.ehlo()  # Re-identify ourselves over TLS connection
-                
-                # Login if credentials are provided
-                if self.smtp_username and self.smtp_password:
-                    server.login(self.smtp_username, self.smtp_password)
-                
-                server.sendmail(self.from_email, to_email, msg.as_string())
-                
-            return True
-        except Exception as e:
-            print(f"Failed to send email: {str(e)}")
-            # In development mode, log the email content
-            if settings.ENVIRONMENT == "development":
-                print(f"Would have sent email to {to_email}:")
-                print(f"Subject: {subject}")
-                print(f"Content: {html_content}")
-            return False
+        return email_queue.enqueue(to_email, self.from_email, subject, msg.as_string())
     
     def send_password_reset(self, to_email, reset_token, username):
         """
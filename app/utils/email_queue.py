@@ -0,0 +1,316 @@
+# app/utils/email_queue.py
+"""
+Background delivery of outbound email.
+
+EmailService.send_email() only builds the message and puts it on an
+in-process queue; a daemon thread delivers it. The worker keeps one
+authenticated SMTP connection open and reuses it for every message (up
+to EMAIL_BATCH_SIZE are taken off the queue at a time), closing it after
+EMAIL_SMTP_IDLE_SECONDS without mail.
+
+Temporary failures (network errors, 4xx replies) are retried with
+exponential backoff, EMAIL_MAX_ATTEMPTS times in total. Permanent
+failures (5xx replies, refused recipients) and messages out of attempts
+go to the dead-letter log: one JSON line per message in
+EMAIL_DEAD_LETTER_PATH, without the body, which may hold reset links.
+
+The queue is per process and in memory: messages still queued when the
+process is killed are lost. stop() (called at shutdown) delivers what is
+queued first.
+"""
+import heapq
+import itertools
+import json
+import queue
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+# Longest wait between two attempts at one message
+MAX_RETRY_DELAY_SECONDS = 600
+
+_STOP = object()
+
+
+class OutgoingEmail:
+    __slots__ = ("to_email", "from_email", "subject", "message", "attempts", "last_error")
+
+    def __init__(self, to_email: str, from_email: str, subject: str, message: str):
+        self.to_email = to_email
+        self.from_email = from_email
+        self.subject = subject
+        self.message = message
+        self.attempts = 0
+        self.last_error = None
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """5xx replies and refused recipients will fail again; anything else may not"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # A credentials problem affects every message; keep retrying until it is fixed
+        return False
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+
+class EmailQueue:
+    """
+    Queue of outgoing messages and the worker thread that sends them.
+    """
+    def __init__(self, max_size: int, batch_size: int, max_attempts: int, retry_base_seconds: float,
+                 idle_seconds: float, dead_letter_path: str = ""):
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.idle_seconds = idle_seconds
+        self.dead_letter_path = dead_letter_path
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._retries = []  # heap of (due, sequence, OutgoingEmail)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "dropped": 0,
+            "batches": 0,
+            "connections_opened": 0
+        }
+
+    def enqueue(self, to_email: str, from_email: str, subject: str, message: str) -> bool:
+        """
+        Queue a message for delivery
+
+        Args:
+            to_email: Recipient address
+            from_email: Envelope sender
+            subject: Subject, for logs
+            message: The complete message (headers and body)
+
+        Returns:
+            False when the queue is full and the message was dropped
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(OutgoingEmail(to_email, from_email, subject, message))
+        except queue.Full:
+            self._increment("dropped")
+            print(f"Email queue full, dropped message to {to_email}: {subject}")
+            return False
+
+        self._increment("enqueued")
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Deliver what is queued (no more retries) and stop the worker"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["queued"] = self._queue.qsize()
+        counters["retrying"] = len(self._retries)
+        counters["connected"] = self._connection is not None
+        return counters
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="email-queue", daemon=True)
+                self._thread.start()
+
+    # Worker thread
+
+    def _run(self):
+        while True:
+            try:
+                if not self._work_once():
+                    break
+            except Exception as e:
+                print(f"Email worker error: {str(e)}")
+                self._close_connection()
+        self._close_connection()
+
+    def _work_once(self) -> bool:
+        """Send one batch, or close an idle connection. False once stopped"""
+        batch: List[OutgoingEmail] = []
+        stop = False
+
+        try:
+            item = self._queue.get(timeout=self._wait_seconds())
+            if item is _STOP:
+                stop = True
+            else:
+                batch.append(item)
+        except queue.Empty:
+            pass
+
+        # Retries that are due, then whatever else is waiting
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now and len(batch) < self.batch_size:
+            batch.append(heapq.heappop(self._retries)[2])
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+            else:
+                batch.append(item)
+
+        if batch:
+            self._send_batch(batch)
+        elif self._connection is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+            self._close_connection()
+
+        if stop or self._stopping and self._queue.empty():
+            return self._drain()
+        return True
+
+    def _drain(self) -> bool:
+        """At shutdown: send what is left once, dead-letter what still fails"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._send_batch([item], retry=False)
+
+        while self._retries:
+            self._send_batch([heapq.heappop(self._retries)[2]], retry=False)
+        return False
+
+    def _wait_seconds(self) -> Optional[float]:
+        waits = []
+        if self._retries:
+            waits.append(max(0.0, self._retries[0][0] - time.monotonic()))
+        if self._connection is not None:
+            waits.append(max(0.0, self._last_used + self.idle_seconds - time.monotonic()))
+        return min(waits) if waits else None
+
+    def _send_batch(self, batch: List[OutgoingEmail], retry: bool = True):
+        self._increment("batches")
+        for email in batch:
+            email.attempts += 1
+            try:
+                self._deliver(email)
+                self._increment("sent")
+            except Exception as e:
+                email.last_error = "{}: {}".format(type(e).__name__, str(e))
+                # After anything but an SMTP reply the connection's state is unknown
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                    self._close_connection()
+                self._failed(email, e, retry)
+
+    def _deliver(self, email: OutgoingEmail):
+        connection = self._connect()
+        try:
+            connection.sendmail(email.from_email, email.to_email, email.message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped a connection we kept open; reconnect once
+            self._close_connection()
+            self._connect().sendmail(email.from_email, email.to_email, email.message)
+        self._last_used = time.monotonic()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is not None:
+            return self._connection
+
+        connection = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            connection.ehlo()  # Identify ourselves to the server
+            if settings.SMTP_STARTTLS:
+                connection.starttls()  # Secure the connection
+                connection.ehlo()  # Re-identify ourselves over TLS connection
+
+            # Login if credentials are provided
+            if settings.SMTP_USERNAME and settings.SMTP_PASSWORD:
+                connection.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        except Exception:
+            connection.close()
+            raise
+
+        self._connection = connection
+        self._last_used = time.monotonic()
+        self._increment("connections_opened")
+        return connection
+
+    def _close_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _failed(self, email: OutgoingEmail, error: Exception, retry: bool):
+        if retry and not is_permanent_failure(error) and email.attempts < self.max_attempts:
+            delay = min(MAX_RETRY_DELAY_SECONDS, self.retry_base_seconds * 2 ** (email.attempts - 1))
+            # Jitter so messages that failed together do not retry together
+            delay *= random.uniform(0.5, 1.5)
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), email))
+            self._increment("retried")
+            print(f"Email to {email.to_email} failed ({email.last_error}), retrying in {delay:.0f}s")
+            return
+
+        self._dead_letter(email)
+
+    def _dead_letter(self, email: OutgoingEmail):
+        self._increment("dead_lettered")
+        print(f"Email to {email.to_email} undeliverable after {email.attempts} attempts: {email.last_error}")
+
+        if not self.dead_letter_path:
+            return
+        record = {
+            "failed_at": datetime.utcnow().isoformat(),
+            "to": email.to_email,
+            "subject": email.subject,
+            "attempts": email.attempts,
+            "error": email.last_error
+        }
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write the email dead-letter log: {str(e)}")
+
+
+email_queue = EmailQueue(
+    max_size=settings.EMAIL_QUEUE_MAX_SIZE,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+    idle_seconds=settings.EMAIL_SMTP_IDLE_SECONDS,
+    dead_letter_path=settings.EMAIL_DEAD_LETTER_PATH
+)
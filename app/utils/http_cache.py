@@ -0,0 +1,51 @@
+# app/utils/http_cache.py
+"""
+Conditional GET helpers.
+
+Endpoints compute an ETag from whatever versions their response depends
+on, before doing any work. When the client already holds that version
+(If-None-Match), they answer 304 with no body; otherwise they build the
+response as usual and attach the ETag and Cache-Control headers.
+"""
+import hashlib
+from fastapi import Request, Response, status
+from app.config import settings
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from the given parts"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return '"{}"'.format(digest[:32])
+
+
+def request_etag(request: Request, validator: str) -> str:
+    """ETag for a GET request: the route and its query string, plus the content validator"""
+    return make_etag(request.url.path, request.url.query, validator)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, private: bool) -> dict:
+    """ETag and Cache-Control; responses that include a user's progress are private"""
+    return {
+        "ETag": etag,
+        "Cache-Control": "{}, max-age={}".format("private" if private else "public", settings.HTTP_CACHE_MAX_AGE)
+    }
+
+
+def not_modified(etag: str, private: bool) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, private))
@@ -0,0 +1,24 @@
+# app/utils/http_errors.py
+"""
+HTTP errors shared by the routers that run code.
+"""
+from fastapi import HTTPException, status
+
+RUNNER_BUSY_DETAIL = "Code runner is busy, please try again in a moment"
+
+
+def runner_busy() -> HTTPException:
+    """429 for ExecutionQueueFull: every runner slot is taken"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=RUNNER_BUSY_DETAIL,
+        headers={"Retry-After": "1"}
+    )
+
+
+def executor_unavailable(error: Exception) -> HTTPException:
+    """503 for ExecutorUnavailable: the execution workers cannot be reached"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Execution workers unavailable: {str(error)}"
+    )
@@ -0,0 +1,95 @@
+# app/utils/metrics.py
+"""
+In-memory telemetry for the code runner.
+
+Each phase of a run (pre-check, queueing, spawning, the user's code, ...)
+records its duration in a rolling window of recent samples, from which
+p50/p95/p99 are computed on read. Counters track events such as timeouts
+and kills. Everything is per process; nothing is persisted.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any
+
+
+class RollingHistogram:
+    """
+    Keeps the last `window` samples and summarizes them on demand.
+    """
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "window": 0}
+
+        def percentile(p):
+            index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+            return round(samples[index] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "window": len(samples),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": round(samples[-1] * 1000, 3)
+        }
+
+
+class ExecutionMetrics:
+    """
+    Thread-safe registry of phase histograms and event counters.
+    """
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.started_at = time.time()
+        self._phases: Dict[str, RollingHistogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase: str, seconds: float):
+        """Record how long one phase of a run took"""
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = RollingHistogram(self.window)
+            histogram.observe(seconds)
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Time the enclosed block as `phase`, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "phases": {name: histogram.summary() for name, histogram in sorted(self._phases.items())},
+                "counters": dict(sorted(self._counters.items()))
+            }
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+            self._counters.clear()
+            self.started_at = time.time()
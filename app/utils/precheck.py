@@ -0,0 +1,135 @@
+# app/utils/precheck.py
+"""
+In-process static checks run before a program is sent to the sandbox.
+
+Code that does not compile, or that imports a module forbidden by policy,
+is rejected without spawning an interpreter. Verdicts are cached by the
+SHA-256 of the source so resubmitting the same code costs a dictionary
+lookup. The import policy is a teaching aid that gives students a clear
+message early; the sandbox rlimits remain the actual security boundary.
+"""
+import ast
+import hashlib
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+
+# Same name the sandbox worker uses, so messages look alike on both paths
+PROGRAM_FILENAME = "<main>"
+
+
+def _imported_modules(tree: ast.AST):
+    """Yield (module, line) for every import, including __import__("x") and importlib.import_module("x")"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name, node.lineno
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and not node.level:
+                yield node.module, node.lineno
+        elif isinstance(node, ast.Call) and node.args:
+            func = node.func
+            dynamic = (
+                (isinstance(func, ast.Name) and func.id == "__import__") or
+                (isinstance(func, ast.Attribute) and func.attr == "import_module")
+            )
+            first = node.args[0]
+            if dynamic and isinstance(first, ast.Constant) and isinstance(first.value, str):
+                yield first.value, node.lineno
+
+
+class CodePrecheck:
+    """
+    LRU cache of static check verdicts keyed by the hash of the source.
+    """
+    def __init__(self, forbidden_modules: Iterable[str], max_entries: int):
+        self.forbidden_modules = frozenset(forbidden_modules)
+        self.max_entries = max_entries
+        self._verdicts = OrderedDict()  # sha256 -> verdict or None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def check(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Check code without running it.
+
+        Returns:
+            None when the code may run, otherwise a dictionary with
+            reason ("syntax" or "forbidden_import"), error (a Python-style
+            message), line and column (column is 1-based, None if unknown)
+        """
+        key = hashlib.sha256(code.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+        with self._lock:
+            if key in self._verdicts:
+                self._verdicts.move_to_end(key)
+                self.hits += 1
+                verdict = self._verdicts[key]
+                if verdict is not None:
+                    self.rejected += 1
+                return verdict
+
+        verdict = self._check(code)
+
+        with self._lock:
+            self.misses += 1
+            if verdict is not None:
+                self.rejected += 1
+            if self.max_entries > 0:
+                self._verdicts[key] = verdict
+                while len(self._verdicts) > self.max_entries:
+                    self._verdicts.popitem(last=False)
+
+        return verdict
+
+    def _check(self, code: str) -> Optional[Dict[str, Any]]:
+        try:
+            tree = ast.parse(code, PROGRAM_FILENAME)
+            # ast.parse misses some errors that only the compiler reports,
+            # such as "return" outside a function
+            compile(tree, PROGRAM_FILENAME, "exec")
+        except SyntaxError as e:
+            if e.text is None and e.lineno:
+                # Errors raised while compiling the tree carry no source line
+                lines = code.splitlines()
+                if e.lineno <= len(lines):
+                    e.text = lines[e.lineno - 1]
+            return {
+                "reason": "syntax",
+                "error": "".join(traceback.format_exception_only(type(e), e)).rstrip(),
+                "line": e.lineno,
+                "column": e.offset
+            }
+        except ValueError as e:
+            # Source containing null bytes
+            return {
+                "reason": "syntax",
+                "error": "SyntaxError: {}".format(str(e)),
+                "line": None,
+                "column": None
+            }
+
+        for module, line in _imported_modules(tree):
+            if module.split(".")[0] in self.forbidden_modules:
+                return {
+                    "reason": "forbidden_import",
+                    "error": "ImportError: line {}: importing '{}' is not allowed here".format(line, module),
+                    "line": line,
+                    "column": None
+                }
+
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._verdicts),
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "forbidden_modules": sorted(self.forbidden_modules)
+            }
@@ -0,0 +1,201 @@
+# app/utils/query_stats.py
+"""
+Per-request SQL statement counting and N+1 detection.
+
+instrument_engine() hooks an engine's cursor events. While a QueryStats
+collector is active in the current context (collect_queries(), or
+QueryStatsMiddleware for each HTTP request), every statement is counted
+and timed. A statement executed several times with different parameters
+is the signature of an N+1 pattern (one query per row of an earlier
+result) and is reported as such.
+
+Outside a collector the hooks only look up a context variable, so the
+engine can stay instrumented in production.
+
+Tests can pin an endpoint's cost:
+
+    with query_budget(3):
+        client.get("/api/v1/courses")
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements run this many times with different parameters count as N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+# Collector that sees every thread's statements (for tests, where the app
+# may run in another thread, e.g. behind TestClient)
+_global: Optional["QueryStats"] = None
+
+
+class QueryStats:
+    """
+    Statements executed while the collector was active.
+    """
+    def __init__(self, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.total_time = 0.0
+        # statement -> [executions, set of distinct parameter reprs]
+        self._statements: Dict[str, list] = {}
+
+    def record(self, statement: str, parameters, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        entry = self._statements.setdefault(statement, [0, set()])
+        entry[0] += 1
+        entry[1].add(repr(parameters))
+
+    @property
+    def statements(self) -> List[Tuple[str, int]]:
+        """Distinct statements with how often each ran, most frequent first"""
+        return sorted(((statement, entry[0]) for statement, entry in self._statements.items()),
+                      key=lambda item: -item[1])
+
+    def n_plus_one(self) -> List[Tuple[str, int]]:
+        """Statements repeated with different parameters at least n_plus_one_threshold times"""
+        return [
+            (statement, entry[0])
+            for statement, entry in self._statements.items()
+            if entry[0] >= self.n_plus_one_threshold and len(entry[1]) > 1
+        ]
+
+    def headers(self) -> Dict[str, str]:
+        """Debug response headers"""
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Query-Time-Ms": "{:.1f}".format(self.total_time * 1000),
+            "X-DB-N-Plus-One": str(len(self.n_plus_one()))
+        }
+
+    def report(self) -> str:
+        suspects = {statement for statement, _ in self.n_plus_one()}
+        lines = ["{} queries in {:.1f} ms".format(self.count, self.total_time * 1000)]
+        for statement, executions in self.statements:
+            suspect = " (N+1)" if statement in suspects else ""
+            lines.append("  {}x{} {}".format(executions, suspect, " ".join(statement.split())))
+        return "\n".join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None or _global is not None:
+        conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, parameters, elapsed)
+    if _global is not None and _global is not stats:
+        _global.record(statement, parameters, elapsed)
+
+
+def instrument_engine(engine: Engine):
+    """Count the engine's statements for active collectors; safe to call twice"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def collect_queries(n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD, all_threads: bool = False):
+    """
+    Collect the statements executed in this context (and threads started
+    from it), or with all_threads=True in the whole process.
+    """
+    global _global
+
+    stats = QueryStats(n_plus_one_threshold)
+    if all_threads:
+        previous, _global = _global, stats
+        try:
+            yield stats
+        finally:
+            _global = previous
+        return
+
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, allow_n_plus_one: bool = False,
+                 n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+    """
+    Fail if the block runs more than max_queries statements, or any N+1
+    pattern unless allow_n_plus_one is set. Statements from every thread
+    count, so requests made through TestClient are included.
+
+    Args:
+        max_queries: Most statements the block may execute
+        allow_n_plus_one: Do not fail on repeated statements
+        n_plus_one_threshold: Repetitions that count as N+1
+
+    Raises:
+        QueryBudgetExceeded: With the statements that were executed
+    """
+    with collect_queries(n_plus_one_threshold, all_threads=True) as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded("Query budget of {} exceeded: {}".format(max_queries, stats.report()))
+    if not allow_n_plus_one and stats.n_plus_one():
+        raise QueryBudgetExceeded("N+1 query pattern: {}".format(stats.report()))
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that collects each HTTP request's statements, adds
+    them as X-DB-* response headers and logs N+1 patterns and requests
+    over budget (0 = no budget).
+
+    Headers and the log are written at http.response.start, so statements
+    run after it (dependency teardown, background tasks, streamed bodies)
+    are not counted in them. query_budget() around the request does count
+    those.
+    """
+    def __init__(self, app, budget: int = 0, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.budget = budget
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_queries(self.n_plus_one_threshold) as stats:
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.extend((name.lower().encode("latin-1"), value.encode("latin-1"))
+                                   for name, value in stats.headers().items())
+                    message = dict(message, headers=headers)
+                    self._log(scope, stats)
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
+
+    def _log(self, scope, stats: QueryStats):
+        path = "{} {}".format(scope.get("method", ""), scope.get("path", ""))
+        for statement, executions in stats.n_plus_one():
+            print(f"N+1 query pattern in {path}: {executions}x {' '.join(statement.split())[:200]}")
+        if self.budget and stats.count > self.budget:
+            print(f"Query budget exceeded in {path}: {stats.count} > {self.budget}")
@@ -0,0 +1,196 @@
+# app/utils/result_cache.py
+"""
+Content-addressed cache for code execution results.
+
+Results are keyed by the source (with line endings normalized), the
+interpreter version and the program's stdin. The in-process tier is an LRU
+bounded by entry count and by total payload size; an optional Redis tier lets several API workers share
+results. Programs that can behave differently between runs (clock, random,
+environment, files, ...) are never cached.
+"""
+import ast
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+try:
+    import redis
+except ImportError:  # Optional dependency, only needed for the shared tier
+    redis = None
+
+# Imports whose results depend on the clock, randomness or the host
+NONDETERMINISTIC_MODULES = {
+    "time", "datetime", "random", "secrets", "uuid", "os", "sys", "platform",
+    "socket", "subprocess", "threading", "multiprocessing", "tempfile",
+    "getpass", "pathlib", "shutil", "glob", "io", "asyncio", "signal"
+}
+
+# Builtins that read the environment or vary between interpreter processes
+NONDETERMINISTIC_BUILTINS = {"open", "hash", "id", "__import__", "eval", "exec", "compile", "globals", "vars"}
+
+INTERPRETER_VERSION = sys.version
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalize line endings, which the compiler translates anyway. Nothing
+    else: whitespace inside string literals is output, and blank lines
+    shift the line numbers in tracebacks.
+    """
+    return code.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def is_cacheable(code: str) -> bool:
+    """
+    Return True when the program's output only depends on its source and stdin.
+    Code that does not parse is cacheable: the syntax error is deterministic.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return True
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(alias.name.split(".")[0] in NONDETERMINISTIC_MODULES for alias in node.names):
+                return False
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.module.split(".")[0] in NONDETERMINISTIC_MODULES:
+                return False
+        elif isinstance(node, ast.Name) and node.id in NONDETERMINISTIC_BUILTINS:
+            return False
+
+    return True
+
+
+class ExecutionResultCache:
+    """
+    Two-tier LRU cache of execution results with TTL expiry.
+    """
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int, redis_url: str = ""):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, size, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared = None
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+
+        if redis_url:
+            if redis is None:
+                print("CODE_CACHE_REDIS_URL is set but the redis package is not installed; shared cache disabled")
+            else:
+                self._shared = redis.Redis.from_url(redis_url)
+
+    @staticmethod
+    def make_key(code: str, stdin: Optional[str] = None) -> str:
+        digest = hashlib.sha256()
+        for part in (normalize_code(code), INTERPRETER_VERSION, stdin or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def key_for(self, code: str, stdin: Optional[str] = None) -> Optional[str]:
+        """
+        The cache key of a run, or None for uncacheable code. Computed once
+        per run (it parses the source) and passed to get() and set().
+        """
+        if not is_cacheable(code):
+            with self._lock:
+                self.skipped += 1
+            return None
+        return self.make_key(code, stdin)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result by key_for(). Returns None on a miss.
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                self._remove(key)
+
+        if self._shared is not None:
+            try:
+                payload = self._shared.get("code-result:" + key)
+            except Exception as e:
+                print(f"Shared result cache unavailable: {str(e)}")
+                payload = None
+            if payload is not None:
+                payload = payload.decode("utf-8")
+                self._store_local(key, payload, now)
+                with self._lock:
+                    self.shared_hits += 1
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store a result under a key from key_for()"""
+        payload = json.dumps(result)
+        self._store_local(key, payload, time.time())
+
+        if self._shared is not None:
+            try:
+                self._shared.set("code-result:" + key, payload, ex=self.ttl_seconds)
+            except Exception as e:
+                print(f"Shared result cache unavailable: {str(e)}")
+
+    def _store_local(self, key: str, payload: str, now: float):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now + self.ttl_seconds, size, payload)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+                "shared_tier": self._shared is not None
+            }
@@ -0,0 +1,450 @@
+# app/utils/sandbox_worker.py
+"""
+Warm interpreter worker used by the code execution pool.
+
+The worker is started once by WarmInterpreterPool and then receives programs
+over its stdin pipe. Requests and replies are length-prefixed JSON frames
+(4-byte big-endian size followed by the UTF-8 payload). Resource limits are
+passed as a JSON object in argv[1] (see apply_limits).
+
+Cold-started programs use the same module as a wrapper instead:
+
+    python sandbox_worker.py --exec '<limits json>' python program.py
+
+applies the limits (including a fixed CPU limit) and then execs the given
+command, so the limits are set in the child itself rather than in a
+preexec_fn of the (threaded) API process.
+
+The worker never runs a program itself: it forks a child per program, which
+inherits the already imported modules, applies the limits, runs the code
+and sends its result back over a private pipe. Whatever the program changes
+(builtins, modules, this module's globals) dies with the child, so one run
+cannot influence the next. The worker enforces the wall-clock timeout by
+killing the child and reports deaths by signal (e.g. SIGXCPU, OOM kills).
+
+This module must not import anything from the app package so that the child
+process stays small and starts quickly.
+"""
+import builtins
+import io
+import json
+import errno
+import linecache
+import os
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+
+PROGRAM_FILENAME = "<main>"
+
+
+class CpuLimitExceeded(BaseException):
+    """Raised inside the user's program when its CPU budget runs out"""
+
+
+class OutputLimitExceeded(BaseException):
+    """Raised inside the user's program when it prints past the output cap"""
+
+
+class CappedWriter(io.TextIOBase):
+    """
+    Text stream that keeps at most max_bytes of UTF-8 output. Writing past
+    the cap stores what fits and raises OutputLimitExceeded; the exception
+    derives from BaseException so "except Exception" in user code cannot
+    swallow it.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.truncated:
+            raise OutputLimitExceeded()
+        data = text.encode("utf-8", errors="replace")
+        if self.max_bytes and self.size + len(data) > self.max_bytes:
+            room = self.max_bytes - self.size
+            self._parts.append(data[:room].decode("utf-8", errors="ignore"))
+            self.size = self.max_bytes
+            self.truncated = True
+            raise OutputLimitExceeded()
+        self._parts.append(text)
+        self.size += len(data)
+        return len(text)
+
+    def getvalue(self):
+        return "".join(self._parts)
+
+
+def classify_error(error):
+    """
+    Map the last line of a traceback to the resource limit that caused it,
+    or None when the failure is an ordinary error in the program.
+    """
+    lines = error.strip().splitlines()
+    last_line = lines[-1] if lines else ""
+
+    if last_line.startswith("MemoryError"):
+        return "memory"
+    if "File too large" in last_line or "[Errno {}]".format(errno.EFBIG) in last_line:
+        return "file_size"
+    if last_line.startswith("BlockingIOError") or "can't start new thread" in last_line:
+        return "processes"
+    return None
+
+
+def read_frame(stream, max_size=None):
+    """
+    Read one frame from a binary stream, or return None on EOF. Raises
+    ValueError for frames larger than max_size bytes.
+    """
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+
+    size = struct.unpack(">I", header)[0]
+    if max_size is not None and size > max_size:
+        raise ValueError("frame of {} bytes exceeds the limit of {}".format(size, max_size))
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+
+    return json.loads(payload.decode("utf-8"))
+
+
+def write_frame(stream, message):
+    """Write one frame to a binary stream"""
+    payload = json.dumps(message).encode("utf-8")
+    stream.write(struct.pack(">I", len(payload)) + payload)
+    stream.flush()
+
+
+def apply_limits(limits):
+    """
+    Apply the process-wide rlimits of the sandbox (POSIX only).
+
+    Supported keys:
+        memory_mb: address space cap (RLIMIT_AS)
+        file_size_kb: largest file the program may write (RLIMIT_FSIZE)
+        allow_subprocesses: when false, RLIMIT_NPROC is set to 0 so fork and
+            new threads fail. The limit is counted per user and is not
+            enforced for root.
+    A value of 0 disables the corresponding limit. CPU time is limited per
+    run by set_cpu_budget.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+
+    if limits.get("memory_mb"):
+        limit = limits["memory_mb"] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    if limits.get("file_size_kb"):
+        limit = limits["file_size_kb"] * 1024
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))
+        # Turn the default "kill" into an OSError (EFBIG) the program can report
+        signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+
+    if not limits.get("allow_subprocesses", True):
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def set_cpu_budget(cpu_seconds):
+    """
+    Allow the program cpu_seconds of CPU time on top of what this process
+    has already used. Returns False when CPU limits are unavailable.
+    """
+    if not cpu_seconds:
+        return False
+
+    try:
+        import resource
+    except ImportError:
+        return False
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    return True
+
+
+def clear_cpu_budget():
+    """Lift the per-run CPU limit once the program has finished"""
+    try:
+        import resource
+    except ImportError:
+        return
+
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def run_program(code, stdin=None, limits=None):
+    """
+    Run a program in a fresh __main__ namespace and capture its output.
+
+    Args:
+        code: Python source to execute
+        stdin: Text made available to input() and sys.stdin
+        limits: Per-run limits (cpu_seconds, max_output_bytes)
+
+    Returns:
+        Dictionary with success, output, error, returncode, execution_time,
+        output_truncated and limit_exceeded
+    """
+    limits = limits or {}
+    max_output = limits.get("max_output_bytes", 0)
+    stdout = CappedWriter(max_output)
+    stderr = CappedWriter(max_output)
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    returncode = 0
+    limit_exceeded = None
+
+    # Register the source so tracebacks can show the offending lines
+    linecache.cache[PROGRAM_FILENAME] = (len(code), None, code.splitlines(True), PROGRAM_FILENAME)
+
+    sys.stdin = io.StringIO(stdin or "")
+    sys.stdout = stdout
+    sys.stderr = stderr
+    cpu_limited = set_cpu_budget(limits.get("cpu_seconds", 0))
+    start_time = time.perf_counter()
+
+    try:
+        exec(compile(code, PROGRAM_FILENAME, "exec"), namespace)
+    except CpuLimitExceeded:
+        returncode = 1
+        limit_exceeded = "cpu"
+    except OutputLimitExceeded:
+        returncode = 1
+        limit_exceeded = "output"
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+        elif isinstance(e.code, int):
+            returncode = e.code
+        else:
+            returncode = 1
+            print(e.code, file=stderr)
+    except BaseException as e:
+        returncode = 1
+        # Skip this module's frame so the traceback starts in the user's code
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        try:
+            stderr.write("".join(traceback.format_exception(type(e), e, tb)))
+        except OutputLimitExceeded:
+            pass
+        limit_exceeded = classify_error(stderr.getvalue())
+    finally:
+        elapsed = time.perf_counter() - start_time
+        if cpu_limited:
+            clear_cpu_budget()
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        linecache.cache.pop(PROGRAM_FILENAME, None)
+
+    error = stderr.getvalue()
+    if limit_exceeded == "cpu":
+        error += "\nCPU time limit exceeded"
+    elif limit_exceeded == "output":
+        error += "\nOutput limit of {} bytes exceeded".format(max_output)
+
+    return {
+        "success": returncode == 0,
+        "output": stdout.getvalue(),
+        "error": error,
+        "returncode": returncode,
+        "execution_time": elapsed,
+        "output_truncated": stdout.truncated or stderr.truncated,
+        "limit_exceeded": limit_exceeded
+    }
+
+
+def _read_all(fd, deadline):
+    """
+    Read a child's result pipe until EOF. Returns None when the deadline
+    passes first.
+    """
+    chunks = []
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        readable, _, _ = select.select([fd], [], [], remaining)
+        if not readable:
+            return None
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _failed_result(error, returncode=None, limit_exceeded=None, timed_out=False, elapsed=0):
+    return {
+        "success": False,
+        "output": "",
+        "error": error,
+        "returncode": returncode,
+        "execution_time": elapsed,
+        "output_truncated": False,
+        "limit_exceeded": limit_exceeded,
+        "timed_out": timed_out
+    }
+
+
+# Fields a child reports and their types; the program runs in the child and
+# could write anything, so nothing else is passed on
+RESULT_FIELDS = {
+    "output": str,
+    "error": str,
+    "returncode": int,
+    "execution_time": (int, float),
+    "output_truncated": bool,
+    "limit_exceeded": str
+}
+
+
+def _child_result(payload):
+    """Validate a child's result frame"""
+    try:
+        reported = json.loads(payload.decode("utf-8"))
+    except ValueError:
+        reported = None
+    if not isinstance(reported, dict):
+        return _failed_result("Execution failed: the program's result could not be read")
+
+    result = _failed_result("")
+    for name, kind in RESULT_FIELDS.items():
+        value = reported.get(name)
+        if isinstance(value, kind) and not (kind is int and isinstance(value, bool)):
+            result[name] = value
+    result["success"] = result["returncode"] == 0
+    return result
+
+
+def run_forked(request, limits, protocol_fds):
+    """
+    Run one program in a forked child and return its result.
+
+    Args:
+        request: Frame with code, stdin and timeout (seconds of wall time)
+        limits: Limits from argv[1], applied in the child only
+        protocol_fds: The worker's request/reply descriptors, closed in the
+            child so the program cannot write frames of its own
+    """
+    timeout = request.get("timeout") or 5
+    result_read, result_write = os.pipe()
+    start_time = time.perf_counter()
+
+    try:
+        pid = os.fork()
+    except OSError as e:
+        os.close(result_read)
+        os.close(result_write)
+        return _failed_result("Execution failed: {}".format(e))
+
+    if pid == 0:
+        # Child: never return into the worker's loop
+        try:
+            os.close(result_read)
+            for fd in protocol_fds:
+                os.close(fd)
+            child_pid = os.getpid()
+            apply_limits(limits)
+            result = run_program(request.get("code", ""), request.get("stdin"), limits)
+            # A program that forked must not let its child answer as well
+            if os.getpid() == child_pid:
+                with os.fdopen(result_write, "wb") as replies:
+                    write_frame(replies, result)
+        finally:
+            os._exit(0)
+
+    os.close(result_write)
+    try:
+        payload = _read_all(result_read, time.monotonic() + timeout)
+    finally:
+        os.close(result_read)
+
+    if payload is None:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        return _failed_result("Execution timed out after {} seconds".format(timeout),
+                              limit_exceeded="timeout", timed_out=True, elapsed=time.perf_counter() - start_time)
+
+    _, status = os.waitpid(pid, 0)
+    if len(payload) >= 4:
+        return _child_result(payload[4:])
+
+    # The child died before reporting: killed by a signal or os._exit()
+    elapsed = time.perf_counter() - start_time
+    if os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        if signum == getattr(signal, "SIGXCPU", None):
+            return _failed_result("CPU time limit exceeded", -signum, "cpu", elapsed=elapsed)
+        return _failed_result("Program was killed by signal {}".format(signum), -signum, elapsed=elapsed)
+    returncode = os.WEXITSTATUS(status)
+    result = _failed_result("", returncode, elapsed=elapsed)
+    result["success"] = returncode == 0
+    return result
+
+
+def exec_limited(limits, command):
+    """Apply the limits to this process and replace it with command"""
+    apply_limits(limits)
+    if limits.get("cpu_seconds"):
+        try:
+            import resource
+        except ImportError:
+            resource = None
+        if resource is not None:
+            # SIGXCPU at the limit; SIGKILL a second later if it is ignored
+            cpu = limits["cpu_seconds"]
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    os.execv(command[0], command)
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == "--exec":
+        exec_limited(json.loads(sys.argv[2]), sys.argv[3:])
+
+    limits = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+
+    # Keep private copies of the pipes for the protocol and point the real
+    # descriptors at /dev/null so user code cannot corrupt the frame stream
+    requests = os.fdopen(os.dup(0), "rb")
+    replies = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    # Inherited by every child; the limits themselves are applied per child
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    protocol_fds = (requests.fileno(), replies.fileno())
+    write_frame(replies, {"ready": True})
+
+    while True:
+        request = read_frame(requests)
+        if request is None:
+            break
+        write_frame(replies, run_forked(request, limits, protocol_fds))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; hashes made with other parameters are upgraded on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
 
 # JWT token functions
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -23,5 +23,12 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    Verify a password and, when its hash uses outdated parameters, rehash it.
+    Returns (valid, new_hash); new_hash is None when nothing needs to change.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
\ No newline at end of file
@@ -0,0 +1,49 @@
+# migrations/versions/5c1e7a9d2b40_add_challenge_test_cases.py
+"""add_challenge_test_cases
+
+Revision ID: 5c1e7a9d2b40
+Revises: 0a21fe616442
+Create Date: 2026-10-18 09:12:31.402118
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9d2b40'
+down_revision = '0a21fe616442'
+branch_labels = None
+depends_on = None
+
+def table_exists(connection, table_name):
+    """Check if a table exists in the database."""
+    inspector = inspect(connection)
+    return table_name in inspector.get_table_names()
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not table_exists(connection, 'challenge_test_cases'):
+        op.create_table('challenge_test_cases',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('challenge_id', sa.Integer(), nullable=False),
+        sa.Column('stdin', sa.Text(), nullable=True),
+        sa.Column('expected_output', sa.Text(), nullable=False),
+        sa.Column('is_hidden', sa.Boolean(), nullable=True),
+        sa.Column('order_index', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['challenge_id'], ['coding_challenges.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_challenge_test_cases_id'), 'challenge_test_cases', ['id'], unique=False)
+        op.create_index(op.f('ix_challenge_test_cases_challenge_id'), 'challenge_test_cases', ['challenge_id'], unique=False)
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if table_exists(connection, 'challenge_test_cases'):
+        op.drop_index(op.f('ix_challenge_test_cases_challenge_id'), table_name='challenge_test_cases')
+        op.drop_index(op.f('ix_challenge_test_cases_id'), table_name='challenge_test_cases')
+        op.drop_table('challenge_test_cases')
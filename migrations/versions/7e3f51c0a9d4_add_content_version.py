@@ -0,0 +1,42 @@
+# migrations/versions/7e3f51c0a9d4_add_content_version.py
+"""add_content_version
+
+Revision ID: 7e3f51c0a9d4
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-18 11:47:05.218734
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = '7e3f51c0a9d4'
+down_revision = '5c1e7a9d2b40'
+branch_labels = None
+depends_on = None
+
+def table_exists(connection, table_name):
+    """Check if a table exists in the database."""
+    inspector = inspect(connection)
+    return table_name in inspector.get_table_names()
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not table_exists(connection, 'content_version'):
+        content_version = op.create_table('content_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        # The catalog reads the single row with id 1
+        op.bulk_insert(content_version, [{'id': 1, 'version': 1}])
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if table_exists(connection, 'content_version'):
+        op.drop_table('content_version')
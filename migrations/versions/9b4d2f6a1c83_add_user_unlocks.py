@@ -0,0 +1,110 @@
+# migrations/versions/9b4d2f6a1c83_add_user_unlocks.py
+"""add_user_unlocks
+
+Revision ID: 9b4d2f6a1c83
+Revises: 7e3f51c0a9d4
+Create Date: 2026-10-18 13:05:42.917204
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = '9b4d2f6a1c83'
+down_revision = '7e3f51c0a9d4'
+branch_labels = None
+depends_on = None
+
+def table_exists(connection, table_name):
+    """Check if a table exists in the database."""
+    inspector = inspect(connection)
+    return table_name in inspector.get_table_names()
+
+def backfill_unlocks(connection):
+    """
+    Derive each user's unlocks from their progress: the topic after every
+    completed topic, and the game after every completed game.
+    """
+    topics = sa.table('topics', sa.column('id'), sa.column('course_id'), sa.column('order_index'))
+    lessons = sa.table('lessons', sa.column('id'), sa.column('topic_id'))
+    user_progress = sa.table('user_progress', sa.column('user_id'), sa.column('lesson_id'), sa.column('is_completed'))
+    games = sa.table('games', sa.column('id'), sa.column('is_active'))
+    user_game_progress = sa.table('user_game_progress', sa.column('user_id'), sa.column('game_id'), sa.column('is_completed'))
+    
+    topic_at = {}
+    for topic_id, course_id, order_index in connection.execute(sa.select(topics.c.id, topics.c.course_id, topics.c.order_index)):
+        topic_at.setdefault((course_id, order_index), topic_id)
+    
+    topic_lessons = {}
+    for lesson_id, topic_id in connection.execute(sa.select(lessons.c.id, lessons.c.topic_id)):
+        topic_lessons.setdefault(topic_id, set()).add(lesson_id)
+    
+    completed = {}
+    for user_id, lesson_id in connection.execute(
+        sa.select(user_progress.c.user_id, user_progress.c.lesson_id).where(user_progress.c.is_completed == sa.true())
+    ):
+        completed.setdefault(user_id, set()).add(lesson_id)
+    
+    rows = set()
+    for user_id, lesson_ids in completed.items():
+        for (course_id, order_index), topic_id in topic_at.items():
+            # The first topic of the next course is open to every signed-in user, so
+            # only the next topic in the same course needs a row
+            next_topic = topic_at.get((course_id, order_index + 1))
+            if next_topic and topic_lessons.get(topic_id) and topic_lessons[topic_id] <= lesson_ids:
+                rows.add((user_id, 'topic', next_topic))
+    
+    active_games = sorted(game_id for (game_id,) in connection.execute(
+        sa.select(games.c.id).where(games.c.is_active == sa.true())
+    ))
+    for user_id, game_id in connection.execute(
+        sa.select(user_game_progress.c.user_id, user_game_progress.c.game_id).where(user_game_progress.c.is_completed == sa.true())
+    ):
+        next_games = [active_id for active_id in active_games if active_id > game_id]
+        if next_games:
+            rows.add((user_id, 'game', next_games[0]))
+    
+    now = datetime.utcnow()
+    return [
+        {'user_id': user_id, 'kind': kind, 'target_id': target_id, 'unlocked_at': now}
+        for user_id, kind, target_id in sorted(rows)
+    ]
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not table_exists(connection, 'user_unlocks'):
+        user_unlocks = op.create_table('user_unlocks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('unlocked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'kind', 'target_id', name='uq_user_unlock')
+        )
+        op.create_index(op.f('ix_user_unlocks_id'), 'user_unlocks', ['id'], unique=False)
+        op.create_index(op.f('ix_user_unlocks_user_id'), 'user_unlocks', ['user_id'], unique=False)
+        
+        rows = backfill_unlocks(connection)
+        if rows:
+            op.bulk_insert(user_unlocks, rows)
+        
+        # Completing a lesson used to unlock the next topic for everyone; restore
+        # the seeded state (only the first topic of each course is open)
+        topics = sa.table('topics', sa.column('order_index', sa.Integer), sa.column('is_locked', sa.Boolean))
+        op.execute(topics.update().where(topics.c.order_index > 0).values(is_locked=True))
+        if table_exists(connection, 'content_version'):
+            op.execute("UPDATE content_version SET version = version + 1")
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if table_exists(connection, 'user_unlocks'):
+        op.drop_index(op.f('ix_user_unlocks_user_id'), table_name='user_unlocks')
+        op.drop_index(op.f('ix_user_unlocks_id'), table_name='user_unlocks')
+        op.drop_table('user_unlocks')
@@ -0,0 +1,50 @@
+# migrations/versions/a6c2e8f40d17_add_password_reset_tokens.py
+"""add_password_reset_tokens
+
+Revision ID: a6c2e8f40d17
+Revises: f3a8d6e21b94
+Create Date: 2026-10-18 19:26:03.517349
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'a6c2e8f40d17'
+down_revision = 'f3a8d6e21b94'
+branch_labels = None
+depends_on = None
+
+def table_exists(connection, table_name):
+    """Check if a table exists in the database."""
+    inspector = inspect(connection)
+    return table_name in inspector.get_table_names()
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not table_exists(connection, 'password_reset_tokens'):
+        op.create_table('password_reset_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash')
+        )
+        op.create_index(op.f('ix_password_reset_tokens_id'), 'password_reset_tokens', ['id'], unique=False)
+        op.create_index(op.f('ix_password_reset_tokens_user_id'), 'password_reset_tokens', ['user_id'], unique=False)
+        op.create_index(op.f('ix_password_reset_tokens_expires_at'), 'password_reset_tokens', ['expires_at'], unique=False)
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if table_exists(connection, 'password_reset_tokens'):
+        op.drop_index(op.f('ix_password_reset_tokens_expires_at'), table_name='password_reset_tokens')
+        op.drop_index(op.f('ix_password_reset_tokens_user_id'), table_name='password_reset_tokens')
+        op.drop_index(op.f('ix_password_reset_tokens_id'), table_name='password_reset_tokens')
+        op.drop_table('password_reset_tokens')
@@ -0,0 +1,77 @@
+# migrations/versions/b8d4f1e6c2a9_unique_user_challenges.py
+"""unique_user_challenges
+
+Revision ID: b8d4f1e6c2a9
+Revises: a6c2e8f40d17
+Create Date: 2026-10-18 21:12:47.308116
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f1e6c2a9'
+down_revision = 'a6c2e8f40d17'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'uq_user_challenges_user_challenge'
+
+user_challenges = sa.table('user_challenges',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('challenge_id', sa.Integer),
+    sa.column('completed', sa.Boolean),
+    sa.column('attempts', sa.Integer),
+    sa.column('completed_at', sa.DateTime)
+)
+
+def index_exists(connection, table_name, index_name):
+    """Check if an index exists on a table."""
+    inspector = inspect(connection)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def merge_duplicates(connection):
+    """Fold repeated (user_id, challenge_id) rows into the oldest one."""
+    rows = connection.execute(
+        sa.select(user_challenges).order_by(user_challenges.c.id)
+    ).mappings().all()
+
+    kept = {}
+    for row in rows:
+        key = (row['user_id'], row['challenge_id'])
+        if key not in kept:
+            kept[key] = dict(row)
+            continue
+
+        keeper = kept[key]
+        keeper['attempts'] = (keeper['attempts'] or 0) + (row['attempts'] or 0)
+        if row['completed'] and not keeper['completed']:
+            keeper['completed'] = True
+            keeper['completed_at'] = row['completed_at']
+        keeper['merged'] = True
+        connection.execute(user_challenges.delete().where(user_challenges.c.id == row['id']))
+
+    for keeper in kept.values():
+        if keeper.get('merged'):
+            connection.execute(
+                user_challenges.update()
+                .where(user_challenges.c.id == keeper['id'])
+                .values(attempts=keeper['attempts'], completed=keeper['completed'], completed_at=keeper['completed_at'])
+            )
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+
+    # One row per user and challenge, so a first completion is recorded once
+    if not index_exists(connection, 'user_challenges', INDEX_NAME):
+        merge_duplicates(connection)
+        op.create_index(INDEX_NAME, 'user_challenges', ['user_id', 'challenge_id'], unique=True)
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+
+    if index_exists(connection, 'user_challenges', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='user_challenges')
@@ -0,0 +1,38 @@
+# migrations/versions/c1f7a9d3e8b5_add_game_title_index.py
+"""add_game_title_index
+
+Revision ID: c1f7a9d3e8b5
+Revises: b8d4f1e6c2a9
+Create Date: 2026-10-18 22:41:09.517302
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'c1f7a9d3e8b5'
+down_revision = 'b8d4f1e6c2a9'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_games_active_title'
+
+def index_exists(connection, table_name, index_name):
+    """Check if an index exists on a table."""
+    inspector = inspect(connection)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    # Game list sorted by title, keyset-paginated on (title, id)
+    if not index_exists(connection, 'games', INDEX_NAME):
+        op.create_index(INDEX_NAME, 'games', ['is_active', 'title'])
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if index_exists(connection, 'games', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='games')
@@ -0,0 +1,35 @@
+# migrations/versions/c4e8a2f7d913_add_user_progress_version.py
+"""add_user_progress_version
+
+Revision ID: c4e8a2f7d913
+Revises: 9b4d2f6a1c83
+Create Date: 2026-10-18 14:22:09.530417
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2f7d913'
+down_revision = '9b4d2f6a1c83'
+branch_labels = None
+depends_on = None
+
+def column_exists(connection, table_name, column_name):
+    """Check if a column exists in a table."""
+    inspector = inspect(connection)
+    return column_name in [column['name'] for column in inspector.get_columns(table_name)]
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not column_exists(connection, 'users', 'progress_version'):
+        op.add_column('users', sa.Column('progress_version', sa.Integer(), nullable=False, server_default='0'))
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if column_exists(connection, 'users', 'progress_version'):
+        op.drop_column('users', 'progress_version')
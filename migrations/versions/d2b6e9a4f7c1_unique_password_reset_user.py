@@ -0,0 +1,69 @@
+# migrations/versions/d2b6e9a4f7c1_unique_password_reset_user.py
+"""unique_password_reset_user
+
+Revision ID: d2b6e9a4f7c1
+Revises: c1f7a9d3e8b5
+Create Date: 2026-10-18 23:05:52.184630
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'd2b6e9a4f7c1'
+down_revision = 'c1f7a9d3e8b5'
+branch_labels = None
+depends_on = None
+
+UNIQUE_INDEX = 'uq_password_reset_tokens_user_id'
+OLD_INDEX = 'ix_password_reset_tokens_user_id'
+
+password_reset_tokens = sa.table('password_reset_tokens',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer)
+)
+
+def index_exists(connection, table_name, index_name):
+    """Check if an index exists on a table."""
+    inspector = inspect(connection)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def delete_duplicates(connection):
+    """Keep only the newest token of each user; earlier ones were meant to be replaced."""
+    rows = connection.execute(
+        sa.select(password_reset_tokens.c.id, password_reset_tokens.c.user_id)
+        .order_by(password_reset_tokens.c.id.desc())
+    ).all()
+    
+    seen = set()
+    stale_ids = []
+    for token_id, user_id in rows:
+        if user_id in seen:
+            stale_ids.append(token_id)
+        seen.add(user_id)
+    
+    if stale_ids:
+        connection.execute(password_reset_tokens.delete().where(password_reset_tokens.c.id.in_(stale_ids)))
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    # One outstanding token per user. The unique index is created before the
+    # old one is dropped, so the user_id foreign key always has an index
+    if not index_exists(connection, 'password_reset_tokens', UNIQUE_INDEX):
+        delete_duplicates(connection)
+        op.create_index(UNIQUE_INDEX, 'password_reset_tokens', ['user_id'], unique=True)
+    
+    if index_exists(connection, 'password_reset_tokens', OLD_INDEX):
+        op.drop_index(OLD_INDEX, table_name='password_reset_tokens')
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not index_exists(connection, 'password_reset_tokens', OLD_INDEX):
+        op.create_index(OLD_INDEX, 'password_reset_tokens', ['user_id'], unique=False)
+    
+    if index_exists(connection, 'password_reset_tokens', UNIQUE_INDEX):
+        op.drop_index(UNIQUE_INDEX, table_name='password_reset_tokens')
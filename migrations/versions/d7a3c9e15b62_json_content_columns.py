@@ -0,0 +1,76 @@
+# migrations/versions/d7a3c9e15b62_json_content_columns.py
+"""json_content_columns
+
+Revision ID: d7a3c9e15b62
+Revises: c4e8a2f7d913
+Create Date: 2026-10-18 15:03:27.661940
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3c9e15b62'
+down_revision = 'c4e8a2f7d913'
+branch_labels = None
+depends_on = None
+
+# Table, column, and what to store when the current text is not valid JSON
+# (None stores NULL, KEEP_AS_STRING stores the text as a JSON string)
+KEEP_AS_STRING = object()
+JSON_COLUMNS = [
+    ('lessons', 'content', KEEP_AS_STRING),
+    ('coding_challenges', 'hints', '[]'),
+    ('user_game_progress', 'data', None),
+]
+
+def table_exists(connection, table_name):
+    """Check if a table exists in the database."""
+    inspector = inspect(connection)
+    return table_name in inspector.get_table_names()
+
+def sanitize_column(connection, table_name, column_name, fallback):
+    """
+    Make every value valid JSON before the column type changes (MySQL
+    rejects the ALTER otherwise). Blank values become NULL.
+    """
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(column_name, sa.Text))
+    column = table.c[column_name]
+    
+    rows = connection.execute(sa.select(table.c.id, column).where(column.isnot(None))).fetchall()
+    for row_id, value in rows:
+        if not value.strip():
+            replacement = None
+        else:
+            try:
+                json.loads(value)
+                continue
+            except ValueError:
+                replacement = json.dumps(value) if fallback is KEEP_AS_STRING else fallback
+        connection.execute(table.update().where(table.c.id == row_id).values({column_name: replacement}))
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    for table_name, column_name, fallback in JSON_COLUMNS:
+        if not table_exists(connection, table_name):
+            continue
+        
+        sanitize_column(connection, table_name, column_name, fallback)
+        
+        # Batch mode so SQLite can rebuild the table; other databases get a plain ALTER
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column(column_name, existing_type=sa.Text(), type_=sa.JSON(), existing_nullable=True)
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    for table_name, column_name, fallback in JSON_COLUMNS:
+        if not table_exists(connection, table_name):
+            continue
+        
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column(column_name, existing_type=sa.JSON(), type_=sa.Text(), existing_nullable=True)
@@ -0,0 +1,38 @@
+# migrations/versions/e5f19b3c7a20_add_game_list_index.py
+"""add_game_list_index
+
+Revision ID: e5f19b3c7a20
+Revises: d7a3c9e15b62
+Create Date: 2026-10-18 17:05:41.208736
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'e5f19b3c7a20'
+down_revision = 'd7a3c9e15b62'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_games_active_difficulty_category'
+
+def index_exists(connection, table_name, index_name):
+    """Check if an index exists on a table."""
+    inspector = inspect(connection)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    # Filtered, keyset-paginated game list
+    if not index_exists(connection, 'games', INDEX_NAME):
+        op.create_index(INDEX_NAME, 'games', ['is_active', 'difficulty', 'category'])
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if index_exists(connection, 'games', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='games')
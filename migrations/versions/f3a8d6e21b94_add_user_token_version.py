@@ -0,0 +1,49 @@
+# migrations/versions/f3a8d6e21b94_add_user_token_version.py
+"""add_user_token_version
+
+Revision ID: f3a8d6e21b94
+Revises: e5f19b3c7a20
+Create Date: 2026-10-18 18:12:36.904215
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d6e21b94'
+down_revision = 'e5f19b3c7a20'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_users_token_version'
+
+def column_exists(connection, table_name, column_name):
+    """Check if a column exists in a table."""
+    inspector = inspect(connection)
+    return column_name in [column['name'] for column in inspector.get_columns(table_name)]
+
+def index_exists(connection, table_name, index_name):
+    """Check if an index exists on a table."""
+    inspector = inspect(connection)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def upgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if not column_exists(connection, 'users', 'token_version'):
+        op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Each process reads the users with a non-zero version
+    if not index_exists(connection, 'users', INDEX_NAME):
+        op.create_index(INDEX_NAME, 'users', ['token_version'])
+
+def downgrade() -> None:
+    # Get the connection
+    connection = op.get_bind()
+    
+    if index_exists(connection, 'users', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='users')
+    
+    if column_exists(connection, 'users', 'token_version'):
+        op.drop_column('users', 'token_version')
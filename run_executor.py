@@ -0,0 +1,29 @@
+# run_executor.py
+import sys
+import argparse
+from app.config import settings
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Pythonchick code execution workers")
+    parser.add_argument('--address', default=settings.CODE_EXECUTOR_ADDRESS, help='Unix socket path or host:port to listen on')
+    parser.add_argument('--workers', type=int, default=settings.CODE_EXECUTION_POOL_SIZE or 4, help='Number of programs to run at once (the size of the executor\'s interpreter pool)')
+    parser.add_argument('--max-queue', type=int, default=settings.CODE_EXECUTOR_MAX_QUEUE, help='Jobs allowed to wait before submissions are rejected')
+    
+    args = parser.parse_args()
+    
+    # Imported after parsing so --help works without starting the interpreter pool
+    from app.services.execution_worker import ExecutionServer
+    
+    try:
+        server = ExecutionServer(
+            address=args.address,
+            workers=args.workers,
+            max_queue=args.max_queue
+        )
+    except ValueError as e:
+        print(f"Cannot start the execution workers: {str(e)}")
+        return 1
+    server.serve_forever()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# scripts/benchmark_code_execution.py
+"""
+Benchmark harness for the code execution subsystem.
+
+Drives CodeExecutionService (and optionally the POST /code/execute route,
+in-process) with a fixed corpus of programs at one or more concurrency
+levels, and reports throughput, latency percentiles and memory.
+
+    python scripts/benchmark_code_execution.py --concurrency 1,4,8 --iterations 20
+    python scripts/benchmark_code_execution.py --save-baseline
+    python scripts/benchmark_code_execution.py --compare
+
+--save-baseline writes the results to a JSON file; --compare runs the
+same configuration again and exits with status 1 when throughput or p95
+latency regressed by more than --tolerance against that file. Baselines
+are only comparable on the same host and settings (pool size, timeout,
+limits), which are recorded in the file.
+
+The result cache is disabled unless --with-cache is given, so every
+iteration really runs the program. --mode api needs httpx (the same
+package FastAPI's TestClient uses).
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import platform
+from datetime import datetime
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "code_execution_baseline.json")
+
+# name -> program, stdin, expected outcome, share of --iterations to run
+CORPUS = {
+    "hello_world": {
+        "code": "print('Hello, World!')",
+        "stdin": None,
+        "expect": "success",
+        "scale": 1.0
+    },
+    "stdin_echo": {
+        "code": "name = input()\nprint('Hi, ' + name + '!')",
+        "stdin": "Pythonchick\n",
+        "expect": "success",
+        "scale": 1.0
+    },
+    "cpu_loop": {
+        "code": "total = 0\nfor i in range(300000):\n    total += i * i\nprint(total)",
+        "stdin": None,
+        "expect": "success",
+        "scale": 1.0
+    },
+    "large_output": {
+        "code": "for i in range(20000):\n    print('line', i)",
+        "stdin": None,
+        "expect": "truncated",
+        "scale": 0.5
+    },
+    "syntax_error": {
+        "code": "print('missing parenthesis'",
+        "stdin": None,
+        "expect": "rejected",
+        "scale": 1.0
+    },
+    "runtime_error": {
+        "code": "numbers = [1, 2, 3]\nprint(numbers[10])",
+        "stdin": None,
+        "expect": "error",
+        "scale": 1.0
+    },
+    "infinite_loop": {
+        "code": "while True:\n    pass",
+        "stdin": None,
+        "expect": "limit",
+        "scale": 0.1
+    }
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+    return round(samples[index] * 1000, 2)
+
+
+def memory_usage():
+    """Current RSS of this process and peak RSS of its children, in MB (POSIX only)"""
+    usage = {"rss_mb": None, "children_peak_rss_mb": None}
+    try:
+        with open("/proc/self/statm") as statm:
+            usage["rss_mb"] = round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is in KB on Linux
+        usage["children_peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return usage
+
+
+def outcome(result):
+    if result.get("rejected"):
+        return "rejected"
+    if result.get("limit_exceeded") in ("timeout", "cpu"):
+        return "limit"
+    if result.get("output_truncated"):
+        return "truncated"
+    return "success" if result.get("success") else "error"
+
+
+def make_service_runner():
+    from app.services.code_execution import CodeExecutionService
+
+    service = CodeExecutionService()
+
+    async def run(code, stdin):
+        return await service.execute_code_async(code, stdin=stdin)
+
+    return run, None
+
+
+def make_api_runner():
+    """
+    Call POST /code/execute through the ASGI app without a server or a
+    database: the authentication dependency is replaced by a fixed user.
+    """
+    import httpx
+    from types import SimpleNamespace
+    from app.main import app
+    from app.services.auth import AuthService
+
+    for route in app.routes:
+        if getattr(route, "path", "").endswith("/code/execute"):
+            execute_route = route
+            break
+    else:
+        raise RuntimeError("POST /code/execute route not found")
+
+    for dependency in execute_route.dependant.dependencies:
+        if getattr(dependency.call, "__func__", None) is AuthService.get_current_user:
+            app.dependency_overrides[dependency.call] = lambda: SimpleNamespace(id=0, username="benchmark")
+
+    client = httpx.AsyncClient(app=app, base_url="http://benchmark")
+    path = execute_route.path
+
+    async def run(code, stdin):
+        response = await client.post(path, json={"code": code})
+        if response.status_code == 429:
+            return {"status": 429}
+        response.raise_for_status()
+        return response.json()
+
+    return run, client
+
+
+async def bench_entry(run, entry, iterations, concurrency):
+    limiter = asyncio.Semaphore(concurrency)
+    latencies = []
+    outcomes = {}
+    busy = 0
+
+    async def one():
+        nonlocal busy
+        async with limiter:
+            start = time.perf_counter()
+            result = await run(entry["code"], entry["stdin"])
+            elapsed = time.perf_counter() - start
+        if result.get("status") == 429:
+            busy += 1
+            return
+        latencies.append(elapsed)
+        kind = outcome(result)
+        outcomes[kind] = outcomes.get(kind, 0) + 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(iterations)])
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": percentile(latencies, 100),
+        "busy_429": busy,
+        "outcomes": outcomes,
+        "unexpected": sum(count for kind, count in outcomes.items() if kind != entry["expect"])
+    }
+
+
+async def run_benchmarks(args):
+    from app.config import settings
+
+    targets = []
+    if args.mode in ("service", "both"):
+        targets.append(("service", make_service_runner()))
+    if args.mode in ("api", "both"):
+        targets.append(("api", make_api_runner()))
+
+    names = args.corpus.split(",") if args.corpus else list(CORPUS)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": args.iterations,
+            "pool_size": settings.CODE_EXECUTION_POOL_SIZE,
+            "timeout": settings.CODE_EXECUTION_TIMEOUT,
+            "max_concurrency": settings.CODE_EXECUTION_MAX_CONCURRENCY,
+            "sandbox_limits": settings.CODE_SANDBOX_LIMITS_ENABLED,
+            "backend": settings.CODE_EXECUTION_BACKEND,
+            "result_cache": settings.CODE_CACHE_MAX_ENTRIES > 0
+        },
+        "results": {}
+    }
+
+    for target, (run, client) in targets:
+        # Warm up the pool (and the app) so the first entry does not pay for startup
+        await run(CORPUS["hello_world"]["code"], None)
+
+        for level in levels:
+            key = "{}/c{}".format(target, level)
+            report["results"][key] = {}
+            for name in names:
+                entry = CORPUS[name]
+                if target == "api" and entry["stdin"] is not None:
+                    # The route has no stdin field
+                    continue
+                iterations = max(1, int(args.iterations * entry["scale"]))
+                stats = await bench_entry(run, entry, iterations, level)
+                stats["memory"] = memory_usage()
+                report["results"][key][name] = stats
+                print("{:<12} {:<14} {:>8} runs/s  p50 {:>9} ms  p95 {:>9} ms  p99 {:>9} ms  429s {:>3}  unexpected {:>3}".format(
+                    key, name, stats["throughput_per_s"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"],
+                    stats["busy_429"], stats["unexpected"]
+                ))
+
+        if client is not None:
+            await client.aclose()
+
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regressions of report against baseline"""
+    regressions = []
+    for key, entries in report["results"].items():
+        for name, stats in entries.items():
+            base = baseline.get("results", {}).get(key, {}).get(name)
+            if not base:
+                continue
+            if base.get("p95_ms") and stats["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append("{} {}: p95 {} ms -> {} ms".format(key, name, base["p95_ms"], stats["p95_ms"]))
+            if base.get("throughput_per_s") and stats["throughput_per_s"] and \
+                    stats["throughput_per_s"] < base["throughput_per_s"] / (1 + tolerance):
+                regressions.append("{} {}: throughput {}/s -> {}/s".format(
+                    key, name, base["throughput_per_s"], stats["throughput_per_s"]))
+            if stats["unexpected"] > base.get("unexpected", 0):
+                regressions.append("{} {}: {} runs with an unexpected outcome".format(key, name, stats["unexpected"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Pythonchick code execution subsystem")
+    parser.add_argument('--mode', choices=['service', 'api', 'both'], default='service',
+                        help='Drive CodeExecutionService directly, the /code/execute route, or both')
+    parser.add_argument('--concurrency', default='1,4', help='Comma separated concurrency levels')
+    parser.add_argument('--iterations', type=int, default=20, help='Runs per corpus entry and concurrency level')
+    parser.add_argument('--corpus', default='', help='Comma separated subset of: ' + ', '.join(CORPUS))
+    parser.add_argument('--with-cache', action='store_true', help='Keep the execution result cache enabled')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--compare', action='store_true', help='Fail when results regress against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression (0.25 = 25%%)')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    args = parser.parse_args()
+
+    unknown = [name for name in args.corpus.split(",") if name and name not in CORPUS]
+    if unknown:
+        parser.error("unknown corpus entries: " + ", ".join(unknown))
+
+    # Settings are read at import time, so this must happen before importing the app
+    if not args.with_cache:
+        os.environ["CODE_CACHE_MAX_ENTRIES"] = "0"
+
+    report = asyncio.run(run_benchmarks(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(1)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against the baseline:")
+            for regression in regressions:
+                print("   " + regression)
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
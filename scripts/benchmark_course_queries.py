@@ -0,0 +1,105 @@
+# scripts/benchmark_course_queries.py
+"""
+Count the SQL queries behind the course list as the catalog grows.
+
+Builds catalogs of increasing size in an in-memory SQLite database, marks
+part of it as completed for one user, and reports how many queries
+CourseService.get_all_courses and get_course_with_topics issue and how long
+they take. The query counts should stay flat across sizes.
+
+The catalog itself comes from the in-memory snapshot (app/services/catalog.py);
+building it is reported separately as "load", requests only read progress.
+
+    python scripts/benchmark_course_queries.py --sizes 2x3x4,5x10x8,20x20x10
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add parent directory to path to import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from app.models import User, Course, Topic, Lesson, UserProgress
+from app.utils.database import Base
+from app.services.course import CourseService
+from app.services.catalog import get_catalog, invalidate_catalog
+from app.utils.query_stats import collect_queries, instrument_engine
+
+
+def build_catalog(db, courses, topics, lessons):
+    user = User(username="benchmark", email="benchmark@example.com", hashed_password="x", full_name="Benchmark")
+    db.add(user)
+
+    for c in range(courses):
+        course = Course(title=f"Course {c}", description="", order_index=c, is_locked=False)
+        for t in range(topics):
+            topic = Topic(title=f"Topic {t}", description="", order_index=t, is_locked=False)
+            topic.lessons = [
+                Lesson(title=f"Lesson {l}", type="lesson", content="[]", order_index=l)
+                for l in range(lessons)
+            ]
+            course.topics.append(topic)
+        db.add(course)
+    db.flush()
+
+    # Complete every lesson of the first half of the topics
+    completed = db.query(Lesson).join(Topic).filter(Topic.order_index < topics // 2).all()
+    db.add_all([UserProgress(user_id=user.id, lesson_id=lesson.id, is_completed=True) for lesson in completed])
+    db.commit()
+    return user.id
+
+
+def measure(call):
+    with collect_queries() as stats:
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+
+    for statement, executions in stats.n_plus_one():
+        print(f"  N+1: {executions}x {' '.join(statement.split())[:100]}")
+    return stats.count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count queries issued by the course list")
+    parser.add_argument('--sizes', default='2x3x4,5x10x8,20x20x10',
+                        help='Comma separated catalog sizes as COURSESxTOPICSxLESSONS')
+    args = parser.parse_args()
+
+    print(f"{'catalog':<12} {'lessons':>8} {'load queries':>13} {'load ms':>8} {'list queries':>13} {'list ms':>9} {'detail queries':>15} {'detail ms':>10}")
+    for size in args.sizes.split(","):
+        courses, topics, lessons = (int(part) for part in size.split("x"))
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        instrument_engine(engine)
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        user_id = build_catalog(db, courses, topics, lessons)
+        course_id = db.query(Course.id).first()[0]
+
+        # Each size has its own database, so drop the previous snapshot
+        invalidate_catalog()
+        load_queries, load_time = measure(lambda: get_catalog(db))
+
+        # Start from an empty identity map, like a fresh request
+        db.expunge_all()
+        service = CourseService(db)
+        list_queries, list_time = measure(lambda: service.get_all_courses(user_id))
+        db.expunge_all()
+        detail_queries, detail_time = measure(lambda: service.get_course_with_topics(course_id, user_id))
+
+        print(f"{size:<12} {courses * topics * lessons:>8} {load_queries:>13} {load_time * 1000:>8.1f} {list_queries:>13} {list_time * 1000:>9.1f} "
+              f"{detail_queries:>15} {detail_time * 1000:>10.1f}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from app.models.topic import Topic
 from app.models.lesson import Lesson
 from app.models.quiz import QuizQuestion, QuizOption
 from app.utils.database import SessionLocal
+from app.services.catalog import bump_content_version
 
 def seed_courses():
     db = SessionLocal()
@@ -69,7 +70,7 @@ def seed_courses():
                         topic_id=topic.id,
                         title=lesson_data["title"],
                         type=lesson_data["type"],
-                        content=json.dumps(lesson_data.get("content", [])) if lesson_data.get("content") else None,
+                        content=lesson_data.get("content") or None,
                         task=lesson_data.get("task"),
                         expected_output=lesson_data.get("expectedOutput"),
                         order_index=lesson_index
@@ -107,6 +108,9 @@ def seed_courses():
                                 )
                                 db.add(quiz_option)
         
+        # Tell running API processes to reload their catalog snapshot
+        bump_content_version(db)
+        
         # Commit all changes
         db.commit()
         print("Database seeded successfully!")
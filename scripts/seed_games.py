@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.repositories.game import GameRepository
 from app.utils.database import SessionLocal
+from app.services.catalog import bump_content_version
 
 def seed_games():
     db = SessionLocal()
@@ -98,6 +99,10 @@ def seed_games():
             
             print(f"Added game: {game.title}")
         
+        # Games are part of the versioned content: invalidate cached responses
+        bump_content_version(db)
+        db.commit()
+        
         print("Database seeded with games successfully!")
         
     except Exception as e:
@@ -0,0 +1,219 @@
+# scripts/smtp_stub.py
+"""
+Local SMTP server for trying out and testing outbound email.
+
+Accepts any login (AUTH PLAIN/LOGIN), keeps every message it receives and
+prints a line per message, so the email queue can run against it without
+a real mail server:
+
+    python scripts/smtp_stub.py --port 1025 --maildir /tmp/mail
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false python run.py
+
+It does not speak STARTTLS, hence SMTP_STARTTLS=false. To exercise the
+retry and dead-letter paths, --fail-every N answers every Nth message
+with a temporary 451 error and --reject-domain refuses recipients in a
+domain with a permanent 550.
+
+Tests can run it in-process:
+
+    stub = SMTPStub(port=0).start()
+    ...
+    stub.messages, stub.connections
+    stub.stop()
+"""
+import os
+import sys
+import time
+import base64
+import argparse
+import threading
+import socketserver
+from typing import List, Optional
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """One SMTP session"""
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("utf-8"))
+
+    def read_line(self) -> Optional[str]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        stub.connection_opened()
+        self.reply("220 smtp-stub ready")
+        mail_from, recipients = None, []
+
+        while True:
+            line = self.read_line()
+            if line is None:
+                return
+            command, _, argument = line.partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self.reply("250-smtp-stub")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 smtp-stub")
+            elif command == "AUTH":
+                self.authenticate(argument)
+            elif command == "MAIL":
+                mail_from, recipients = argument.partition(":")[2].strip().strip("<>"), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                address = argument.partition(":")[2].strip().strip("<>")
+                if stub.reject_domain and address.lower().endswith("@" + stub.reject_domain):
+                    self.reply("550 No such user here")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                if not recipients:
+                    self.reply("503 Need RCPT first")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self.read_data()
+                if data is None:
+                    return
+                if stub.accept(mail_from, recipients, data):
+                    self.reply("250 OK queued")
+                else:
+                    self.reply("451 Temporary failure, try again later")
+                mail_from, recipients = None, []
+            elif command == "RSET":
+                mail_from, recipients = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def authenticate(self, argument: str):
+        mechanism, _, initial = argument.partition(" ")
+        mechanism = mechanism.upper()
+        if mechanism == "PLAIN":
+            if not initial:
+                self.reply("334 ")
+                self.read_line()
+        elif mechanism == "LOGIN":
+            self.reply("334 " + base64.b64encode(b"Username:").decode())
+            self.read_line()
+            self.reply("334 " + base64.b64encode(b"Password:").decode())
+            self.read_line()
+        else:
+            self.reply("504 Unrecognized authentication type")
+            return
+        self.reply("235 Authentication successful")
+
+    def read_data(self) -> Optional[str]:
+        lines = []
+        while True:
+            line = self.read_line()
+            if line is None:
+                return None
+            if line == ".":
+                return "\n".join(lines)
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(".") else line)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPStub:
+    """
+    The stub server. messages holds (mail_from, recipients, data) for every
+    accepted message; connections counts the SMTP sessions opened.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, maildir: str = "",
+                 fail_every: int = 0, reject_domain: str = "", quiet: bool = True):
+        self.maildir = maildir
+        self.fail_every = fail_every
+        self.reject_domain = reject_domain.lower()
+        self.quiet = quiet
+        self.messages: List[tuple] = []
+        self.connections = 0
+        self._received = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), SMTPStubHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def accept(self, mail_from: str, recipients: List[str], data: str) -> bool:
+        """Store a message; False to answer it with a temporary failure"""
+        with self._lock:
+            self._received += 1
+            if self.fail_every and self._received % self.fail_every == 0:
+                return False
+            self.messages.append((mail_from, recipients, data))
+            count = len(self.messages)
+
+        if self.maildir:
+            path = os.path.join(self.maildir, "{:06d}.eml".format(count))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        if not self.quiet:
+            subject = next((line[9:] for line in data.splitlines() if line.startswith("Subject: ")), "")
+            print(f"[{time.strftime('%H:%M:%S')}] {mail_from} -> {', '.join(recipients)}: {subject}")
+        return True
+
+    def start(self) -> "SMTPStub":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP server that accepts and keeps every message")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--maildir", default="", help="Write each message to this directory as an .eml file")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth message with a 451 error")
+    parser.add_argument("--reject-domain", default="", help="Refuse recipients in this domain with a 550 error")
+    args = parser.parse_args()
+
+    if args.maildir:
+        os.makedirs(args.maildir, exist_ok=True)
+
+    stub = SMTPStub(args.host, args.port, maildir=args.maildir, fail_every=args.fail_every,
+                    reject_domain=args.reject_domain, quiet=False)
+    print(f"SMTP stub listening on {args.host}:{stub.port}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
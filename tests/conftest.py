@@ -0,0 +1,82 @@
+# tests/conftest.py
+"""
+Shared fixtures: each test module gets a throwaway SQLite database that
+the app uses instead of the configured one.
+
+A module seeds it by overriding the seed fixture, which runs before the
+client starts (and loads the catalog):
+
+    @pytest.fixture(scope="module")
+    def seed(database):
+        db = database()
+        ...
+        return {"user": user.id}
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.api.code_execution as code_execution_api
+import app.utils.database as database_module
+from app.config import settings
+from app.main import app
+from app.services.catalog import invalidate_catalog
+from app.services.progress_cache import progress_cache
+from app.services.token_versions import token_versions
+from app.utils.database import Base, get_db
+from app.utils.query_stats import QueryStatsMiddleware, instrument_engine
+
+
+def _reset_caches():
+    """Per-process caches filled from another database"""
+    invalidate_catalog()
+    progress_cache.invalidate()
+    token_versions.invalidate()
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    """Session factory of the module's database, also used by the app"""
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    # TestClient serves requests from another thread than the test's
+    engine = create_engine("sqlite:///{}".format(path), connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with pytest.MonkeyPatch.context() as patch:
+        # Code that opens its own sessions instead of using get_db
+        patch.setattr(database_module, "SessionLocal", TestingSessionLocal)
+        patch.setattr(code_execution_api, "SessionLocal", TestingSessionLocal)
+        app.dependency_overrides[get_db] = override_get_db
+        _reset_caches()
+        try:
+            yield TestingSessionLocal
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            _reset_caches()
+            engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    """Ids of the module's test data; override to add some"""
+    return {}
+
+
+@pytest.fixture(scope="module")
+def client(database, seed):
+    """TestClient on the app, with the X-DB-* headers even where QUERY_STATS_ENABLED is off"""
+    asgi_app = app if settings.QUERY_STATS_ENABLED else QueryStatsMiddleware(app)
+    # The startup event loads the catalog snapshot
+    with TestClient(asgi_app) as test_client:
+        test_client.ids = seed
+        yield test_client
@@ -0,0 +1,38 @@
+# tests/test_auth.py
+"""
+Access tokens against a throwaway SQLite database (see conftest.py):
+
+    python -m pytest tests/test_auth.py
+"""
+from app.models import User
+
+API = "/api/v1"
+
+
+def _signed_in(client, username: str) -> dict:
+    password = "Token-pass1"
+    response = client.post(f"{API}/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": password, "full_name": username
+    })
+    assert response.status_code == 200, response.text
+    response = client.post(f"{API}/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": "Bearer {}".format(response.json()["access_token"])}
+
+
+def test_deactivated_user_is_signed_out(database, client):
+    headers = _signed_in(client, "leaving")
+    other_headers = _signed_in(client, "staying")
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 200
+
+    db = database()
+    try:
+        user = db.query(User).filter(User.username == "leaving").one()
+        user.is_active = False
+        db.commit()
+    finally:
+        db.close()
+
+    # Refused by the next request in this process, before any token version refresh
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 401
+    assert client.get(f"{API}/auth/me", headers=other_headers).status_code == 200
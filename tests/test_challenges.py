@@ -0,0 +1,118 @@
+# tests/test_challenges.py
+"""
+Challenge rewards against a throwaway SQLite database (see conftest.py):
+
+    python -m pytest tests/test_challenges.py
+
+A challenge pays its experience and coins once, on the first correct
+submission; every submission, failed or not, counts as an attempt.
+"""
+import pytest
+from app.models import CodingChallenge, User, UserChallenge
+from app.services.auth import AuthService
+from app.services.game import GameService
+
+API = "/api/v1"
+
+POINTS = 20
+SOLUTION = "print('hello')"
+
+
+def _user(db, username: str) -> int:
+    user = User(username=username, email=f"{username}@example.com", hashed_password="x", full_name=username,
+                experience=0, coins=0)
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    db = database()
+    try:
+        challenge = CodingChallenge(title="Hello", description="Print hello", difficulty="beginner",
+                                    starter_code="", expected_output="hello", hints=[], points=POINTS)
+        db.add(challenge)
+        db.commit()
+        return {"challenge": challenge.id}
+    finally:
+        db.close()
+
+
+def _rewards(db, user_id: int):
+    user = db.query(User).filter(User.id == user_id).one()
+    return user.experience, user.coins
+
+
+def _attempt(db, user_id: int, challenge_id: int) -> UserChallenge:
+    return db.query(UserChallenge).filter(
+        UserChallenge.user_id == user_id,
+        UserChallenge.challenge_id == challenge_id
+    ).one()
+
+
+def test_correct_solution_is_paid_once(database, client):
+    db = database()
+    try:
+        user_id = _user(db, "solver")
+        challenge_id = client.ids["challenge"]
+
+        first = GameService(db).evaluate_challenge(user_id, challenge_id, SOLUTION, output="hello")
+        second = GameService(db).evaluate_challenge(user_id, challenge_id, SOLUTION, output="hello")
+
+        assert (first["correct"], first["points_earned"], first["coins_earned"]) == (True, POINTS, POINTS // 2)
+        assert (second["correct"], second["points_earned"], second["coins_earned"]) == (True, 0, 0)
+        db.expire_all()
+        assert _rewards(db, user_id) == (POINTS, POINTS // 2)
+        assert _attempt(db, user_id, challenge_id).attempts == 2
+    finally:
+        db.close()
+
+
+def test_failed_attempt_is_recorded(database, client):
+    db = database()
+    try:
+        user_id = _user(db, "learner")
+        challenge_id = client.ids["challenge"]
+
+        failed = GameService(db).evaluate_challenge(user_id, challenge_id, "print('hi')", output="hi")
+        assert (failed["correct"], failed["points_earned"], failed["coins_earned"]) == (False, 0, 0)
+        attempt = _attempt(db, user_id, challenge_id)
+        assert (attempt.attempts, attempt.completed, attempt.code_submitted) == (1, False, "print('hi')")
+        assert _rewards(db, user_id) == (0, 0)
+
+        # Solving it afterwards still pays, once
+        solved = GameService(db).evaluate_challenge(user_id, challenge_id, SOLUTION, output="hello")
+        assert solved["points_earned"] == POINTS
+        db.expire_all()
+        attempt = _attempt(db, user_id, challenge_id)
+        assert (attempt.attempts, attempt.completed) == (2, True)
+        assert _rewards(db, user_id) == (POINTS, POINTS // 2)
+    finally:
+        db.close()
+
+
+def test_batch_with_the_same_solution_twice_pays_once(database, client):
+    db = database()
+    try:
+        user_id = _user(db, "batcher")
+        user = db.query(User).filter(User.id == user_id).one()
+        token = AuthService().create_access_token(AuthService.token_claims(user))
+    finally:
+        db.close()
+
+    submission = {"challenge_id": str(client.ids["challenge"]), "code": SOLUTION}
+    response = client.post(f"{API}/games/challenges/submit-batch", json={"submissions": [submission, submission]},
+                           headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [result["correct"] for result in body["results"]] == [True, True]
+    assert (body["total_points_earned"], body["total_coins_earned"]) == (POINTS, POINTS // 2)
+
+    db = database()
+    try:
+        assert _rewards(db, user_id) == (POINTS, POINTS // 2)
+        assert _attempt(db, user_id, client.ids["challenge"]).attempts == 2
+    finally:
+        db.close()
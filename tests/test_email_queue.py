@@ -0,0 +1,148 @@
+# tests/test_email_queue.py
+"""
+EmailQueue against the in-process SMTP stub (scripts/smtp_stub.py):
+
+    python -m pytest tests/test_email_queue.py
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from smtp_stub import SMTPStub
+from app.config import settings
+from app.utils.email_queue import EmailQueue
+
+
+def _message(to_email: str, subject: str, body: str = "Hello") -> str:
+    return "From: noreply@example.com\r\nTo: {}\r\nSubject: {}\r\n\r\n{}".format(to_email, subject, body)
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def start_stub(monkeypatch):
+    """Start a stub server and point the SMTP settings at it"""
+    stubs = []
+
+    def start(**options):
+        stub = SMTPStub(port=0, **options).start()
+        stubs.append(stub)
+        monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setattr(settings, "SMTP_PORT", stub.port)
+        monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+        monkeypatch.setattr(settings, "SMTP_USERNAME", "queue")
+        monkeypatch.setattr(settings, "SMTP_PASSWORD", "secret")
+        return stub
+
+    yield start
+    for stub in stubs:
+        stub.stop()
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**options):
+        options.setdefault("max_size", 100)
+        options.setdefault("batch_size", 10)
+        options.setdefault("max_attempts", 3)
+        options.setdefault("retry_base_seconds", 0.05)
+        options.setdefault("idle_seconds", 30)
+        options.setdefault("dead_letter_path", str(tmp_path / "dead-letter.jsonl"))
+        email_queue = EmailQueue(**options)
+        queues.append(email_queue)
+        return email_queue
+
+    yield make
+    for email_queue in queues:
+        email_queue.stop(timeout=5)
+
+
+def _enqueue(email_queue, to_email: str, subject: str, body: str = "Hello"):
+    assert email_queue.enqueue(to_email, "noreply@example.com", subject, _message(to_email, subject, body))
+
+
+def test_connection_is_reused(start_stub, make_queue):
+    stub = start_stub()
+    email_queue = make_queue()
+
+    for i in range(5):
+        _enqueue(email_queue, f"user{i}@example.com", f"Message {i}")
+    assert _wait_for(lambda: email_queue.stats()["sent"] == 5)
+
+    _enqueue(email_queue, "late@example.com", "Later")
+    assert _wait_for(lambda: email_queue.stats()["sent"] == 6)
+
+    assert stub.connections == 1
+    assert email_queue.stats()["connections_opened"] == 1
+    assert len(stub.messages) == 6
+
+
+def test_temporary_failure_is_retried(start_stub, make_queue):
+    # Every second message is answered with 451
+    stub = start_stub(fail_every=2)
+    email_queue = make_queue()
+
+    for i in range(3):
+        _enqueue(email_queue, f"user{i}@example.com", f"Message {i}")
+    assert _wait_for(lambda: email_queue.stats()["sent"] == 3)
+
+    stats = email_queue.stats()
+    assert stats["retried"] >= 1
+    assert stats["dead_lettered"] == 0
+    assert sorted(recipients[0] for _, recipients, _ in stub.messages) == [
+        "user0@example.com", "user1@example.com", "user2@example.com"
+    ]
+
+
+def test_permanent_failure_is_dead_lettered(start_stub, make_queue, tmp_path, capsys):
+    stub = start_stub(reject_domain="rejected.example.com")
+    email_queue = make_queue()
+
+    _enqueue(email_queue, "nobody@rejected.example.com", "Reset your password", body="secret-reset-link")
+    _enqueue(email_queue, "somebody@example.com", "Welcome")
+    assert _wait_for(lambda: email_queue.stats()["dead_lettered"] == 1 and email_queue.stats()["sent"] == 1)
+
+    # A 550 is not retried
+    assert email_queue.stats()["retried"] == 0
+    assert len(stub.messages) == 1
+
+    with open(tmp_path / "dead-letter.jsonl", encoding="utf-8") as log:
+        records = [json.loads(line) for line in log]
+    assert len(records) == 1
+    assert records[0]["to"] == "nobody@rejected.example.com"
+    assert records[0]["subject"] == "Reset your password"
+    assert records[0]["attempts"] == 1
+    assert "550" in records[0]["error"]
+
+    # The body (which may hold a reset link) is neither logged nor printed
+    assert "secret-reset-link" not in json.dumps(records)
+    assert "secret-reset-link" not in capsys.readouterr().out
+
+
+def test_stop_flushes_the_queue(start_stub, make_queue):
+    stub = start_stub()
+    email_queue = make_queue(batch_size=2)
+
+    for i in range(7):
+        _enqueue(email_queue, f"user{i}@example.com", f"Message {i}")
+    email_queue.stop(timeout=5)
+
+    stats = email_queue.stats()
+    assert stats["sent"] == 7
+    assert stats["queued"] == 0
+    assert stats["connected"] is False
+    assert len(stub.messages) == 7
@@ -0,0 +1,92 @@
+# tests/test_game_pagination.py
+"""
+Keyset pages of the game list against a throwaway SQLite database (see
+conftest.py):
+
+    python -m pytest tests/test_game_pagination.py
+"""
+import base64
+import json
+
+import pytest
+from app.models import Game
+
+API = "/api/v1"
+
+# Several games per title, so pages break inside a run of equal titles
+TITLES = ["Loops", "Variables", "Loops", "Functions", "Loops", "Variables",
+          "Functions", "Loops", "Variables", "Loops", "Functions", "Loops"]
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    db = database()
+    try:
+        for index, title in enumerate(TITLES):
+            db.add(Game(title=title, slug=f"game-{index}", description="Game", difficulty="beginner",
+                        category="quest"))
+        # Inactive games are never listed
+        db.add(Game(title="Loops", slug="retired", description="Game", difficulty="beginner",
+                    category="quest", is_active=False))
+        db.commit()
+        games = db.query(Game).filter(Game.is_active == True).all()
+        return {
+            "by_title": [game.slug for game in sorted(games, key=lambda game: (game.title, game.id))],
+            "by_id": [game.slug for game in sorted(games, key=lambda game: game.id)]
+        }
+    finally:
+        db.close()
+
+
+def _walk(client, sort: str, limit: int):
+    """Slugs of every page in order, following X-Next-Cursor"""
+    slugs = []
+    params = {"sort": sort, "limit": limit}
+    for _ in range(len(TITLES) + 1):
+        response = client.get(f"{API}/game", params=params)
+        assert response.status_code == 200, response.text
+        page = [game["slug"] for game in response.json()]
+        assert len(page) <= limit
+        slugs.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return slugs
+        params = {"sort": sort, "limit": limit, "cursor": cursor}
+    pytest.fail("pagination did not end")
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, len(TITLES)])
+def test_title_pages_have_no_gaps_or_repeats(client, limit):
+    slugs = _walk(client, "title", limit)
+    assert slugs == client.ids["by_title"]
+
+    unpaged = client.get(f"{API}/game", params={"sort": "title"})
+    assert [game["slug"] for game in unpaged.json()] == slugs
+
+
+def test_id_pages_have_no_gaps_or_repeats(client):
+    assert _walk(client, "id", 5) == client.ids["by_id"]
+
+
+def _encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("sort,cursor", [
+    ("title", "not a cursor"),
+    ("title", _encode("Loops")),
+    ("title", _encode(["Loops", 1, 2])),
+    ("title", _encode(["Loops", "1"])),
+    ("title", _encode(["Loops", True])),
+    # Well-formed, but the value cannot be compared with a title
+    ("title", _encode([{"title": "Loops"}, 1])),
+    ("title", _encode([None, 1])),
+    ("title", _encode(["Loops", 10 ** 30])),
+    ("id", "abc"),
+    ("id", "-1"),
+    ("id", _encode(["Loops", 1]))
+])
+def test_malformed_cursor_is_rejected(client, sort, cursor):
+    response = client.get(f"{API}/game", params={"sort": sort, "cursor": cursor, "limit": 3})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,87 @@
+# tests/test_login_throttle.py
+"""
+LoginThrottle, without Redis:
+
+    python -m pytest tests/test_login_throttle.py
+"""
+import pytest
+
+from app.services.login_throttle import LoginThrottle, LoginThrottled
+
+
+def _throttle(**options) -> LoginThrottle:
+    options.setdefault("max_failures_per_username", 5)
+    options.setdefault("max_failures_per_ip", 3)
+    options.setdefault("window_seconds", 300)
+    options.setdefault("unknown_user_ttl", 60)
+    options.setdefault("max_keys", 1000)
+    return LoginThrottle(**options)
+
+
+def test_untrusted_peer_is_the_client():
+    throttle = _throttle(trusted_proxies="10.0.0.0/8")
+
+    # A client cannot pick its own key by sending the header
+    assert throttle.client_ip("203.0.113.7", "198.51.100.1") == "203.0.113.7"
+    assert throttle.client_ip(None, "198.51.100.1") is None
+
+
+def test_client_behind_trusted_proxies():
+    throttle = _throttle(trusted_proxies="10.0.0.0/8, 192.0.2.1")
+
+    assert throttle.client_ip("10.0.0.5", "198.51.100.1") == "198.51.100.1"
+    # Entries left of the first untrusted one may be forged by the client
+    assert throttle.client_ip("10.0.0.5", "1.2.3.4, 198.51.100.1, 192.0.2.1") == "198.51.100.1"
+    # The proxy did not say who the client is: no IP limit
+    assert throttle.client_ip("10.0.0.5", None) is None
+    assert throttle.client_ip("10.0.0.5", "10.0.0.9") is None
+    assert throttle.client_ip("10.0.0.5", "not-an-address") is None
+
+
+def test_clients_behind_a_proxy_are_limited_separately():
+    throttle = _throttle(trusted_proxies="10.0.0.1")
+
+    attacker = throttle.client_ip("10.0.0.1", "198.51.100.1")
+    for i in range(3):
+        throttle.record_failure(f"victim{i}", attacker)
+    with pytest.raises(LoginThrottled):
+        throttle.check("someone", attacker)
+
+    # Another client through the same proxy is not locked out
+    throttle.check("someone", throttle.client_ip("10.0.0.1", "198.51.100.2"))
+
+
+class _SharedStore:
+    """Stands in for RedisThrottleStore: one store seen by every worker"""
+    def __init__(self):
+        self.unknown = set()
+
+    def is_unknown(self, username, now):
+        return username in self.unknown
+
+    def mark_unknown(self, username, now, ttl):
+        self.unknown.add(username)
+
+    def forget_unknown(self, username):
+        self.unknown.discard(username)
+
+
+def test_unknown_users_are_not_cached_per_process():
+    # Another worker registering the name could not clear this worker's cache
+    throttle = _throttle()
+    throttle.mark_unknown_user("newcomer")
+    assert not throttle.is_unknown_user("newcomer")
+
+
+def test_unknown_user_keys_match_the_failure_keys():
+    shared = _SharedStore()
+    worker, other_worker = _throttle(), _throttle()
+    worker._shared = other_worker._shared = shared
+
+    worker.mark_unknown_user(" Newcomer")
+    assert worker.is_unknown_user("newcomer")
+    assert other_worker.is_unknown_user("NEWCOMER ")
+
+    # Registered through the other worker, under different casing
+    other_worker.forget_unknown_user("newcomer")
+    assert not worker.is_unknown_user(" Newcomer")
@@ -0,0 +1,96 @@
+# tests/test_password_reset.py
+"""
+Password reset endpoints against a throwaway SQLite database (see
+conftest.py), with the reset email captured instead of queued:
+
+    python -m pytest tests/test_password_reset.py
+"""
+import pytest
+from app.utils.email import EmailService
+
+API = "/api/v1"
+
+EMAIL = "reset@example.com"
+PASSWORD = "Original-pass1"
+
+
+@pytest.fixture
+def reset_tokens(monkeypatch):
+    """Tokens sent by /auth/forgot-password, in order"""
+    tokens = []
+
+    def send_password_reset(self, to_email, reset_token, username):
+        tokens.append(reset_token)
+        return True
+
+    monkeypatch.setattr(EmailService, "send_password_reset", send_password_reset)
+    return tokens
+
+
+@pytest.fixture(scope="module")
+def account(client):
+    response = client.post(f"{API}/auth/register", json={
+        "username": "resetter", "email": EMAIL, "password": PASSWORD, "full_name": "Reset Tester"
+    })
+    assert response.status_code == 200, response.text
+    # Each test resets the password; keep track of the current one
+    return {"password": PASSWORD}
+
+
+def _login(client, password: str):
+    return client.post(f"{API}/auth/login", json={"username": "resetter", "password": password})
+
+
+def _forgot(client, reset_tokens) -> str:
+    response = client.post(f"{API}/auth/forgot-password", json={"email": EMAIL})
+    assert response.status_code == 200, response.text
+    return reset_tokens[-1]
+
+
+def _reset(client, token: str, new_password: str):
+    return client.post(f"{API}/auth/reset-password", json={
+        "email": EMAIL, "token": token, "new_password": new_password
+    })
+
+
+def test_second_request_invalidates_the_first_token(client, account, reset_tokens):
+    first = _forgot(client, reset_tokens)
+    second = _forgot(client, reset_tokens)
+    assert first != second
+
+    response = client.post(f"{API}/auth/verify-reset-token", json={"email": EMAIL, "token": first})
+    assert response.status_code == 400
+    assert _reset(client, first, "Never-used-pass1").status_code == 400
+
+    assert _reset(client, second, "Second-token-pass1").status_code == 200
+    account["password"] = "Second-token-pass1"
+    assert _login(client, "Second-token-pass1").status_code == 200
+
+
+def test_consumed_token_cannot_be_reused(client, account, reset_tokens):
+    token = _forgot(client, reset_tokens)
+    assert _reset(client, token, "Consumed-pass1").status_code == 200
+    account["password"] = "Consumed-pass1"
+
+    response = _reset(client, token, "Replayed-pass1")
+    assert response.status_code == 400
+    assert _login(client, "Replayed-pass1").status_code == 401
+    assert _login(client, "Consumed-pass1").status_code == 200
+
+
+def test_reset_signs_out_existing_sessions(client, account, reset_tokens):
+    response = _login(client, account["password"])
+    assert response.status_code == 200
+    headers = {"Authorization": "Bearer {}".format(response.json()["access_token"])}
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 200
+
+    token = _forgot(client, reset_tokens)
+    assert _reset(client, token, "Fresh-session-pass1").status_code == 200
+
+    # Refused by the next request in this process, before any token version refresh
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 401
+
+    response = _login(client, "Fresh-session-pass1")
+    assert response.status_code == 200
+    headers = {"Authorization": "Bearer {}".format(response.json()["access_token"])}
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 200
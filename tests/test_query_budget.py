@@ -0,0 +1,116 @@
+# tests/test_query_budget.py
+"""
+Query budgets of the catalog read endpoints, against a throwaway SQLite
+database (see conftest.py):
+
+    python -m pytest tests/test_query_budget.py
+
+Anonymous reads are served from the catalog snapshot; a signed-in read
+adds the progress version check (and the progress load when the user's
+state is not cached yet). One more query is allowed for the catalog's
+periodic content version check.
+"""
+import pytest
+from app.models import Course, Topic, Lesson, QuizQuestion, QuizOption, User, UserProgress
+from app.services.progress_cache import progress_cache
+from app.utils.query_stats import query_budget
+
+API = "/api/v1"
+
+# Allowance for the catalog's content version check (CATALOG_REFRESH_SECONDS)
+CATALOG_CHECK = 1
+
+
+def _seed(db):
+    """Two courses of three topics, each with a text, a coding and a quiz lesson"""
+    user = User(username="budget", email="budget@example.com", hashed_password="x", full_name="Budget")
+    db.add(user)
+
+    for course_index in range(2):
+        course = Course(title=f"Course {course_index}", description="Course", order_index=course_index)
+        db.add(course)
+        db.flush()
+        for topic_index in range(3):
+            topic = Topic(course_id=course.id, title=f"Topic {topic_index}", description="Topic",
+                          order_index=topic_index)
+            db.add(topic)
+            db.flush()
+            db.add(Lesson(topic_id=topic.id, title="Read", type="lesson", order_index=0,
+                          content=[{"title": "Print", "description": "print() shows a value"}]))
+            db.add(Lesson(topic_id=topic.id, title="Code", type="coding", order_index=1,
+                          task="Print 3", expected_output="3"))
+            quiz = Lesson(topic_id=topic.id, title="Quiz", type="quiz", order_index=2)
+            db.add(quiz)
+            db.flush()
+            question = QuizQuestion(lesson_id=quiz.id, question="1 + 2?", explanation="Addition", order_index=0)
+            db.add(question)
+            db.flush()
+            db.add_all([
+                QuizOption(question_id=question.id, option_text="3", is_correct=True, order_index=0),
+                QuizOption(question_id=question.id, option_text="4", is_correct=False, order_index=1)
+            ])
+
+    db.flush()
+    db.add(UserProgress(user_id=user.id, lesson_id=1, is_completed=True, attempts=1))
+    db.commit()
+    return user.id
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    db = database()
+    try:
+        ids = {"user": _seed(db)}
+        ids["course"] = db.query(Course.id).order_by(Course.id).first()[0]
+        ids["topic"] = db.query(Topic.id).order_by(Topic.id).first()[0]
+        ids["quiz"] = db.query(Lesson.id).filter(Lesson.type == "quiz").order_by(Lesson.id).first()[0]
+        return ids
+    finally:
+        db.close()
+
+
+def _paths(ids):
+    return [
+        f"{API}/courses",
+        f"{API}/courses/{ids['course']}",
+        f"{API}/topics/{ids['topic']}",
+        f"{API}/lessons/{ids['quiz']}",
+        f"{API}/lessons/{ids['quiz'] - 1}"
+    ]
+
+
+def test_anonymous_reads_use_the_catalog(client):
+    for path in _paths(client.ids):
+        with query_budget(CATALOG_CHECK):
+            response = client.get(path)
+        assert response.status_code == 200, path
+
+
+def test_signed_in_reads_check_the_progress_version(client):
+    user_id = client.ids["user"]
+    progress_cache.invalidate(user_id)
+
+    # First read loads completions, unlocks and the progress version
+    with query_budget(3 + CATALOG_CHECK):
+        response = client.get(f"{API}/courses", params={"user_id": user_id})
+    assert response.status_code == 200
+
+    for path in _paths(client.ids):
+        with query_budget(1 + CATALOG_CHECK):
+            response = client.get(path, params={"user_id": user_id})
+        assert response.status_code == 200, path
+
+
+def test_revalidation_is_answered_from_the_validator(client):
+    user_id = client.ids["user"]
+    for path in _paths(client.ids):
+        etag = client.get(path, params={"user_id": user_id}).headers["ETag"]
+        with query_budget(1 + CATALOG_CHECK):
+            response = client.get(path, params={"user_id": user_id}, headers={"If-None-Match": etag})
+        assert response.status_code == 304, path
+
+
+def test_query_count_header(client):
+    response = client.get(f"{API}/topics/{client.ids['topic']}", params={"user_id": client.ids["user"]})
+    assert int(response.headers["X-DB-Query-Count"]) <= 1 + CATALOG_CHECK
+    assert response.headers["X-DB-N-Plus-One"] == "0"